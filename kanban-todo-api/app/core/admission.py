@@ -0,0 +1,181 @@
+"""Admission control: giới hạn request đồng thời theo lớp route và từ chối sớm khi quá tải.
+
+Mỗi request HTTP thuộc một lớp:
+
+- `auth`: `/auth/...` (login/register tốn CPU cho bcrypt),
+- `write`: POST/PUT/PATCH/DELETE còn lại,
+- `read`: các request khác.
+
+Mỗi lớp có tối đa `settings.admission_limits[lớp]` request đang xử lý. Request
+vượt giới hạn xếp hàng (FIFO, tối đa `settings.admission_queue_size` request
+mỗi lớp) và chờ không quá `settings.admission_max_queue_wait_ms[lớp]`; hết
+chỗ xếp hàng hoặc chờ quá lâu thì trả 503 + `Retry-After` ngay, trước khi
+chiếm thread của threadpool hay connection DB. Vì giới hạn tách theo lớp, login
+hoặc ghi hàng loạt bị dồn ứ không làm các request đọc rẻ phải chờ theo (tổng
+giới hạn của auth + write nên nhỏ hơn threadpool của Starlette, mặc định 40).
+
+Trạng thái nằm trong event loop của process (không lock): mỗi worker uvicorn
+giới hạn riêng. `/health` và `/metrics` không bị giới hạn.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app.core import metrics
+from app.core.config import settings
+
+ROUTE_CLASSES = ("auth", "read", "write")
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+
+admission_queue_wait_seconds = metrics.registry.histogram(
+    "admission_queue_wait_seconds", "Thời gian request chờ admission (giây)", ("class",)
+)
+admission_rejected_total = metrics.registry.counter(
+    "admission_rejected_total", "Số request bị từ chối (503) theo lớp và lý do", ("class", "reason")
+)
+
+
+def route_class(scope) -> Optional[str]:
+    """Lớp admission của request, None nếu không giới hạn"""
+    path = scope["path"]
+    if path in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+        return None
+    if path.startswith("/auth/"):
+        return "auth"
+    return "write" if scope["method"] in WRITE_METHODS else "read"
+
+
+class AdmissionLimiter:
+    """Semaphore FIFO có hàng đợi giới hạn cho một lớp route"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait_seconds = max_wait_seconds
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """Chờ đến lượt; trả về None khi được nhận, hoặc lý do bị từ chối"""
+        if self.limit <= 0:
+            self.in_flight += 1
+            return None
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Được nhận đúng lúc hết giờ: chỗ đã được giữ cho request này
+                return None
+            self._discard(waiter)
+            return "timeout"
+        except asyncio.CancelledError:
+            # Client ngắt kết nối khi đang chờ: trả lại chỗ nếu vừa được nhận
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            admission_queue_wait_seconds.observe(time.perf_counter() - started_at, self.name)
+        return None
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        # Chuyển chỗ trực tiếp cho request chờ lâu nhất (in_flight giữ nguyên)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "queued": self.queued}
+
+
+def create_limiters() -> Dict[str, AdmissionLimiter]:
+    return {
+        name: AdmissionLimiter(
+            name,
+            settings.admission_limits.get(name, 0),
+            settings.admission_queue_size,
+            settings.admission_max_queue_wait_ms.get(name, 0) / 1000,
+        )
+        for name in ROUTE_CLASSES
+    }
+
+
+limiters = create_limiters()
+
+
+def admission_stats() -> Dict[str, dict]:
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+def _in_flight_gauge():
+    return [((name,), limiter.in_flight) for name, limiter in limiters.items()]
+
+
+def _queued_gauge():
+    return [((name,), limiter.queued) for name, limiter in limiters.items()]
+
+
+metrics.registry.gauge(
+    "admission_in_flight", "Số request đang xử lý theo lớp admission", ("class",), callback=_in_flight_gauge
+)
+metrics.registry.gauge(
+    "admission_queued", "Số request đang chờ admission theo lớp", ("class",), callback=_queued_gauge
+)
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware giới hạn request đồng thời theo lớp, quá tải trả 503 + Retry-After"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        name = route_class(scope) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[name]
+        rejected = await limiter.acquire()
+        if rejected is not None:
+            admission_rejected_total.inc(name, rejected)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server đang quá tải, vui lòng thử lại sau"},
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -6,6 +6,16 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     database_url: str
     database_echo: bool = False
+    # Read replica cho request GET (JSON list), sticky về primary sau khi client ghi
+    database_replica_urls: List[str] = []
+    replica_sticky_seconds: float = 5.0
+    # Shard thêm cho board/task (JSON list, database_url là shard "0"), xem app.database.sharding
+    database_shard_urls: List[str] = []
+    # SQLite: mọi ghi qua một connection, commit theo nhóm, đọc song song nhờ WAL (app.database.write_queue)
+    sqlite_write_queue_enabled: bool = False
+    sqlite_write_group_max: int = 32
+    # Development: create_all lúc khởi động thay cho kiểm tra Alembic head (app.database.migrations)
+    database_create_tables: bool = False
 
     # Application
     app_name: str = "Kanban TODO API"
@@ -19,6 +29,83 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int
 
+    # Observability
+    metrics_enabled: bool = True
+
+    # SQL profiling (bật cho mọi request, hoặc admin gửi header X-Profile-SQL: 1)
+    sql_profiling_enabled: bool = False
+    sql_profiling_log: bool = False
+    sql_n_plus_one_threshold: int = 5
+
+    # Slow-query log
+    slow_query_log_enabled: bool = True
+    slow_query_threshold_ms: float = 200.0
+    slow_query_log_size: int = 100
+
+    # Board statistics (0 = tắt reconciliation định kỳ)
+    stats_reconcile_interval_seconds: int = 3600
+
+    # Analytics
+    analytics_cache_ttl_seconds: int = 60
+    analytics_max_days: int = 366
+
+    # Activity log (write-behind)
+    activity_log_enabled: bool = True
+    activity_flush_interval_ms: int = 500
+    activity_flush_batch_size: int = 200
+    activity_queue_size: int = 10000
+
+    # Xóa board: board có nhiều task hơn ngưỡng được soft-delete rồi purge bằng job nền
+    board_soft_delete_threshold: int = 10000
+    board_purge_chunk_size: int = 1000
+
+    # Storage backend của repository: sql | memory | sql_cached (app.database.backends)
+    storage_backend: str = "sql"
+    repository_cache_ttl_seconds: float = 5.0
+    repository_cache_max_entries: int = 10000
+
+    # Job nền (app.core.jobs)
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 1.0
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 5.0
+    # Worker cập nhật heartbeat_at của job đang chạy mỗi interval; job `running`
+    # không có heartbeat quá job_stale_after_seconds được đưa lại hàng đợi
+    job_heartbeat_interval_seconds: float = 10.0
+    job_stale_after_seconds: float = 60.0
+
+    # Gộp move kéo-thả: off | deferred (trả lời ngay) | wait (trả lời sau khi ghi)
+    move_coalescing_mode: str = "off"
+    move_coalescing_window_ms: int = 300
+
+    # Admission control (app.core.admission): request đồng thời tối đa theo lớp route (0 = không giới hạn),
+    # số request chờ tối đa mỗi lớp và thời gian chờ tối đa; quá thì trả 503 + Retry-After
+    admission_control_enabled: bool = True
+    admission_limits: Dict[str, int] = {"auth": 4, "read": 32, "write": 16}
+    admission_queue_size: int = 100
+    admission_max_queue_wait_ms: Dict[str, int] = {"auth": 2000, "read": 500, "write": 1000}
+    admission_retry_after_seconds: int = 1
+
+    # Rate limit theo user (JWT) hoặc IP (app.core.rate_limit): budget "N/S" theo "METHOD /route", "*" cho route còn lại
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # memory | redis (dùng chung giữa các worker)
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_shards: int = 16
+    rate_limit_budgets: Dict[str, str] = {
+        "POST /auth/login": "20/60",
+        "POST /auth/register": "10/60",
+        "GET /boards/{board_id}": "300/60",
+        "*": "1200/60",
+    }
+
+    # Gộp request đọc giống nhau đang chạy đồng thời (GET /boards/{id}, /boards/public), xem app.core.single_flight
+    read_coalescing_enabled: bool = True
+    # Follower chờ leader tối đa chừng này giây rồi tự chạy handler
+    read_coalescing_wait_seconds: float = 5.0
+    # Follower chờ bằng cách giữ một thread của threadpool: tối đa chừng này follower chờ
+    # cùng một key, request vượt quá tự chạy handler (giữ nhỏ hơn hẳn số thread, mặc định 40)
+    read_coalescing_max_followers: int = 8
+
     class Config:
         env_file = ".env"
 
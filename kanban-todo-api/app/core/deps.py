@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from jose import JWTError
@@ -109,4 +109,22 @@ def optional_current_user(
     except JWTError:
         return None
 
-
+def get_if_match_version(
+    if_match: Optional[str] = Header(None, description='ETag của bản ghi, vd: "3"')
+) -> Optional[int]:
+    """
+    Version mong đợi từ header If-Match (ETag dạng "<version>")
+    Trả về None nếu không gửi header hoặc gửi *, 412 nếu ETag không hợp lệ
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match không khớp"
+        )
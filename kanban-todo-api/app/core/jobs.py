@@ -0,0 +1,240 @@
+"""Job nền cho các thao tác nặng (purge board, reconcile stats, ...).
+
+Job được lưu trong bảng `jobs` nên sống qua restart và xem được qua
+`GET /jobs/{id}`. Một thread dispatcher nhận job đến hạn theo priority (số lớn
+chạy trước) rồi giao cho `ThreadPoolExecutor` gồm `settings.job_workers` worker;
+số job chạy cùng lúc không vượt quá số worker nên request worker không bao giờ
+bị chiếm.
+
+Handler có dạng `handler(db, payload, progress) -> Optional[dict]`:
+
+- `progress(fraction)` ghi tiến độ 0..1; khi app đang shutdown nó raise
+  `JobInterrupted` để handler dừng ở điểm an toàn, job được đưa lại hàng đợi
+  mà không tính là một lần thử.
+- Exception khác -> retry sau `settings.job_retry_backoff_seconds * 2**(n-1)`
+  giây cho đến `max_attempts`, sau đó job ở trạng thái `failed`.
+
+Mỗi process chạy job có một `worker_id` riêng, được ghi vào `jobs.locked_by`
+khi nhận job. Dispatcher cập nhật `heartbeat_at` của các job đang chạy mỗi
+`settings.job_heartbeat_interval_seconds`; job `running` có heartbeat cũ hơn
+`settings.job_stale_after_seconds` (process chạy nó đã chết) được đưa lại hàng
+đợi, lúc khởi động và định kỳ, nên job của worker khác còn sống không bị lấy mất.
+
+Dùng thread pool thay vì process pool: handler dùng chung engine/connection
+pool, và phần nặng nằm ở DB (I/O) chứ không ở CPU Python.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal, job_repository
+from app.database.models import Job
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+ProgressCallback = Callable[[float], None]
+JobHandler = Callable[[Session, dict, ProgressCallback], Optional[dict]]
+
+
+class JobInterrupted(Exception):
+    """App đang dừng: job được trả về hàng đợi"""
+
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = 2,
+        poll_interval_seconds: float = 1.0,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 5.0,
+        heartbeat_interval_seconds: float = 10.0,
+        stale_after_seconds: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff_seconds
+        self.heartbeat_interval = heartbeat_interval_seconds
+        self.stale_after = stale_after_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._last_heartbeat = 0.0
+        self._handlers: Dict[str, JobHandler] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._dispatcher is not None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def enqueue(
+        self,
+        db: Session,
+        kind: str,
+        payload: Optional[dict] = None,
+        *,
+        priority: int = PRIORITY_NORMAL,
+        max_attempts: Optional[int] = None,
+        created_by: Optional[int] = None,
+        dedupe: bool = False
+    ) -> Job:
+        """Thêm job vào hàng đợi. `dedupe=True`: trả về job cùng loại/payload
+        đang chờ hoặc chạy thay vì tạo job mới
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Không có handler cho job '{kind}'")
+        job = job_repository.find_active(db, kind, payload) if dedupe else None
+        if job is None:
+            job = job_repository.create(
+                db, kind, payload,
+                priority=priority,
+                max_attempts=max_attempts or self.max_attempts,
+                created_by=created_by
+            )
+        self._wake.set()
+        return job
+
+    def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        self._requeue_stale()
+        self._last_heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Ngừng nhận job mới, chờ các job đang chạy dừng ở lần báo tiến độ kế tiếp"""
+        if self._dispatcher is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._dispatcher.join(timeout=timeout)
+        self._executor.shutdown(wait=True)
+        self._dispatcher = None
+        self._executor = None
+
+    def _requeue_stale(self) -> None:
+        db = self.session_factory()
+        try:
+            requeued = job_repository.requeue_interrupted(db, self.stale_after)
+        finally:
+            db.close()
+        if requeued:
+            logger.info("Đưa lại %s job bị dừng giữa chừng vào hàng đợi", requeued)
+
+    def _heartbeat(self) -> None:
+        """Báo job đang chạy của process này còn sống, rồi lấy lại job của worker đã chết"""
+        db = self.session_factory()
+        try:
+            job_repository.heartbeat(db, self.worker_id)
+        finally:
+            db.close()
+        self._requeue_stale()
+
+    def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            if now - self._last_heartbeat >= self.heartbeat_interval:
+                self._last_heartbeat = now
+                try:
+                    self._heartbeat()
+                except Exception:
+                    logger.exception("Không cập nhật được heartbeat của job")
+            with self._lock:
+                free = self.workers - self._in_flight
+            if free > 0:
+                try:
+                    jobs = self._claim(free)
+                except Exception:
+                    logger.exception("Không nhận được job từ hàng đợi")
+                    jobs = []
+                for job in jobs:
+                    with self._lock:
+                        self._in_flight += 1
+                    self._executor.submit(self._execute, job)
+            # Được đánh thức khi có job mới hoặc một worker rảnh
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _claim(self, limit: int):
+        db = self.session_factory()
+        try:
+            return job_repository.claim_next(db, limit, self.worker_id)
+        finally:
+            db.close()
+
+    def _progress_callback(self, job_id: int) -> ProgressCallback:
+        def progress(fraction: float) -> None:
+            if self._stopping.is_set():
+                raise JobInterrupted()
+            db = self.session_factory()
+            try:
+                job_repository.set_progress(db, job_id, fraction)
+            finally:
+                db.close()
+        return progress
+
+    def _execute(self, job: Job) -> None:
+        db = self.session_factory()
+        try:
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                job_repository.fail(db, job, f"Không có handler cho job '{job.kind}'", retry=False)
+                return
+            try:
+                result = handler(db, job.payload or {}, self._progress_callback(job.id))
+            except JobInterrupted:
+                db.rollback()
+                job_repository.requeue(db, job.id)
+                logger.info("Job %s (%s) bị dừng do shutdown, sẽ chạy lại", job.id, job.kind)
+                return
+            except Exception as exc:
+                db.rollback()
+                delay = self.retry_backoff * 2 ** (job.attempts - 1)
+                retry = job_repository.fail(db, job, f"{type(exc).__name__}: {exc}", retry_delay_seconds=delay)
+                logger.exception(
+                    "Job %s (%s) thất bại lần %s%s", job.id, job.kind, job.attempts,
+                    f", thử lại sau {delay:.0f}s" if retry else ""
+                )
+                return
+            job_repository.finish(db, job.id, result)
+        except Exception:
+            logger.exception("Không cập nhật được trạng thái job %s", job.id)
+        finally:
+            db.close()
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
+
+
+job_runner = JobRunner(
+    SessionLocal,
+    workers=settings.job_workers,
+    poll_interval_seconds=settings.job_poll_interval_seconds,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff_seconds=settings.job_retry_backoff_seconds,
+    heartbeat_interval_seconds=settings.job_heartbeat_interval_seconds,
+    stale_after_seconds=settings.job_stale_after_seconds,
+)
@@ -0,0 +1,77 @@
+"""Các tác vụ bảo trì chạy bằng job nền (app.core.jobs)."""
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PRIORITY_LOW, job_runner
+from app.core.periodic import PeriodicTask
+from app.database import (
+    SessionLocal, board_repository, board_stats_repository, job_repository
+)
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_JOB = "board_stats.reconcile"
+PURGE_JOB = "board.purge"
+
+
+def reconcile_board_stats_job(db: Session, payload: dict, progress) -> dict:
+    """Tính lại board_stats (sửa lệch và cập nhật overdue theo thời gian)"""
+    board_stats_repository.reconcile_all(db)
+    return {}
+
+
+def purge_board_job(db: Session, payload: dict, progress) -> dict:
+    """Xóa hẳn board đã soft-delete, từng chunk task một.
+    `payload["tasks_count"]` (số task lúc xóa) dùng để tính tiến độ
+    """
+    board_id = payload["board_id"]
+    total = payload.get("tasks_count") or 0
+    deleted_tasks = board_repository.purge(
+        db, board_id,
+        chunk_size=settings.board_purge_chunk_size,
+        on_chunk=lambda deleted: progress(min(deleted / total, 0.99)) if total else progress(0)
+    )
+    logger.info("Đã purge board %s (%s task)", board_id, deleted_tasks)
+    return {"board_id": board_id, "deleted_tasks_count": deleted_tasks}
+
+
+job_runner.register(RECONCILE_JOB, reconcile_board_stats_job)
+job_runner.register(PURGE_JOB, purge_board_job)
+
+
+def enqueue_board_purge(db: Session, board_id: int, tasks_count: int = 0, created_by=None):
+    return job_runner.enqueue(
+        db, PURGE_JOB, {"board_id": board_id, "tasks_count": tasks_count},
+        created_by=created_by, dedupe=True
+    )
+
+
+def enqueue_pending_purges() -> None:
+    """Board soft-delete còn sót (vd: job đã failed) -> tạo lại job purge"""
+    db = SessionLocal()
+    try:
+        active = {
+            (job.payload or {}).get("board_id")
+            for job in job_repository.get_active(db, PURGE_JOB)
+        }
+        for board_id in board_repository.get_deleted_ids(db):
+            if board_id not in active:
+                enqueue_board_purge(db, board_id)
+    finally:
+        db.close()
+
+
+def schedule_stats_reconcile() -> None:
+    db = SessionLocal()
+    try:
+        job_runner.enqueue(db, RECONCILE_JOB, priority=PRIORITY_LOW, dedupe=True)
+    finally:
+        db.close()
+
+
+# Chỉ đưa job vào hàng đợi theo lịch; phần việc chạy trên worker của job_runner
+stats_reconciler = PeriodicTask(
+    "board-stats-reconcile", settings.stats_reconcile_interval_seconds, schedule_stats_reconcile
+)
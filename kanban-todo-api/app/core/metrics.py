@@ -0,0 +1,289 @@
+"""Metrics dạng Prometheus (counter, gauge, histogram) và middleware đo request.
+
+Registry được cài đặt thủ công, không phụ thuộc `prometheus_client`: mỗi metric
+giữ một dict `labels -> giá trị` được bảo vệ bởi một lock riêng nên chi phí mỗi
+lần ghi chỉ là một lần acquire lock và vài phép cộng.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        lines = self._header()
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], Iterable]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        # callback trả về các cặp (labels, value), được gọi lúc render (vd: pool stats)
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            items = list(self._callback())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        lines = self._header()
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts (không cộng dồn, phần tử cuối là +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = self._header()
+        bounds = list(self.buckets) + [float("inf")]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' đã được đăng ký")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP metrics
+http_requests_total = registry.counter(
+    "http_requests_total", "Tổng số HTTP request", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Thời gian xử lý HTTP request (giây)", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Số HTTP request đang được xử lý", ("method", "route")
+)
+
+# Database metrics
+db_queries_total = registry.counter(
+    "db_queries_total", "Tổng số câu SQL đã thực thi", ("operation",)
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Thời gian thực thi câu SQL (giây)", ("operation",), DB_BUCKETS
+)
+
+# Session của request (get_db) được tạo lười: used="false" là request không chạm DB
+db_sessions_total = registry.counter(
+    "db_sessions_total", "Số session DB của request theo việc có được dùng hay không", ("used",)
+)
+
+_SQL_OPERATIONS = {"select", "insert", "update", "delete"}
+
+
+def observe_query(statement: str, parameters, context, duration: float) -> None:
+    """Query observer (xem `app.database.instrumentation`) ghi metrics cho từng câu SQL"""
+    operation = statement.lstrip()[:6].lower()
+    if operation not in _SQL_OPERATIONS:
+        operation = "other"
+    db_queries_total.inc(operation)
+    db_query_duration_seconds.observe(duration, operation)
+
+
+def register_pool_metrics(engines: Dict[str, object]) -> None:
+    """Xuất trạng thái connection pool của từng engine (label `engine`), đọc lúc scrape"""
+
+    def _stat(method_name: str):
+        def collect():
+            values = []
+            for name, engine in engines.items():
+                method = getattr(engine.pool, method_name, None)
+                if method is None:
+                    continue
+                try:
+                    values.append(((name,), method()))
+                except Exception:
+                    continue
+            return values
+        return collect
+
+    labels = ("engine",)
+    registry.gauge("db_pool_size", "Kích thước connection pool", labels, callback=_stat("size"))
+    registry.gauge("db_pool_checked_out", "Số connection đang được sử dụng", labels, callback=_stat("checkedout"))
+    registry.gauge("db_pool_checked_in", "Số connection rảnh trong pool", labels, callback=_stat("checkedin"))
+    registry.gauge("db_pool_overflow", "Số connection overflow đang mở", labels, callback=_stat("overflow"))
+
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def resolve_route(scope) -> Tuple[str, Optional[object]]:
+    """Tìm route template (vd: `/boards/{board_id}`) cho request, tránh label theo path thật"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return UNMATCHED_ROUTE, None
+    partial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE), route
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    if partial is not None:
+        return getattr(partial, "path", UNMATCHED_ROUTE), partial
+    return UNMATCHED_ROUTE, None
+
+
+class MetricsMiddleware:
+    """ASGI middleware ghi số request, latency và in-flight theo route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route, _ = resolve_route(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method, route)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration_seconds.observe(time.perf_counter() - started_at, method, route)
+            http_requests_total.inc(method, route, str(status_code))
+            http_requests_in_flight.dec(method, route)
@@ -0,0 +1,180 @@
+"""Gộp các lần di chuyển task liên tiếp (kéo-thả) thành một lần ghi.
+
+Khi bật (`settings.move_coalescing_mode`), `PATCH /tasks/{id}/move` không ghi
+ngay mà đăng ký vào cửa sổ `settings.move_coalescing_window_ms` tính từ lần
+move đầu tiên của task. Các move sau trong cửa sổ ghi đè move trước; khi cửa
+sổ đóng, thread nền gọi `TaskRepository.move_task` một lần với status/position
+cuối cùng (stats, transition và activity vẫn đi qua repository như bình thường).
+
+Hai chế độ:
+
+- `deferred`: trả lời ngay `202 Accepted` với status/position sau khi move
+  (chưa ghi, nên không có `version`/ETag: client cần GET lại task trước khi
+  ghi có If-Match). Move chưa flush sẽ mất nếu process chết trong cửa sổ; đọc
+  lại task trong cửa sổ vẫn thấy giá trị cũ.
+- `wait`: request chờ đến khi lần ghi gộp được commit rồi mới trả lời (bền
+  vững như chế độ `off`, nhưng độ trễ tăng thêm tối đa một cửa sổ).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal, task_repository
+from app.database.models import StatusEnum, Task
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "deferred", "wait")
+
+
+@dataclass
+class PendingMove:
+    task_id: int
+    status: StatusEnum
+    position: int
+    actor_id: Optional[int]
+    deadline: float
+    merged: int = 1
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+    missing: bool = False  # task đã bị xóa trước khi move được ghi
+
+
+class MoveCoalescer:
+    def __init__(self, session_factory: Callable[[], Session], window_ms: int = 300, mode: str = "off"):
+        if mode not in MODES:
+            raise ValueError(f"move_coalescing_mode phải là một trong {MODES}")
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.mode = mode
+        self.writes = 0
+        self.merged = 0
+        self._pending: Dict[int, PendingMove] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def submit(
+        self,
+        db: Session,
+        task: Task,
+        status: StatusEnum,
+        position: Optional[int] = None,
+        *,
+        actor_id: Optional[int] = None
+    ) -> PendingMove:
+        """Đăng ký move cho task (đã kiểm tra quyền). Position được chốt ngay
+
+        Position mặc định (cuối cột mới) được tính lúc submit để response trả
+        về đúng giá trị sẽ được ghi.
+        """
+        with self._lock:
+            pending = self._pending.get(task.id)
+            current_status = pending.status if pending else task.status
+        if position is None:
+            if status != current_status:
+                position = task_repository.next_position(db, task.board_id, status)
+            else:
+                position = pending.position if pending else task.position
+
+        with self._wakeup:
+            pending = self._pending.get(task.id)
+            if pending is None:
+                pending = PendingMove(
+                    task_id=task.id,
+                    status=status,
+                    position=position,
+                    actor_id=actor_id,
+                    deadline=time.monotonic() + self.window,
+                )
+                self._pending[task.id] = pending
+                self._wakeup.notify()
+            else:
+                pending.status = status
+                pending.position = position
+                pending.actor_id = actor_id
+                pending.merged += 1
+                self.merged += 1
+        return pending
+
+    def wait(self, pending: PendingMove, timeout: Optional[float] = None) -> None:
+        """Chờ lần ghi gộp chứa move này commit xong (chế độ `wait`)"""
+        if not pending.done.wait(timeout if timeout is not None else self.window + 10):
+            raise TimeoutError("Move chưa được ghi")
+        if pending.error is not None:
+            raise pending.error
+
+    def start(self) -> None:
+        if self._worker is not None or self.mode == "off":
+            return
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name="move-coalescer", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Ghi nốt các move đang chờ rồi dừng thread"""
+        if self._worker is None:
+            return
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        self._worker.join(timeout=10)
+        self._worker = None
+
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                while True:
+                    now = time.monotonic()
+                    due = [
+                        move for move in self._pending.values()
+                        if self._stopping or move.deadline <= now
+                    ]
+                    if due or (self._stopping and not self._pending):
+                        break
+                    next_deadline = min((move.deadline for move in self._pending.values()), default=None)
+                    self._wakeup.wait(None if next_deadline is None else next_deadline - now)
+                for move in due:
+                    del self._pending[move.task_id]
+                stopping = self._stopping and not self._pending
+            if due:
+                self._write(due)
+            if stopping:
+                return
+
+    def _write(self, moves) -> None:
+        db = self.session_factory()
+        try:
+            for move in moves:
+                try:
+                    # Task có thể đã bị xóa trong cửa sổ -> move_task trả về None
+                    moved = task_repository.move_task(
+                        db, move.task_id, move.status, move.position, actor_id=move.actor_id
+                    )
+                    move.missing = moved is None
+                    self.writes += 1
+                except Exception as exc:
+                    db.rollback()
+                    move.error = exc
+                    logger.exception("Không ghi được move của task %s", move.task_id)
+                finally:
+                    move.done.set()
+        finally:
+            db.close()
+
+
+move_coalescer = MoveCoalescer(
+    SessionLocal,
+    window_ms=settings.move_coalescing_window_ms,
+    mode=settings.move_coalescing_mode,
+)
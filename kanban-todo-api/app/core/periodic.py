@@ -0,0 +1,49 @@
+"""Chạy một hàm định kỳ trên thread nền (daemon), dừng được khi shutdown.
+
+`trigger()` đánh thức thread để chạy ngay, không chờ hết interval.
+"""
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], None]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def trigger(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s thất bại", self.name)
@@ -0,0 +1,256 @@
+"""SQL profiler theo từng request và phát hiện N+1 query.
+
+Profiler chỉ bật khi `settings.sql_profiling_enabled` hoặc khi admin gửi header
+`X-Profile-SQL: 1` (token phải có claim `role` admin, role được xác nhận lại
+trên DB). Khi bật, mọi câu SQL chạy trong request được ghi lại (thời gian +
+call site); các câu có cùng "shape" lặp lại từ
+`settings.sql_n_plus_one_threshold` lần trở lên bị đánh dấu là nghi N+1.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import resolve_route
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-sql"
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_FILES = (
+    os.path.join(_APP_ROOT, "core", "profiling.py"),
+    os.path.join(_APP_ROOT, "database", "instrumentation.py"),
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """Chuẩn hoá câu SQL để gom nhóm các câu giống nhau (bỏ literal, IN list...)"""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _NUMBER_RE.sub("?", shape)
+
+
+def _call_site(max_frames: int = 2) -> str:
+    """Các frame gần nhất thuộc package `app` đã phát ra câu SQL"""
+    frame = sys._getframe(2)
+    sites: List[str] = []
+    while frame is not None and len(sites) < max_frames:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_ROOT) and filename not in _SKIPPED_FILES:
+            relative = os.path.relpath(filename, os.path.dirname(_APP_ROOT))
+            sites.append(f"{relative}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return " <- ".join(sites) or "<unknown>"
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    duration_ms: float
+    call_site: str
+
+
+@dataclass
+class QueryProfile:
+    method: str
+    route: str
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(query.duration_ms for query in self.queries)
+
+    def n_plus_one(self, threshold: int) -> List[dict]:
+        """Các shape câu SQL lặp lại >= threshold lần"""
+        groups: Dict[str, List[QueryRecord]] = {}
+        for query in self.queries:
+            groups.setdefault(statement_shape(query.statement), []).append(query)
+        suspects = []
+        for shape, records in groups.items():
+            if len(records) >= threshold:
+                suspects.append({
+                    "statement": shape,
+                    "count": len(records),
+                    "total_ms": round(sum(r.duration_ms for r in records), 3),
+                    "call_sites": sorted({r.call_site for r in records}),
+                })
+        suspects.sort(key=lambda item: item["count"], reverse=True)
+        return suspects
+
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("sql_profile", default=None)
+
+
+def observe_query(statement: str, parameters, context, duration: float) -> None:
+    """Query observer: ghi câu SQL vào profile của request hiện tại (nếu có)"""
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    profile.queries.append(QueryRecord(statement, duration * 1000, _call_site()))
+
+
+@dataclass
+class RouteProfileStats:
+    route: str
+    requests: int = 0
+    total_queries: int = 0
+    max_queries: int = 0
+    total_db_ms: float = 0.0
+    n_plus_one_requests: int = 0
+    last_n_plus_one: List[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "route": self.route,
+            "requests": self.requests,
+            "avg_queries": round(self.total_queries / self.requests, 2) if self.requests else 0,
+            "max_queries": self.max_queries,
+            "avg_db_ms": round(self.total_db_ms / self.requests, 3) if self.requests else 0,
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "last_n_plus_one": self.last_n_plus_one,
+        }
+
+
+class ProfileStore:
+    """Thống kê cộng dồn theo route từ các request đã được profile"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteProfileStats] = {}
+
+    def record(self, profile: QueryProfile, suspects: List[dict]) -> None:
+        key = f"{profile.method} {profile.route}"
+        count = len(profile.queries)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteProfileStats(route=key)
+            stats.requests += 1
+            stats.total_queries += count
+            stats.max_queries = max(stats.max_queries, count)
+            stats.total_db_ms += profile.total_ms
+            if suspects:
+                stats.n_plus_one_requests += 1
+                stats.last_n_plus_one = suspects
+
+    def worst_routes(self, limit: int = 20, sort: str = "avg_queries") -> List[dict]:
+        with self._lock:
+            rows = [stats.as_dict() for stats in self._routes.values()]
+        rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+profile_store = ProfileStore()
+
+
+def _admin_claim(headers: Dict[bytes, bytes]) -> Optional[int]:
+    """User id trong token nếu claim `role` là admin; không đụng DB"""
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = verify_token(token)
+    except JWTError:
+        return None
+    if not payload or payload.get("role") != "admin" or payload.get("user_id") is None:
+        return None
+    return int(payload["user_id"])
+
+
+def _is_active_admin(user_id: int) -> bool:
+    """Xác nhận trên DB: role trong token có thể đã cũ (bị hạ quyền, khóa tài khoản)"""
+    from app.database import SessionLocal, user_repository
+
+    db = SessionLocal()
+    try:
+        user = user_repository.get(db, user_id)
+        return bool(user and user.is_active and user.role == "admin")
+    finally:
+        db.close()
+
+
+async def _should_profile(scope) -> bool:
+    if settings.sql_profiling_enabled:
+        return True
+    headers = dict(scope.get("headers") or [])
+    if headers.get(PROFILE_HEADER.encode(), b"").strip() not in (b"1", b"true"):
+        return False
+    # Token không mang claim admin thì từ chối ngay, không query DB
+    user_id = _admin_claim(headers)
+    if user_id is None:
+        return False
+    # Tra role admin cần query DB, không chạy trên event loop
+    return await run_in_threadpool(_is_active_admin, user_id)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware bật profiler cho request và trả tóm tắt qua header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        route, _ = resolve_route(scope)
+        profile = QueryProfile(method=scope["method"], route=route)
+        threshold = settings.sql_n_plus_one_threshold
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                suspects = profile.n_plus_one(threshold)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(profile).encode("latin-1")))
+                headers.append((b"x-query-count", str(len(profile.queries)).encode()))
+                if suspects:
+                    headers.append((b"x-n-plus-one", str(len(suspects)).encode()))
+                message["headers"] = headers
+                _finish(profile, suspects)
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+
+
+def _server_timing(profile: QueryProfile) -> str:
+    return f'db;dur={profile.total_ms:.2f};desc="{len(profile.queries)} queries"'
+
+
+def _finish(profile: QueryProfile, suspects: List[dict]) -> None:
+    profile_store.record(profile, suspects)
+    if not settings.sql_profiling_log:
+        return
+    logger.info(
+        "SQL profile %s %s: %d queries, %.2f ms",
+        profile.method, profile.route, len(profile.queries), profile.total_ms,
+    )
+    for suspect in suspects:
+        logger.warning(
+            "Nghi N+1 tại %s %s: %dx %s (%s)",
+            profile.method, profile.route, suspect["count"],
+            suspect["statement"], "; ".join(suspect["call_sites"]),
+        )
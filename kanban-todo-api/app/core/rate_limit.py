@@ -0,0 +1,269 @@
+"""Rate limit theo client bằng token bucket.
+
+Client là user id trong JWT (header `Authorization: Bearer ...`, token phải
+hợp lệ) hoặc IP khi không có token (sau proxy: chạy uvicorn với
+`--proxy-headers`). Budget theo route trong `settings.rate_limit_budgets`:
+`"METHOD /route/template": "N/S"` = tối đa N request mỗi S giây (burst N),
+route không khai báo dùng chung budget `"*"`. Hết token thì trả 429 +
+`Retry-After` (số giây đến khi có lại một token).
+
+Backend (`settings.rate_limit_backend`):
+
+- `memory`: bucket trong process, chia thành `settings.rate_limit_shards`
+  shard, mỗi shard một lock + dict; bucket đã đầy lại được bỏ khi shard phình
+  to. Mỗi worker uvicorn đếm riêng (budget thực tế = budget x số worker).
+- `redis`: bucket dùng chung mọi worker, cập nhật nguyên tử bằng một script
+  Lua (`settings.rate_limit_redis_url`, cần cài gói `redis`). Redis lỗi thì
+  cho qua (fail open) thay vì chặn mọi request.
+
+Backend mới đăng ký bằng `@register_rate_limit_backend("tên")`.
+`scripts/benchmark_rate_limit.py` đo chi phí mỗi request.
+"""
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import resolve_route
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = "*"
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+# Số (method, path) -> budget và token -> client được nhớ tối đa (xóa hết khi đầy)
+_LOOKUP_CACHE_SIZE = 10000
+
+rate_limited_total = metrics.registry.counter(
+    "rate_limited_total", "Số request bị rate limit (429) theo budget", ("budget",)
+)
+
+
+@dataclass(frozen=True)
+class Budget:
+    name: str
+    capacity: float
+    rate: float  # token mỗi giây
+
+    @classmethod
+    def parse(cls, name: str, value: str) -> "Budget":
+        count, _, seconds = value.partition("/")
+        capacity, period = float(count), float(seconds or 1)
+        if capacity <= 0 or period <= 0:
+            raise ValueError(f"rate_limit_budgets['{name}'] không hợp lệ: '{value}' (dạng 'N/S')")
+        return cls(name, capacity, capacity / period)
+
+    @property
+    def refill_seconds(self) -> float:
+        """Thời gian bucket rỗng đầy lại"""
+        return self.capacity / self.rate
+
+
+class MemoryRateLimitBackend:
+    """Token bucket trong memory, chia shard theo hash của key để giảm tranh lock"""
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000):
+        self._shards: List[Tuple[threading.Lock, Dict[str, list]]] = [
+            (threading.Lock(), {}) for _ in range(max(1, shards))
+        ]
+        self._max_keys_per_shard = max(1, max_keys // len(self._shards))
+
+    def take_nowait(self, key: str, budget: Budget, now: Optional[float] = None) -> float:
+        """Lấy một token; trả về 0 nếu được phép, ngược lại số giây phải chờ"""
+        now = time.monotonic() if now is None else now
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            # bucket: [token còn lại, lần cập nhật, thời gian đầy lại]
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self._max_keys_per_shard:
+                    self._evict_full(buckets, now)
+                bucket = buckets[key] = [budget.capacity, now, budget.refill_seconds]
+            else:
+                bucket[0] = min(budget.capacity, bucket[0] + (now - bucket[1]) * budget.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / budget.rate
+
+    async def take(self, key: str, budget: Budget) -> float:
+        return self.take_nowait(key, budget)
+
+    @staticmethod
+    def _evict_full(buckets: Dict[str, list], now: float) -> None:
+        # Bucket đã đầy lại tương đương chưa có -> bỏ được mà không đổi kết quả
+        for key in [key for key, bucket in buckets.items() if now - bucket[1] >= bucket[2]]:
+            del buckets[key]
+
+    def size(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token bucket trong Redis, dùng chung giữa các worker"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("rate_limit_backend 'redis' cần cài gói `redis` (pip install redis)") from exc
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def take(self, key: str, budget: Budget) -> float:
+        try:
+            wait = await self._script(keys=[self.prefix + key], args=[budget.capacity, budget.rate, time.time()])
+        except Exception:
+            logger.warning("Rate limit: Redis lỗi, cho request đi qua", exc_info=True)
+            return 0.0
+        return float(wait)
+
+
+_BACKENDS: Dict[str, Callable[[], object]] = {}
+
+
+def register_rate_limit_backend(name: str):
+    def decorator(factory):
+        _BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+@register_rate_limit_backend("memory")
+def _memory_backend():
+    return MemoryRateLimitBackend(settings.rate_limit_shards)
+
+
+@register_rate_limit_backend("redis")
+def _redis_backend():
+    return RedisRateLimitBackend(settings.rate_limit_redis_url)
+
+
+def create_rate_limit_backend(name: str):
+    factory = _BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"rate_limit_backend '{name}' không tồn tại, chọn một trong {sorted(_BACKENDS)}")
+    return factory()
+
+
+class RateLimiter:
+    """Chọn budget của request, xác định client và lấy token từ backend"""
+
+    def __init__(self, backend, budgets: Dict[str, str]):
+        self.backend = backend
+        self.budgets = {name: Budget.parse(name, value) for name, value in budgets.items()}
+        self.default = self.budgets.get(DEFAULT_BUDGET)
+        self._route_budgets: Dict[Tuple[str, str], Optional[Budget]] = {}
+        self._token_clients: Dict[str, Tuple[str, float]] = {}
+
+    def budget_for(self, scope) -> Optional[Budget]:
+        cache_key = (scope["method"], scope["path"])
+        try:
+            return self._route_budgets[cache_key]
+        except KeyError:
+            pass
+        route, _ = resolve_route(scope)
+        budget = self.budgets.get(f"{scope['method']} {route}", self.default)
+        if len(self._route_budgets) >= _LOOKUP_CACHE_SIZE:
+            self._route_budgets.clear()
+        self._route_budgets[cache_key] = budget
+        return budget
+
+    def client_key(self, scope) -> str:
+        for name, value in scope.get("headers") or ():
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    client = self._token_client(token.strip())
+                    if client is not None:
+                        return client
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _token_client(self, token: str) -> Optional[str]:
+        """`user:<id>` của token hợp lệ; kết quả verify được nhớ đến khi token hết hạn"""
+        now = time.time()
+        cached = self._token_clients.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        payload = verify_token(token)
+        if payload is None or payload.get("user_id") is None:
+            return None
+        client = f"user:{payload['user_id']}"
+        if len(self._token_clients) >= _LOOKUP_CACHE_SIZE:
+            self._token_clients.clear()
+        self._token_clients[token] = (client, float(payload.get("exp", now)))
+        return client
+
+    async def check(self, scope) -> Tuple[Optional[Budget], float]:
+        """(budget, số giây phải chờ); 0 là được phép"""
+        budget = self.budget_for(scope)
+        if budget is None:
+            return None, 0.0
+        return budget, await self.backend.take(f"{budget.name}|{self.client_key(scope)}", budget)
+
+
+rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    # Tạo khi dùng lần đầu: backend redis chỉ kết nối khi bật rate limit
+    global rate_limiter
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(create_rate_limit_backend(settings.rate_limit_backend), settings.rate_limit_budgets)
+    return rate_limiter
+
+
+class RateLimitMiddleware:
+    """ASGI middleware trả 429 + Retry-After khi client hết token của budget route"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or get_rate_limiter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            # Preflight CORS không tiêu token của client
+            await self.app(scope, receive, send)
+            return
+
+        budget, wait = await self.limiter.check(scope)
+        if wait > 0:
+            rate_limited_total.inc(budget.name)
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Quá nhiều request, vui lòng thử lại sau"},
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -9,9 +9,10 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__defaul
 
 def create_access_token(
     subject: Union[str, Any], 
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    role: Optional[str] = None
 ) -> str:
-    """Tạo JWT access token"""
+    """Tạo JWT access token (`role` chỉ là gợi ý, quyền vẫn kiểm tra trên DB)"""
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -25,6 +26,8 @@ def create_access_token(
         "sub": str(subject),
         "user_id": subject
     }
+    if role is not None:
+        to_encode["role"] = role
     
     encoded_jwt = jwt.encode(
         to_encode, 
@@ -0,0 +1,137 @@
+"""Single-flight: gộp các request đọc giống hệt nhau đang chạy đồng thời.
+
+Request đầu tiên của một key (route, tham số, lớp người xem) chạy handler
+(leader); các request cùng key đến trong lúc đó không query DB mà chờ và dùng
+lại response đã serialize của leader (body bytes, status, header). Lỗi HTTP
+của leader (vd: 404/403) cũng được lưu dưới dạng response đó và trả cho cả
+nhóm. Follower tự chạy handler (fallback) nếu leader gặp lỗi khác hoặc chưa
+xong sau `settings.read_coalescing_wait_seconds`, nên một leader chậm hay bị
+treo không kéo theo cả nhóm. Key được xóa ngay khi leader xong: không phải
+cache, request đến sau đó chạy lại từ đầu.
+
+Follower chờ bằng cách chặn thread: handler là route sync nên mỗi follower
+giữ một thread của threadpool (mặc định 40 thread của anyio) trong lúc chờ.
+Một key nóng với leader chậm có thể chiếm hết threadpool và chặn cả request
+không liên quan, nên mỗi key chỉ có tối đa `settings.read_coalescing_max_followers`
+follower chờ cùng lúc; request vượt giới hạn tự chạy handler ngay (`direct`).
+
+Đánh đổi: follower có thể nhận kết quả của một lần đọc bắt đầu trước nó tối
+đa một lần chạy handler (như mọi single-flight), kể cả khi có ghi commit xen
+giữa. Bật/tắt bằng `settings.read_coalescing_enabled`.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+
+from app.core import metrics
+from app.core.config import settings
+from app.database.models import User
+
+single_flight_requests_total = metrics.registry.counter(
+    "single_flight_requests_total", "Số request đọc qua single-flight theo route và vai trò", ("route", "role")
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "failed", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.failed = False
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        timeout: Optional[float] = None,
+        max_followers: Optional[int] = None,
+    ) -> Tuple[Any, str]:
+        """Chạy `fn` hoặc chờ lần chạy đang diễn ra cùng key. Trả về (kết quả, vai trò)
+
+        Vai trò: `leader` (đã chạy `fn`), `follower` (dùng kết quả của leader),
+        `fallback` (leader raise hoặc chưa xong sau `timeout` giây -> tự chạy `fn`)
+        hoặc `direct` (đã có `max_followers` follower đang chờ -> tự chạy `fn` ngay).
+        Exception của leader không được raise lại ở follower.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            elif max_followers is not None and call.followers >= max_followers:
+                call = None
+            else:
+                call.followers += 1
+        if call is None:
+            return fn(), "direct"
+        if not leader:
+            try:
+                finished = call.done.wait(timeout)
+            finally:
+                with self._lock:
+                    call.followers -= 1
+            if finished and not call.failed:
+                return call.result, "follower"
+            return fn(), "fallback"
+
+        try:
+            call.result = fn()
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, "leader"
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+read_flight = SingleFlight()
+
+
+def viewer_class(user: Optional[User]) -> str:
+    """Người xem có cùng quyền đọc: ẩn danh, admin, hoặc từng user (owner thấy board riêng)"""
+    if user is None:
+        return "anonymous"
+    if user.role == "admin":
+        return "admin"
+    return f"user:{user.id}"
+
+
+def _freeze(response: Response) -> Tuple[bytes, int, Dict[str, str]]:
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return response.body, response.status_code, headers
+
+
+def _frozen_build(build: Callable[[], Response]) -> Tuple[bytes, int, Dict[str, str]]:
+    """Response của `build()` đã serialize; HTTPException được đổi thành response lỗi tương ứng"""
+    try:
+        response = build()
+    except HTTPException as exc:
+        response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+    return _freeze(response)
+
+
+def coalesced_response(route: str, key: Tuple, build: Callable[[], Response]) -> Response:
+    """Response của `build()`, dùng chung với các request cùng `(route, *key)` đang chạy"""
+    if not settings.read_coalescing_enabled:
+        return build()
+    (body, status_code, headers), role = read_flight.do(
+        (route, *key), lambda: _frozen_build(build),
+        timeout=settings.read_coalescing_wait_seconds, max_followers=settings.read_coalescing_max_followers,
+    )
+    single_flight_requests_total.inc(route, role)
+    return Response(content=body, status_code=status_code, headers=headers)
@@ -1,15 +1,35 @@
-from .connection import Base, engine, get_db, create_tables, SessionLocal
-from .models import User, Board, Task, StatusEnum, PriorityEnum
-from .repository import UserRepository, BoardRepository, TaskRepository
+from .connection import Base, engine, create_tables, SessionLocal, replica_engines, shard_engines, sqlite_write_queue
+from .routing import get_db, get_primary_db, replica_router
+from . import instrumentation
+from .models import (
+    User, Board, Task, StatusEnum, PriorityEnum, BoardStats, BoardAssigneeStats, ActivityLog, Job, JobStatusEnum
+)
+from .repository import (
+    UserRepository, BoardRepository, TaskRepository, BoardStatsRepository, ActivityLogRepository,
+    JobRepository, ConcurrentUpdateError
+)
+from .activity_log import activity_log
+from .backends import StorageBackend, available_backends, create_backend, register_backend
+from app.core.config import settings
 
-# Tạo các repository instances để sử dụng trong routers
-user_repository = UserRepository()
-board_repository = BoardRepository()
-task_repository = TaskRepository()
+# Các repository instances để sử dụng trong routers (theo settings.storage_backend)
+storage_backend = create_backend(settings.storage_backend)
+board_stats_repository = storage_backend.board_stats_repository
+user_repository = storage_backend.user_repository
+board_repository = storage_backend.board_repository
+task_repository = storage_backend.task_repository
+activity_log_repository = ActivityLogRepository()
+job_repository = JobRepository()
 
 __all__ = [
-    "Base", "engine", "get_db", "create_tables", "SessionLocal",
-    "User", "Board", "Task", "StatusEnum", "PriorityEnum", 
-    "UserRepository", "BoardRepository", "TaskRepository",
-    "user_repository", "board_repository", "task_repository"
+    "Base", "engine", "get_db", "get_primary_db", "create_tables", "SessionLocal",
+    "replica_engines", "replica_router", "shard_engines", "sqlite_write_queue",
+    "User", "Board", "Task", "StatusEnum", "PriorityEnum", "BoardStats", "BoardAssigneeStats", "ActivityLog",
+    "Job", "JobStatusEnum",
+    "UserRepository", "BoardRepository", "TaskRepository", "BoardStatsRepository", "ActivityLogRepository",
+    "JobRepository",
+    "user_repository", "board_repository", "task_repository", "board_stats_repository",
+    "activity_log_repository", "job_repository", "ConcurrentUpdateError",
+    "instrumentation", "activity_log",
+    "StorageBackend", "storage_backend", "available_backends", "create_backend", "register_backend"
 ]
@@ -0,0 +1,194 @@
+"""Activity log ghi kiểu write-behind.
+
+Repository gọi `emit()` sau khi commit: event chỉ được đưa vào hàng đợi giới
+hạn trong bộ nhớ nên request không phải chờ thêm một lần ghi. Thread nền gom
+event và `INSERT` theo batch mỗi `settings.activity_flush_interval_ms` ms hoặc
+khi đủ `settings.activity_flush_batch_size` event. `stop()` flush nốt phần còn
+lại khi shutdown.
+
+Khi hàng đợi đầy (DB chậm kéo dài) event mới bị bỏ và đếm trong `dropped`.
+
+Xóa board: repository gọi `discard_boards()` sau khi commit. Marker đi cùng
+hàng đợi nên được xử lý sau mọi event đã emit trước đó: event của board chưa
+ghi thì bị bỏ, dòng đã ghi thì bị xóa, và event đến sau (request emit muộn sau
+commit) cũng bị bỏ vì id board đã xóa được nhớ lại (id không được dùng lại).
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from .connection import SessionLocal
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+# Số id board đã xóa được nhớ để bỏ event đến muộn
+DISCARDED_BOARDS_MAX = 10000
+
+
+class _DiscardBoards:
+    __slots__ = ("board_ids",)
+
+    def __init__(self, board_ids: List[int]):
+        self.board_ids = board_ids
+
+
+class ActivityLogWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval_ms: int = 500,
+        batch_size: int = 200,
+        queue_size: int = 10000,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = object()
+        self._discarded: set = set()
+        self._discarded_order: deque = deque()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def emit(
+        self,
+        *,
+        board_id: int,
+        action: str,
+        actor_id: Optional[int] = None,
+        task_id: Optional[int] = None,
+        changes: Optional[dict] = None,
+    ) -> None:
+        """Đưa event vào hàng đợi (không chặn). Bị bỏ qua nếu writer chưa chạy"""
+        if not self.running:
+            return
+        event = {
+            "board_id": board_id,
+            "task_id": task_id,
+            "actor_id": actor_id,
+            "action": action,
+            "changes": changes,
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Activity log đầy, đã bỏ %s event", self.dropped)
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Flush các event còn trong hàng đợi rồi dừng thread"""
+        if self._worker is None:
+            return
+        self._queue.put(self._stopping)
+        self._worker.join(timeout=timeout)
+        self._worker = None
+
+    def flush(self, timeout: float = 5) -> bool:
+        """Chờ đến khi các event đã emit trước đó được ghi xuống DB"""
+        if self._worker is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def discard_boards(self, board_ids: Iterable[int]) -> None:
+        """Bỏ activity của các board đã xóa (gọi sau khi commit việc xóa)"""
+        board_ids = list(board_ids)
+        if board_ids and self.running:
+            # put chặn khi đầy: marker không được phép bị bỏ như event
+            self._queue.put(_DiscardBoards(board_ids))
+
+    def _run(self) -> None:
+        batch: List[dict] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, dict):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+
+            if isinstance(item, _DiscardBoards):
+                self._remember_discarded(item.board_ids)
+            # Hết thời gian chờ, đủ batch, hoặc nhận marker flush/stop/discard
+            batch = [event for event in batch if event["board_id"] not in self._discarded]
+            if batch:
+                self._write(batch)
+                batch = []
+            deadline = None
+            if isinstance(item, _DiscardBoards):
+                self._delete_boards(item.board_ids)
+            elif isinstance(item, threading.Event):
+                item.set()
+            elif item is self._stopping:
+                return
+
+    def _remember_discarded(self, board_ids: List[int]) -> None:
+        for board_id in board_ids:
+            if board_id not in self._discarded:
+                self._discarded.add(board_id)
+                self._discarded_order.append(board_id)
+        while len(self._discarded_order) > DISCARDED_BOARDS_MAX:
+            self._discarded.discard(self._discarded_order.popleft())
+
+    def _delete_boards(self, board_ids: List[int]) -> None:
+        """Xóa dòng đã ghi của board bị xóa (vd: event ghi trước khi board bị xóa)"""
+        db = self.session_factory()
+        try:
+            db.execute(delete(ActivityLog.__table__).where(ActivityLog.board_id.in_(board_ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Không xóa được activity của board %s", board_ids)
+        finally:
+            db.close()
+
+    def _write(self, batch: List[dict]) -> None:
+        db = self.session_factory()
+        try:
+            # insert theo Table (executemany của Core): chạy được cả trên session shard
+            db.execute(insert(ActivityLog.__table__), batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.failed += len(batch)
+            logger.exception("Không ghi được %s activity event", len(batch))
+        finally:
+            db.close()
+
+
+activity_log = ActivityLogWriter(
+    SessionLocal,
+    flush_interval_ms=settings.activity_flush_interval_ms,
+    batch_size=settings.activity_flush_batch_size,
+    queue_size=settings.activity_queue_size,
+)
@@ -0,0 +1,104 @@
+"""Chọn storage backend cho các repository theo `settings.storage_backend`.
+
+- `sql`: repository SQLAlchemy (mặc định)
+- `memory`: `app.database.memory`, không SQL (test, replica đọc trong memory)
+- `sql_cached`: SQL với read-through cache cho `get` theo id của board/task (`app.database.cached`)
+
+Router vẫn import các singleton `user_repository`, `board_repository`, ... từ
+`app.database`; các singleton này được lấy từ backend đã chọn. Session từ
+`get_db` luôn là session SQL (activity log, job vẫn ở DB) và được backend
+`memory` bỏ qua. Backend mới đăng ký bằng `@register_backend("tên")`.
+
+`tests/test_backend_conformance.py` là bộ kiểm tra mọi backend phải qua.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class StorageBackend:
+    name: str
+    user_repository: Any
+    board_repository: Any
+    task_repository: Any
+    board_stats_repository: Any
+
+
+_FACTORIES: Dict[str, Callable[[], StorageBackend]] = {}
+
+
+def register_backend(name: str):
+    def decorator(factory: Callable[[], StorageBackend]) -> Callable[[], StorageBackend]:
+        _FACTORIES[name] = factory
+        return factory
+    return decorator
+
+
+def available_backends() -> List[str]:
+    return sorted(_FACTORIES)
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Tạo repository mới của backend `name` (mỗi lần gọi là một bộ mới)"""
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"storage_backend '{name}' không tồn tại, chọn một trong {available_backends()}")
+    return factory()
+
+
+@register_backend("sql")
+def _sql_backend() -> StorageBackend:
+    from .activity_log import activity_log
+    from .repository import BoardRepository, BoardStatsRepository, TaskRepository, UserRepository
+
+    stats = BoardStatsRepository()
+    return StorageBackend(
+        name="sql",
+        user_repository=UserRepository(stats_repository=stats, activity_log=activity_log),
+        board_repository=BoardRepository(activity_log=activity_log),
+        task_repository=TaskRepository(stats_repository=stats, activity_log=activity_log),
+        board_stats_repository=stats,
+    )
+
+
+@register_backend("memory")
+def _memory_backend() -> StorageBackend:
+    from .memory import (
+        MemoryBoardRepository, MemoryBoardStatsRepository, MemoryStore, MemoryTaskRepository,
+        MemoryUserRepository,
+    )
+
+    store = MemoryStore()
+    return StorageBackend(
+        name="memory",
+        user_repository=MemoryUserRepository(store),
+        board_repository=MemoryBoardRepository(store),
+        task_repository=MemoryTaskRepository(store),
+        board_stats_repository=MemoryBoardStatsRepository(store),
+    )
+
+
+@register_backend("sql_cached")
+def _sql_cached_backend() -> StorageBackend:
+    from .cached import CachedRepository, ReadThroughCache
+
+    if settings.database_shard_urls:
+        # Object trong cache không mang shard của session shard
+        raise ValueError("storage_backend 'sql_cached' chưa hỗ trợ database_shard_urls")
+    sql = _sql_backend()
+
+    def cache() -> ReadThroughCache:
+        return ReadThroughCache(settings.repository_cache_ttl_seconds, settings.repository_cache_max_entries)
+
+    users, boards, tasks = cache(), cache(), cache()
+    return StorageBackend(
+        name="sql_cached",
+        # Xóa user -> board của user bị xóa, task được gán bị bỏ gán. User đọc để xác thực
+        # (is_active, role) nên không cache (xem app.database.cached)
+        user_repository=CachedRepository(sql.user_repository, users, dependents=[boards, tasks], cache_reads=False),
+        board_repository=CachedRepository(sql.board_repository, boards, dependents=[tasks]),
+        task_repository=CachedRepository(sql.task_repository, tasks),
+        board_stats_repository=sql.board_stats_repository,
+    )
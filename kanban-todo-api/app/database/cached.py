@@ -0,0 +1,141 @@
+"""Read-through cache cho `get(db, id)` của repository SQL (backend `sql_cached`).
+
+Cache giữ giá trị các cột (không giữ ORM object) theo id trong
+`settings.repository_cache_ttl_seconds` giây. Khi hit, object được dựng lại và
+gắn vào session bằng `Session.merge(load=False)` nên không có SELECT. Mọi
+method ghi đi qua wrapper xóa entry liên quan; ghi từ process khác chỉ được
+thấy sau khi entry hết hạn, nên TTL là độ trễ tối đa của dữ liệu cũ.
+
+User không được cache: `get_current_user` đọc user ở mọi request để kiểm tra
+`is_active`/role, user bị khóa hoặc mất quyền admin (kể cả từ worker khác)
+phải có hiệu lực ngay ở request kế tiếp.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+
+class ReadThroughCache:
+    """LRU có TTL, an toàn giữa các thread"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Any, values: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: Any) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedRepository:
+    """Bọc repository SQL: `get` đọc qua cache, method ghi xóa cache
+
+    Các method không được liệt kê ở đây được chuyển thẳng cho repository gốc.
+    `dependents` là cache bị xóa toàn bộ khi một bản ghi bị xóa (vd: xóa board
+    thì task của board cũng biến mất). `cache_reads=False`: `get` luôn đọc
+    database, wrapper chỉ còn xóa cache của `dependents`.
+    """
+
+    def __init__(
+        self,
+        repository: Any,
+        cache: ReadThroughCache,
+        dependents: Iterable[ReadThroughCache] = (),
+        cache_reads: bool = True,
+    ):
+        self.repository = repository
+        self.model = repository.model
+        self.cache = cache
+        self.cache_reads = cache_reads
+        self.dependents: List[ReadThroughCache] = list(dependents)
+        self._columns = [attr.key for attr in inspect(self.model).column_attrs]
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repository, name)
+
+    def _values(self, obj: Any) -> Dict[str, Any]:
+        return {key: getattr(obj, key) for key in self._columns}
+
+    def get(self, db: Session, id: int) -> Optional[Any]:
+        if not self.cache_reads:
+            return self.repository.get(db, id)
+        values = self.cache.get(id)
+        if values is not None:
+            obj = self.model(**values)
+            make_transient_to_detached(obj)
+            return db.merge(obj, load=False)
+        obj = self.repository.get(db, id)
+        if obj is not None:
+            self.cache.set(id, self._values(obj))
+        return obj
+
+    def _cleared(self, result: Any, *ids: Any, cascade: bool = False) -> Any:
+        self.cache.invalidate(*ids)
+        if cascade:
+            for cache in self.dependents:
+                cache.clear()
+        return result
+
+    def refresh(self, db: Session, db_obj: Any) -> Any:
+        self.cache.invalidate(db_obj.id)
+        return self.repository.refresh(db, db_obj)
+
+    def update(self, db: Session, *, db_obj: Any, obj_in: Any, **kwargs: Any) -> Any:
+        # Xóa cả trước khi ghi: request khác không đọc bản cũ trong lúc ghi
+        self.cache.invalidate(db_obj.id)
+        return self._cleared(self.repository.update(db, db_obj=db_obj, obj_in=obj_in, **kwargs), db_obj.id)
+
+    def delete(self, db: Session, *, id: int, **kwargs: Any) -> Optional[Any]:
+        self.cache.invalidate(id)
+        return self._cleared(self.repository.delete(db, id=id, **kwargs), id, cascade=True)
+
+    # Method ghi riêng của từng repository
+    def update_password(self, db: Session, user: Any, new_password: str) -> Any:
+        return self._cleared(self.repository.update_password(db, user, new_password), user.id)
+
+    def soft_delete(self, db: Session, board: Any, **kwargs: Any) -> Any:
+        self.cache.invalidate(board.id)
+        return self._cleared(self.repository.soft_delete(db, board, **kwargs), board.id, cascade=True)
+
+    def purge(self, db: Session, board_id: int, *args: Any, **kwargs: Any) -> int:
+        return self._cleared(self.repository.purge(db, board_id, *args, **kwargs), board_id, cascade=True)
+
+    def move_task(self, db: Session, task_id: int, *args: Any, **kwargs: Any) -> Optional[Any]:
+        self.cache.invalidate(task_id)
+        return self._cleared(self.repository.move_task(db, task_id, *args, **kwargs), task_id)
+
+    def reorder_column(self, db: Session, board_id: int, status: Any, task_ids: Any, **kwargs: Any) -> None:
+        self.cache.invalidate(*task_ids)
+        return self._cleared(
+            self.repository.reorder_column(db, board_id, status, task_ids, **kwargs), *task_ids
+        )
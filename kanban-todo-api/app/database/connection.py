@@ -1,25 +1,76 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
-print(settings.database_url)
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite mặc định không kiểm tra FK -> bật để ON DELETE CASCADE có hiệu lực
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
-engine = create_engine(
-    settings.database_url,
-    echo=settings.database_echo,
-)
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    # WAL: đọc không bị chặn trong lúc connection ghi đang giữ transaction
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _create_engine(url: str, **kwargs):
+    created = create_engine(url, echo=settings.database_echo, **kwargs)
+    if created.dialect.name == "sqlite":
+        event.listen(created, "connect", _enable_sqlite_foreign_keys)
+        if settings.sqlite_write_queue_enabled:
+            event.listen(created, "connect", _enable_sqlite_wal)
+    return created
 
-Base = declarative_base()
+engine = _create_engine(settings.database_url)
+
+# Shard (board + task chia theo board_id, xem app.database.sharding): primary là shard "0"
+shard_engines = {"0": engine}
+shard_engines.update({
+    str(index): _create_engine(url) for index, url in enumerate(settings.database_shard_urls, start=1)
+})
+
+if settings.database_shard_urls and settings.database_replica_urls:
+    raise ValueError("database_shard_urls chưa dùng chung được với database_replica_urls")
+if settings.sqlite_write_queue_enabled and (engine.dialect.name != "sqlite" or settings.database_shard_urls):
+    raise ValueError("sqlite_write_queue_enabled chỉ dùng với một database SQLite (không shard)")
+
+# Không đặt tên `write_queue`: import module app.database.write_queue sẽ ghi đè attribute đó của package
+sqlite_write_queue = None
+
+# Session sống trong một request: không expire object sau commit để tránh
+# SELECT lại khi serialize response (giá trị sau ghi đã có từ RETURNING/flush)
+if len(shard_engines) > 1:
+    from .sharding import create_sharded_sessionmaker
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    SessionLocal = create_sharded_sessionmaker(
+        shard_engines, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+elif settings.sqlite_write_queue_enabled:
+    # Ghi nối tiếp trên một connection riêng, commit theo nhóm (xem app.database.write_queue)
+    from .write_queue import SQLiteWriteQueue, WriteQueueSession
+
+    writer_engine = _create_engine(
+        settings.database_url, pool_size=1, max_overflow=0, connect_args={"check_same_thread": False}
+    )
+    sqlite_write_queue = SQLiteWriteQueue(writer_engine, settings.sqlite_write_group_max)
+    SessionLocal = sessionmaker(
+        class_=WriteQueueSession, write_queue=sqlite_write_queue,
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
+else:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Read replica (chỉ đọc): request GET được chia round-robin (xem app.database.routing)
+replica_engines = [_create_engine(url) for url in settings.database_replica_urls]
+ReplicaSessions = [
+    sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica)
+    for replica in replica_engines
+]
+
+Base = declarative_base()
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    for shard_engine in shard_engines.values():
+        Base.metadata.create_all(bind=shard_engine)
 
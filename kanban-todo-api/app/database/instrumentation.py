@@ -0,0 +1,49 @@
+"""Hook đo thời gian cho mọi câu SQL đi qua engine.
+
+Chỉ đăng ký một cặp listener `before/after_cursor_execute` trên engine; các
+module khác (metrics, profiler...) đăng ký observer qua `add_query_observer`
+và nhận `(statement, parameters, context, duration)` sau mỗi câu lệnh.
+"""
+import time
+from typing import Any, Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QueryObserver = Callable[[str, Any, Any, float], None]
+
+_observers: List[QueryObserver] = []
+_installed_engines = set()
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    """Đăng ký observer nhận thông tin từng câu SQL"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_query_observer(observer: QueryObserver) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    duration = time.perf_counter() - started_at
+    for observer in _observers:
+        observer(statement, parameters, context, duration)
+
+
+def install(engine: Engine) -> None:
+    """Gắn listener đo thời gian vào engine (idempotent)"""
+    if id(engine) in _installed_engines:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _installed_engines.add(id(engine))
@@ -0,0 +1,755 @@
+"""Storage engine trong bộ nhớ (không SQL) có index phụ.
+
+Các `Memory*Repository` có cùng method và chữ ký với repository SQL (tham số
+`db` được nhận nhưng bỏ qua) nên test và cache ở edge chạy được mà không cần
+database. Record là object `__slots__` gọn và được trả về trực tiếp (giống
+identity map của Session): chỉ sửa qua repository để index luôn đúng.
+
+Index trong `MemoryStore`:
+
+- username / email -> user
+- owner -> board, tập board public
+- board -> status -> list `(position, id)` đã sắp xếp (bisect): lấy cột, trang
+  keyset, `next_position`, đếm theo status không phải duyệt cả board
+- assignee -> task
+- inverted index token -> task cho `search_tasks`
+
+Activity log và job nền vẫn chỉ có ở backend SQL.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import count, islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.core.security import get_password_hash, verify_password
+from .models import PriorityEnum, StatusEnum
+from .repository import ConcurrentUpdateError, is_task_overdue
+
+_TOKEN = re.compile(r"\w+")
+_TRANSITION_CODES = {StatusEnum.todo: 0, StatusEnum.in_progress: 1, StatusEnum.done: 2, None: 3}
+
+
+def _tokens(*texts: Optional[str]) -> Set[str]:
+    return {token for text in texts if text for token in _TOKEN.findall(text.lower())}
+
+
+def _with_prefix(tokens: List[str], prefix: str) -> Iterable[str]:
+    """Các token bắt đầu bằng `prefix` trong danh sách đã sắp xếp"""
+    for index in range(bisect_left(tokens, prefix), len(tokens)):
+        if not tokens[index].startswith(prefix):
+            break
+        yield tokens[index]
+
+
+def _discard_sorted(tokens: List[str], token: str) -> None:
+    index = bisect_left(tokens, token)
+    if index < len(tokens) and tokens[index] == token:
+        del tokens[index]
+
+
+def _epoch(value: datetime) -> int:
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+
+def _obj_data(obj_in: Any, exclude_unset: bool = False) -> dict:
+    if hasattr(obj_in, "dict"):
+        return obj_in.dict(exclude_unset=exclude_unset)
+    return dict(obj_in)
+
+
+# Records
+class Record:
+    __slots__ = ()
+    # Giá trị mặc định; callable được gọi cho mỗi record (vd: datetime.utcnow)
+    _defaults: Dict[str, Any] = {}
+
+    def __init__(self, **values: Any):
+        unknown = set(values) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"{type(self).__name__} không có field {sorted(unknown)}")
+        for name in self.__slots__:
+            if name in values:
+                value = values[name]
+            else:
+                value = self._defaults.get(name)
+                if callable(value):
+                    value = value()
+            setattr(self, name, value)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}(id={getattr(self, 'id', None)})>"
+
+
+class UserRecord(Record):
+    __slots__ = (
+        "id", "username", "email", "password_hash", "full_name", "role", "is_active", "created_at", "updated_at"
+    )
+    _defaults = {"role": "user", "is_active": True, "created_at": datetime.utcnow, "updated_at": datetime.utcnow}
+
+
+class BoardRecord(Record):
+    __slots__ = (
+        "id", "name", "description", "is_public", "owner_id", "deleted_at", "version", "created_at", "updated_at"
+    )
+    _defaults = {"is_public": False, "version": 1, "created_at": datetime.utcnow, "updated_at": datetime.utcnow}
+
+
+class TaskRecord(Record):
+    __slots__ = (
+        "id", "title", "description", "status", "priority", "position", "board_id", "assigned_to",
+        "due_date", "version", "created_at", "updated_at"
+    )
+    _defaults = {
+        "status": StatusEnum.todo, "priority": PriorityEnum.medium, "position": 0, "version": 1,
+        "created_at": datetime.utcnow, "updated_at": datetime.utcnow
+    }
+
+
+class BoardStatsRecord(Record):
+    __slots__ = (
+        "board_id", "total_count", "todo_count", "in_progress_count", "done_count", "low_count",
+        "medium_count", "high_count", "unassigned_count", "overdue_count", "reconciled_at"
+    )
+
+
+class MemoryStore:
+    """Dữ liệu và index. Mọi thay đổi đi qua các method `add_*`/`change_*`/`remove_*`"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.users: Dict[int, UserRecord] = {}
+            self.boards: Dict[int, BoardRecord] = {}
+            self.tasks: Dict[int, TaskRecord] = {}
+            self._ids = {"users": count(1), "boards": count(1), "tasks": count(1)}
+
+            self.users_by_username: Dict[str, int] = {}
+            self.users_by_email: Dict[str, int] = {}
+            self.boards_by_owner: Dict[int, Set[int]] = {}
+            self.public_boards: Set[int] = set()
+            # board_id -> status -> [(position, task_id)] đã sắp xếp
+            self.columns: Dict[int, Dict[StatusEnum, List[Tuple[int, int]]]] = {}
+            self.tasks_by_assignee: Dict[int, Set[int]] = {}
+            self.search_index: Dict[str, Set[int]] = {}
+            # Token của search_index đã sắp xếp, và đảo ngược: tìm token theo
+            # tiền tố / hậu tố bằng bisect thay vì duyệt cả từ điển
+            self.search_tokens: List[str] = []
+            self.search_tokens_reversed: List[str] = []
+            # board_id -> [(task_id, status code, epoch)] theo thứ tự ghi
+            self.transitions: Dict[int, List[Tuple[int, int, int]]] = {}
+
+    def next_id(self, table: str) -> int:
+        return next(self._ids[table])
+
+    def _reserve_id(self, table: str, record_id: int) -> None:
+        """Record có id cho trước (dữ liệu mẫu): counter phải vượt qua id đó"""
+        current = next(self._ids[table])
+        self._ids[table] = count(max(current, record_id + 1))
+
+    # Users
+    def add_user(self, user: UserRecord) -> UserRecord:
+        with self.lock:
+            if user.id is None:
+                user.id = self.next_id("users")
+            else:
+                self._reserve_id("users", user.id)
+            if user.username in self.users_by_username:
+                raise ValueError(f"Username '{user.username}' đã tồn tại")
+            self.users[user.id] = user
+            self._index_user(user)
+            return user
+
+    def change_user(self, user: UserRecord, values: dict) -> UserRecord:
+        with self.lock:
+            self._unindex_user(user)
+            for field, value in values.items():
+                setattr(user, field, value)
+            self._index_user(user)
+            return user
+
+    def remove_user(self, user_id: int) -> Optional[UserRecord]:
+        """Xóa user cùng board của user; task được gán cho user -> unassigned"""
+        with self.lock:
+            user = self.users.pop(user_id, None)
+            if user is None:
+                return None
+            self._unindex_user(user)
+            for board_id in list(self.boards_by_owner.get(user_id, ())):
+                self.remove_board(board_id)
+            for task_id in list(self.tasks_by_assignee.get(user_id, ())):
+                self.change_task(self.tasks[task_id], {"assigned_to": None})
+            return user
+
+    def _index_user(self, user: UserRecord) -> None:
+        self.users_by_username[user.username] = user.id
+        if user.email:
+            self.users_by_email[user.email] = user.id
+
+    def _unindex_user(self, user: UserRecord) -> None:
+        self.users_by_username.pop(user.username, None)
+        if user.email:
+            self.users_by_email.pop(user.email, None)
+
+    # Boards
+    def add_board(self, board: BoardRecord) -> BoardRecord:
+        with self.lock:
+            if board.id is None:
+                board.id = self.next_id("boards")
+            else:
+                self._reserve_id("boards", board.id)
+            self.boards[board.id] = board
+            self._index_board(board)
+            return board
+
+    def change_board(self, board: BoardRecord, values: dict) -> BoardRecord:
+        with self.lock:
+            self._unindex_board(board)
+            for field, value in values.items():
+                setattr(board, field, value)
+            self._index_board(board)
+            return board
+
+    def remove_board(self, board_id: int) -> Optional[BoardRecord]:
+        with self.lock:
+            board = self.boards.pop(board_id, None)
+            if board is None:
+                return None
+            self._unindex_board(board)
+            for column in self.columns.pop(board_id, {}).values():
+                for _, task_id in column:
+                    task = self.tasks.pop(task_id)
+                    self._unindex_task_lookup(task)
+            self.transitions.pop(board_id, None)
+            return board
+
+    def _index_board(self, board: BoardRecord) -> None:
+        self.boards_by_owner.setdefault(board.owner_id, set()).add(board.id)
+        if board.is_public:
+            self.public_boards.add(board.id)
+
+    def _unindex_board(self, board: BoardRecord) -> None:
+        owned = self.boards_by_owner.get(board.owner_id)
+        if owned is not None:
+            owned.discard(board.id)
+            if not owned:
+                del self.boards_by_owner[board.owner_id]
+        self.public_boards.discard(board.id)
+
+    # Tasks
+    def add_task(self, task: TaskRecord) -> TaskRecord:
+        with self.lock:
+            if task.id is None:
+                task.id = self.next_id("tasks")
+            else:
+                self._reserve_id("tasks", task.id)
+            self.tasks[task.id] = task
+            self._index_task(task)
+            self._record_transition(task.board_id, task.id, task.status)
+            return task
+
+    def change_task(self, task: TaskRecord, values: dict) -> TaskRecord:
+        with self.lock:
+            old_status = task.status
+            self._unindex_task(task)
+            for field, value in values.items():
+                setattr(task, field, value)
+            self._index_task(task)
+            if task.status != old_status:
+                self._record_transition(task.board_id, task.id, task.status)
+            return task
+
+    def remove_task(self, task_id: int) -> Optional[TaskRecord]:
+        with self.lock:
+            task = self.tasks.pop(task_id, None)
+            if task is None:
+                return None
+            self._unindex_task(task)
+            self._record_transition(task.board_id, task.id, None)
+            return task
+
+    def column(self, board_id: int, status: StatusEnum) -> List[Tuple[int, int]]:
+        return self.columns.get(board_id, {}).get(status, [])
+
+    def set_column(self, board_id: int, status: StatusEnum, task_ids: Sequence[int], values: dict) -> None:
+        """Đánh lại position 0..n-1 theo thứ tự `task_ids` (cùng cột)"""
+        with self.lock:
+            for position, task_id in enumerate(task_ids):
+                task = self.tasks[task_id]
+                task.position = position
+                for field, value in values.items():
+                    setattr(task, field, value)
+            self.columns.setdefault(board_id, {})[status] = [
+                (position, task_id) for position, task_id in enumerate(task_ids)
+            ]
+
+    def _index_task(self, task: TaskRecord) -> None:
+        insort(self.columns.setdefault(task.board_id, {}).setdefault(task.status, []), (task.position, task.id))
+        if task.assigned_to is not None:
+            self.tasks_by_assignee.setdefault(task.assigned_to, set()).add(task.id)
+        for token in _tokens(task.title, task.description):
+            ids = self.search_index.get(token)
+            if ids is None:
+                ids = self.search_index[token] = set()
+                insort(self.search_tokens, token)
+                insort(self.search_tokens_reversed, token[::-1])
+            ids.add(task.id)
+
+    def _unindex_task(self, task: TaskRecord) -> None:
+        column = self.columns[task.board_id][task.status]
+        del column[bisect_left(column, (task.position, task.id))]
+        self._unindex_task_lookup(task)
+
+    def _unindex_task_lookup(self, task: TaskRecord) -> None:
+        """Bỏ task khỏi index assignee và search (cột được xử lý riêng)"""
+        if task.assigned_to is not None:
+            assigned = self.tasks_by_assignee.get(task.assigned_to)
+            if assigned is not None:
+                assigned.discard(task.id)
+                if not assigned:
+                    del self.tasks_by_assignee[task.assigned_to]
+        for token in _tokens(task.title, task.description):
+            ids = self.search_index.get(token)
+            if ids is not None:
+                ids.discard(task.id)
+                if not ids:
+                    del self.search_index[token]
+                    _discard_sorted(self.search_tokens, token)
+                    _discard_sorted(self.search_tokens_reversed, token[::-1])
+
+    def _record_transition(self, board_id: int, task_id: int, status: Optional[StatusEnum]) -> None:
+        self.transitions.setdefault(board_id, []).append(
+            (task_id, _TRANSITION_CODES[status], _epoch(datetime.utcnow()))
+        )
+
+    def search(self, query: str) -> Set[int]:
+        """Id task có title/description chứa `query` (không phân biệt hoa thường)
+
+        Inverted index thu hẹp ứng viên theo từng từ của query, sau đó kiểm tra
+        chuỗi con trên các ứng viên. Từ nằm giữa query phải là nguyên một token
+        (tra thẳng); từ cuối / đầu có thể chỉ là tiền tố / hậu tố của token
+        (bisect trên danh sách token đã sắp xếp). Chỉ query một từ mới phải
+        duyệt các token chứa nó.
+        """
+        needle = query.lower()
+        terms = list(_TOKEN.finditer(needle))
+        with self.lock:
+            if terms:
+                candidates: Optional[Set[int]] = None
+                for term in sorted(terms, key=lambda match: self._term_cost(needle, match)):
+                    matched = self._term_matches(needle, term)
+                    candidates = matched if candidates is None else candidates & matched
+                    if not candidates:
+                        return set()
+            else:
+                candidates = set(self.tasks)
+            return {
+                task_id for task_id in candidates
+                if needle in self.tasks[task_id].title.lower()
+                or (self.tasks[task_id].description and needle in self.tasks[task_id].description.lower())
+            }
+
+    @staticmethod
+    def _term_cost(needle: str, term: "re.Match") -> int:
+        # Tra thẳng < bisect tiền tố/hậu tố < duyệt token
+        return (term.start() == 0) + (term.end() == len(needle))
+
+    def _term_matches(self, needle: str, term: "re.Match") -> Set[int]:
+        """Id task có token khớp với từ `term` của query"""
+        word = term.group()
+        # Trước/sau từ trong query là ký tự không thuộc token -> token bắt đầu/kết thúc ở đó
+        starts_token = term.start() > 0
+        ends_token = term.end() < len(needle)
+        if starts_token and ends_token:
+            tokens: Iterable[str] = (word,)
+        elif starts_token:
+            tokens = _with_prefix(self.search_tokens, word)
+        elif ends_token:
+            tokens = (token[::-1] for token in _with_prefix(self.search_tokens_reversed, word[::-1]))
+        else:
+            tokens = (token for token in self.search_index if word in token)
+        matched: Set[int] = set()
+        for token in tokens:
+            matched |= self.search_index.get(token, ())
+        return matched
+
+
+class MemoryRepository:
+    """Phần chung của repository: get/get_multi/create/update/delete"""
+    record_type: type = Record
+    table: str = ""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @property
+    def _records(self) -> Dict[int, Any]:
+        return getattr(self.store, self.table)
+
+    def get(self, db: Any, id: int) -> Optional[Any]:
+        return self._records.get(id)
+
+    def get_multi(self, db: Any, *, skip: int = 0, limit: int = 100) -> List[Any]:
+        with self.store.lock:
+            return list(islice(self._records.values(), skip, skip + limit))
+
+    def refresh(self, db: Any, db_obj: Any) -> Optional[Any]:
+        # Record là object sống trong store -> luôn mới nhất, chỉ cần biết còn hay đã bị xóa
+        return self.get(db, db_obj.id)
+
+    def create(self, db: Any, *, obj_in: Any, actor_id: Optional[int] = None) -> Any:
+        return self._add(self.store, self.record_type(**self._normalize(_obj_data(obj_in))))
+
+    def update(
+        self,
+        db: Any,
+        *,
+        db_obj: Any,
+        obj_in: Any,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> Any:
+        values = self._normalize(_obj_data(obj_in, exclude_unset=True))
+        with self.store.lock:
+            self._check_version(db_obj, expected_version)
+            values["updated_at"] = datetime.utcnow()
+            if "version" in self.record_type.__slots__:
+                values["version"] = db_obj.version + 1
+            return self._change(self.store, db_obj, values)
+
+    def delete(
+        self, db: Any, *, id: int, actor_id: Optional[int] = None, expected_version: Optional[int] = None
+    ) -> Optional[Any]:
+        with self.store.lock:
+            obj = self._records.get(id)
+            if obj is None:
+                return None
+            self._check_version(obj, expected_version)
+            return self._remove(self.store, id)
+
+    def _check_version(self, obj: Any, expected_version: Optional[int]) -> None:
+        current = self._records.get(obj.id)
+        if current is None or (expected_version is not None and current.version != expected_version):
+            raise ConcurrentUpdateError(self.record_type.__name__, obj.id, expected_version)
+
+    def _normalize(self, values: dict) -> dict:
+        return values
+
+    # Thao tác trên store, subclass khai báo method tương ứng của MemoryStore
+    # (vd: `_add = staticmethod(MemoryStore.add_user)`), gọi với store làm tham số đầu
+    _add: Callable[[MemoryStore, Any], Any]
+    _change: Callable[[MemoryStore, Any, dict], Any]
+    _remove: Callable[[MemoryStore, int], Optional[Any]]
+
+
+class MemoryUserRepository(MemoryRepository):
+    record_type = UserRecord
+    table = "users"
+
+    _add = staticmethod(MemoryStore.add_user)
+    _change = staticmethod(MemoryStore.change_user)
+    _remove = staticmethod(MemoryStore.remove_user)
+
+    def get_by_username(self, db: Any, username: str) -> Optional[UserRecord]:
+        user_id = self.store.users_by_username.get(username)
+        return None if user_id is None else self.store.users.get(user_id)
+
+    def get_by_email(self, db: Any, email: str) -> Optional[UserRecord]:
+        user_id = self.store.users_by_email.get(email)
+        return None if user_id is None else self.store.users.get(user_id)
+
+    def create_user(self, db: Any, user_data: dict) -> UserRecord:
+        if "password" in user_data:
+            user_data["password_hash"] = get_password_hash(user_data.pop("password"))
+        return self.store.add_user(UserRecord(**user_data))
+
+    def authenticate(self, db: Any, username: str, password: str) -> Optional[UserRecord]:
+        user = self.get_by_username(db, username)
+        if not user or not verify_password(password, user.password_hash):
+            return None
+        return user
+
+    def update_password(self, db: Any, user: UserRecord, new_password: str) -> UserRecord:
+        user.password_hash = get_password_hash(new_password)
+        return user
+
+
+class MemoryBoardRepository(MemoryRepository):
+    record_type = BoardRecord
+    table = "boards"
+
+    _add = staticmethod(MemoryStore.add_board)
+    _change = staticmethod(MemoryStore.change_board)
+    _remove = staticmethod(MemoryStore.remove_board)
+
+    def _live(self, board_ids: Iterable[int]) -> List[BoardRecord]:
+        boards = (self.store.boards[board_id] for board_id in sorted(board_ids))
+        return [board for board in boards if board.deleted_at is None]
+
+    # Board đã soft-delete (đang chờ purge) bị ẩn khỏi mọi truy vấn đọc
+    def get(self, db: Any, id: int) -> Optional[BoardRecord]:
+        board = self.store.boards.get(id)
+        return board if board is not None and board.deleted_at is None else None
+
+    def get_by_owner(self, db: Any, owner_id: int) -> List[BoardRecord]:
+        with self.store.lock:
+            return self._live(self.store.boards_by_owner.get(owner_id, ()))
+
+    def get_all(self, db: Any) -> List[BoardRecord]:
+        with self.store.lock:
+            return self._live(self.store.boards)
+
+    def get_public_boards(self, db: Any) -> List[BoardRecord]:
+        with self.store.lock:
+            return self._live(self.store.public_boards)
+
+    def soft_delete(self, db: Any, board: BoardRecord, *, actor_id: Optional[int] = None) -> BoardRecord:
+        return self.store.change_board(board, {"deleted_at": datetime.utcnow(), "version": board.version + 1})
+
+    def get_deleted_ids(self, db: Any) -> List[int]:
+        with self.store.lock:
+            deleted = [board for board in self.store.boards.values() if board.deleted_at is not None]
+        return [board.id for board in sorted(deleted, key=lambda board: board.deleted_at)]
+
+    def purge(
+        self,
+        db: Any,
+        board_id: int,
+        chunk_size: int = 1000,
+        on_chunk: Optional[Callable[[int], None]] = None
+    ) -> int:
+        with self.store.lock:
+            board = self.store.boards.get(board_id)
+            if board is None or board.deleted_at is None:
+                return 0
+            deleted_tasks = sum(len(column) for column in self.store.columns.get(board_id, {}).values())
+            self.store.remove_board(board_id)
+        if on_chunk is not None:
+            on_chunk(deleted_tasks)
+        return deleted_tasks
+
+
+class MemoryBoardStatsRepository:
+    """Thống kê tính khi đọc từ index cột (không có bảng stats để giữ đồng bộ)"""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _board_tasks(self, board_id: int) -> List[TaskRecord]:
+        return [
+            self.store.tasks[task_id]
+            for column in self.store.columns.get(board_id, {}).values()
+            for _, task_id in column
+        ]
+
+    def get(self, db: Any, board_id: int) -> Optional[BoardStatsRecord]:
+        with self.store.lock:
+            if board_id not in self.store.boards:
+                return None
+            columns = self.store.columns.get(board_id, {})
+            tasks = self._board_tasks(board_id)
+        now = datetime.utcnow()
+        values = {f"{priority.value}_count": 0 for priority in PriorityEnum}
+        for task in tasks:
+            values[f"{task.priority.value}_count"] += 1
+        return BoardStatsRecord(
+            board_id=board_id,
+            total_count=len(tasks),
+            **{f"{status.value}_count": len(columns.get(status, ())) for status in StatusEnum},
+            **values,
+            unassigned_count=sum(1 for task in tasks if task.assigned_to is None),
+            overdue_count=sum(1 for task in tasks if is_task_overdue(task.status, task.due_date, now)),
+            reconciled_at=now,
+        )
+
+    def get_assignee_counts(self, db: Any, board_id: int) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        with self.store.lock:
+            for task in self._board_tasks(board_id):
+                if task.assigned_to is not None:
+                    counts[task.assigned_to] = counts.get(task.assigned_to, 0) + 1
+        return counts
+
+    def get_task_counts(self, db: Any, board_ids: Sequence[int]) -> Dict[int, int]:
+        with self.store.lock:
+            return {
+                board_id: sum(len(column) for column in self.store.columns.get(board_id, {}).values())
+                for board_id in board_ids
+            }
+
+    def apply_task_change(self, db: Any, before: Optional[dict], after: Optional[dict]) -> None:
+        pass
+
+    def reconcile_board(self, db: Any, board_id: int) -> Optional[BoardStatsRecord]:
+        return self.get(db, board_id)
+
+    def reconcile_all(self, db: Any, batch_size: int = 100) -> int:
+        return len(self.store.boards)
+
+
+class MemoryTaskRepository(MemoryRepository):
+    record_type = TaskRecord
+    table = "tasks"
+
+    _add = staticmethod(MemoryStore.add_task)
+    _change = staticmethod(MemoryStore.change_task)
+    _remove = staticmethod(MemoryStore.remove_task)
+
+    def _normalize(self, values: dict) -> dict:
+        # Chấp nhận cả chuỗi ("todo") như API cũ của mock_data
+        if values.get("status") is not None:
+            values["status"] = StatusEnum(values["status"])
+        if values.get("priority") is not None:
+            values["priority"] = PriorityEnum(values["priority"])
+        return values
+
+    def _resolve(self, keys: Iterable[Tuple[int, int]]) -> List[TaskRecord]:
+        return [self.store.tasks[task_id] for _, task_id in keys]
+
+    @staticmethod
+    def _filter(tasks: List[TaskRecord], priority=None, assigned_to=None) -> List[TaskRecord]:
+        if priority is not None:
+            tasks = [task for task in tasks if task.priority == priority]
+        if assigned_to is not None:
+            tasks = [task for task in tasks if task.assigned_to == assigned_to]
+        return tasks
+
+    def _on_live_board(self, task: TaskRecord) -> bool:
+        board = self.store.boards.get(task.board_id)
+        return board is not None and board.deleted_at is None
+
+    def get_multi(self, db: Any, *, skip: int = 0, limit: int = 100) -> List[TaskRecord]:
+        with self.store.lock:
+            live = (task for task in self.store.tasks.values() if self._on_live_board(task))
+            return list(islice(live, skip, skip + limit))
+
+    def get_transition_rows(self, db: Any, board_id: int, until: datetime) -> List[tuple]:
+        limit = _epoch(until)
+        with self.store.lock:
+            rows = [row for row in self.store.transitions.get(board_id, ()) if row[2] < limit]
+        # sort ổn định: các transition cùng giây giữ thứ tự ghi
+        rows.sort(key=lambda row: (row[0], row[2]))
+        return rows
+
+    def get_by_board(
+        self,
+        db: Any,
+        board_id: int,
+        *,
+        priority: Optional[PriorityEnum] = None,
+        assigned_to: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[TaskRecord]:
+        with self.store.lock:
+            columns = self.store.columns.get(board_id, {}).values()
+            tasks = self._resolve(heapq.merge(*columns))
+        return self._filter(tasks, priority, assigned_to)
+
+    def get_by_status(
+        self,
+        db: Any,
+        board_id: int,
+        status: StatusEnum,
+        *,
+        priority: Optional[PriorityEnum] = None,
+        assigned_to: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[TaskRecord]:
+        with self.store.lock:
+            tasks = self._resolve(self.store.column(board_id, StatusEnum(status)))
+        return self._filter(tasks, priority, assigned_to)
+
+    def get_column_page(
+        self,
+        db: Any,
+        board_id: int,
+        status: StatusEnum,
+        *,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[TaskRecord]:
+        with self.store.lock:
+            column = self.store.column(board_id, status)
+            start = bisect_right(column, tuple(after)) if after is not None else 0
+            return self._resolve(column[start:start + limit + 1])
+
+    def reorder_column(
+        self,
+        db: Any,
+        board_id: int,
+        status: StatusEnum,
+        task_ids: Sequence[int],
+        *,
+        actor_id: Optional[int] = None
+    ) -> None:
+        with self.store.lock:
+            current_ids = {task_id for _, task_id in self.store.column(board_id, status)}
+            requested_ids = set(task_ids)
+            if requested_ids != current_ids:
+                missing = sorted(current_ids - requested_ids)
+                unknown = sorted(requested_ids - current_ids)
+                raise ValueError(f"task_ids không khớp với cột: thiếu {missing}, không thuộc cột {unknown}")
+            now = datetime.utcnow()
+            for task_id in task_ids:
+                self.store.tasks[task_id].version += 1
+            self.store.set_column(board_id, status, task_ids, {"updated_at": now})
+
+    def next_position(self, db: Any, board_id: int, status: StatusEnum) -> int:
+        return len(self.store.column(board_id, status))
+
+    def column_state(self, db: Any, board_id: int, status: StatusEnum) -> Tuple[int, int]:
+        with self.store.lock:
+            column = self.store.column(board_id, status)
+            return len(column), sum(self.store.tasks[task_id].version for _, task_id in column)
+
+    def count_by_board(self, db: Any, board_id: int) -> int:
+        with self.store.lock:
+            return sum(len(self.store.column(board_id, status)) for status in StatusEnum)
+
+    def count_by_status(self, db: Any, board_id: int) -> Dict[StatusEnum, int]:
+        with self.store.lock:
+            return {status: len(self.store.column(board_id, status)) for status in StatusEnum}
+
+    def get_by_assigned_user(self, db: Any, user_id: int) -> List[TaskRecord]:
+        with self.store.lock:
+            tasks = [self.store.tasks[task_id] for task_id in sorted(self.store.tasks_by_assignee.get(user_id, ()))]
+            return [task for task in tasks if self._on_live_board(task)]
+
+    def search_tasks(self, db: Any, query: str, board_id: Optional[int] = None) -> List[TaskRecord]:
+        with self.store.lock:
+            tasks = [self.store.tasks[task_id] for task_id in sorted(self.store.search(query))]
+        if board_id:
+            tasks = [task for task in tasks if task.board_id == board_id]
+        return tasks
+
+    def move_task(
+        self,
+        db: Any,
+        task_id: int,
+        new_status: StatusEnum,
+        new_position: Optional[int] = None,
+        *,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> Optional[TaskRecord]:
+        new_status = StatusEnum(new_status)
+        with self.store.lock:
+            task = self.store.tasks.get(task_id)
+            if not task:
+                return None
+            self._check_version(task, expected_version)
+            values = {"status": new_status, "version": task.version + 1, "updated_at": datetime.utcnow()}
+            if new_status != task.status and new_position is None:
+                new_position = self.next_position(db, task.board_id, new_status)
+            if new_position is not None:
+                values["position"] = new_position
+            return self.store.change_task(task, values)
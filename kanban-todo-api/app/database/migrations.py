@@ -0,0 +1,72 @@
+"""Kiểm tra schema lúc khởi động: revision trong bảng `alembic_version` phải là head.
+
+Thay cho `create_all` mỗi lần import app: một SELECT trên mỗi shard, head
+được tính từ `revision`/`down_revision` của các file trong `mugrations/versions`
+(đọc bằng `ast`, không import Alembic — riêng import Alembic đã tốn hơn create_all).
+"""
+import ast
+import os
+from typing import Dict, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(PROJECT_ROOT, "alembic.ini")
+VERSIONS_DIR = os.path.join(PROJECT_ROOT, "mugrations", "versions")
+
+
+def _revision_ids(path: str) -> Dict[str, object]:
+    """`revision` và `down_revision` khai báo ở mức module của file migration"""
+    with open(path, encoding="utf-8") as source:
+        tree = ast.parse(source.read(), filename=path)
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.AnnAssign):
+            target, value = node.target, node.value
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+        else:
+            continue
+        if isinstance(target, ast.Name) and target.id in ("revision", "down_revision") and value is not None:
+            found[target.id] = ast.literal_eval(value)
+    return found
+
+
+def head_revisions(versions_dir: str = VERSIONS_DIR) -> Set[str]:
+    """Revision không là down_revision của revision nào (giống `alembic heads`)"""
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        ids = _revision_ids(os.path.join(versions_dir, name))
+        if "revision" not in ids:
+            continue
+        revisions.add(ids["revision"])
+        down = ids.get("down_revision")
+        parents.update(down if isinstance(down, (list, tuple)) else [down] if down else [])
+    return revisions - parents
+
+
+def current_revisions(engine: Engine) -> Set[str]:
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return set()
+        return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def check_schema_revision(engines: Dict[str, Engine]) -> None:
+    """Raise RuntimeError nếu database nào (theo shard id) chưa ở Alembic head"""
+    heads = head_revisions()
+    outdated = {}
+    for shard_id, engine in engines.items():
+        current = current_revisions(engine)
+        if current != heads:
+            outdated[shard_id] = sorted(current) or ["(chưa migrate)"]
+    if outdated:
+        details = ", ".join(f"shard {shard_id}: {', '.join(revs)}" for shard_id, revs in outdated.items())
+        raise RuntimeError(
+            f"Database chưa ở Alembic head {', '.join(sorted(heads))} ({details}). "
+            "Chạy `alembic upgrade head` (với DATABASE_URL của từng shard) trước khi khởi động, "
+            "hoặc đặt DATABASE_CREATE_TABLES=true khi phát triển"
+        )
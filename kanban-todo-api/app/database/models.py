@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Boolean, Index, JSON, Text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum
@@ -16,6 +16,12 @@ class PriorityEnum(str, Enum):
     medium = "medium"
     high = "high"
 
+class JobStatusEnum(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
 
 # Single User model (keep password_hash and role)
 class User(Base):
@@ -31,9 +37,9 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    # Relationships
-    boards = relationship("Board", back_populates="owner", cascade="all, delete-orphan")
-    assigned_tasks = relationship("Task", back_populates="assigned_user")
+    # Relationships (FK có ON DELETE ở DB -> passive_deletes, không load con khi xóa)
+    boards = relationship("Board", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    assigned_tasks = relationship("Task", back_populates="assigned_user", passive_deletes=True)
 
 
 class Board(Base):
@@ -43,13 +49,22 @@ class Board(Base):
     name = Column(String(100), nullable=False)
     description = Column(String(500), nullable=True)
     is_public = Column(Boolean, default=False, nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Soft delete: board lớn được ẩn ngay rồi purge dần ở nền
+    deleted_at = Column(DateTime, nullable=True)
+    # Optimistic concurrency: tăng mỗi lần ghi, dùng làm ETag
+    version = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
     owner = relationship("User", back_populates="boards")
-    tasks = relationship("Task", back_populates="board", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="board", cascade="all, delete-orphan", passive_deletes=True)
+    stats = relationship("BoardStats", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    assignee_stats = relationship("BoardAssigneeStats", cascade="all, delete-orphan", passive_deletes=True)
+    transitions = relationship("TaskTransition", cascade="all, delete-orphan", passive_deletes=True)
+
+    __mapper_args__ = {"version_id_col": version}
 
 
 class Task(Base):
@@ -61,9 +76,10 @@ class Task(Base):
     status = Column(SQLEnum(StatusEnum), default=StatusEnum.todo, nullable=False)
     priority = Column(SQLEnum(PriorityEnum), default=PriorityEnum.medium, nullable=False)
     position = Column(Integer, default=0, nullable=False)
-    board_id = Column(Integer, ForeignKey("boards.id"), nullable=False)
-    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    assigned_to = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     due_date = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -71,6 +87,127 @@ class Task(Base):
     board = relationship("Board", back_populates="tasks")
     assigned_user = relationship("User", back_populates="assigned_tasks")
 
+    __table_args__ = (
+        # Lấy task theo cột của board và phân trang keyset (position, id)
+        Index("ix_tasks_board_status_position", "board_id", "status", "position", "id"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<Task(id={self.id}, title='{self.title}', status='{self.status}')>"
 
+
+
+class BoardStats(Base):
+    """Thống kê task của board, cập nhật tăng dần bởi TaskRepository"""
+    __tablename__ = "board_stats"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    total_count = Column(Integer, default=0, nullable=False)
+    todo_count = Column(Integer, default=0, nullable=False)
+    in_progress_count = Column(Integer, default=0, nullable=False)
+    done_count = Column(Integer, default=0, nullable=False)
+    low_count = Column(Integer, default=0, nullable=False)
+    medium_count = Column(Integer, default=0, nullable=False)
+    high_count = Column(Integer, default=0, nullable=False)
+    unassigned_count = Column(Integer, default=0, nullable=False)
+    overdue_count = Column(Integer, default=0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
+
+class BoardAssigneeStats(Base):
+    """Số task theo từng assignee trong board"""
+    __tablename__ = "board_assignee_stats"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    task_count = Column(Integer, default=0, nullable=False)
+
+
+class TaskTransition(Base):
+    """Lịch sử chuyển status của task (nguồn cho analytics)
+
+    `from_status` là NULL khi task được tạo, `to_status` là NULL khi task bị
+    xóa. `task_id` không có FK để lịch sử vẫn còn sau khi task bị xóa.
+    """
+    __tablename__ = "task_transitions"
+
+    id = Column(Integer, primary_key=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    from_status = Column(SQLEnum(StatusEnum), nullable=True)
+    to_status = Column(SQLEnum(StatusEnum), nullable=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_transitions_board_changed_at", "board_id", "changed_at"),
+    )
+
+
+class ActivityLog(Base):
+    """Nhật ký hoạt động (append-only) của board
+
+    Được ghi bất đồng bộ bởi `app.database.activity_log` nên `board_id` và
+    `actor_id` không có FK: event có thể được flush sau khi board/user đã bị xóa.
+    """
+    __tablename__ = "activity_log"
+
+    id = Column(Integer, primary_key=True)
+    board_id = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=True)
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String(50), nullable=False)
+    changes = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_activity_log_board_id_id", "board_id", "id"),
+    )
+
+
+class Job(Base):
+    """Job nền (xem app.core.jobs): xóa board lớn, reconcile stats, ..."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=True)
+    status = Column(SQLEnum(JobStatusEnum), default=JobStatusEnum.queued, nullable=False)
+    # Số lớn chạy trước
+    priority = Column(Integer, default=0, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    progress = Column(Float, default=0.0, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, nullable=True)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Worker đang chạy job và lần cuối nó báo còn sống (job `running` có
+    # heartbeat quá cũ là của worker đã chết -> được đưa lại hàng đợi)
+    locked_by = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Lấy job tiếp theo: WHERE status = 'queued' ORDER BY priority DESC, id
+        Index("ix_jobs_status_priority_id", "status", "priority", "id"),
+    )
+
+
+class BoardShard(Base):
+    """Board nằm ở shard nào (app.database.sharding), chỉ có ở primary"""
+    __tablename__ = "board_shards"
+
+    board_id = Column(Integer, primary_key=True, autoincrement=False)
+    shard_id = Column(String(32), nullable=False)
+    placed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IdSequence(Base):
+    """Id tiếp theo chưa cấp của bảng được shard (cấp theo block)"""
+    __tablename__ = "id_sequences"
+
+    name = Column(String(50), primary_key=True)
+    next_value = Column(Integer, nullable=False)
@@ -1,16 +1,38 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional, Generic, TypeVar, Type
-from .models import User, Board, 	Task, StatusEnum, PriorityEnum
-from app.core.security import get_password_hash
+from datetime import datetime, timedelta
+from enum import Enum
+from sqlalchemy import Integer, and_, case, cast, delete, extract, func, or_, select, update
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.exc import StaleDataError
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Generic, TypeVar, Type, Sequence, Tuple
+from .models import (
+    User, Board, Task, StatusEnum, PriorityEnum, BoardStats, BoardAssigneeStats, TaskTransition, ActivityLog,
+    Job, JobStatusEnum
+)
+from app.core.security import get_password_hash, verify_password
+from .sharding import is_sharded
+
+if TYPE_CHECKING:
+    from .activity_log import ActivityLogWriter
 
 # Generic types
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
+class ConcurrentUpdateError(Exception):
+    """Bản ghi đã bị ghi bởi request khác (version không khớp)"""
+
+    def __init__(self, model_name: str, id: int, expected_version: Optional[int] = None):
+        super().__init__(f"{model_name} {id} đã bị thay đổi (version mong đợi {expected_version})")
+        self.model_name = model_name
+        self.id = id
+        self.expected_version = expected_version
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(self, model: Type[ModelType], activity_log: Optional["ActivityLogWriter"] = None):
         self.model = model
+        self.activity = activity_log
     
     def get(self, db: Session, id: int) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -18,32 +40,190 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
     
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    def refresh(self, db: Session, db_obj: ModelType) -> Optional[ModelType]:
+        """Đọc lại bản ghi sau khi được ghi ở nơi khác (vd: thread nền); None nếu đã bị xóa"""
+        try:
+            db.refresh(db_obj)
+        except InvalidRequestError:
+            return None
+        return db_obj
+
+    def create(self, db: Session, *, obj_in: CreateSchemaType, actor_id: Optional[int] = None) -> ModelType:
         obj_data = obj_in.dict() if hasattr(obj_in, 'dict') else obj_in
         db_obj = self.model(**obj_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        self._commit_change(db, None, db_obj, actor_id)
         return db_obj
     
-    def update(self, db: Session, *, db_obj: ModelType, obj_in: UpdateSchemaType) -> ModelType:
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: ModelType,
+        obj_in: UpdateSchemaType,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> ModelType:
+        """Cập nhật bản ghi. Model có cột `version` được ghi bằng một câu
+        `UPDATE ... WHERE id = ? AND version = ? RETURNING ...`; raise
+        ConcurrentUpdateError nếu version không khớp.
+
+        `expected_version` mặc định là version lúc `db_obj` được đọc.
+        """
         obj_data = obj_in.dict(exclude_unset=True) if hasattr(obj_in, 'dict') else obj_in
-        for field, value in obj_data.items():
-            setattr(db_obj, field, value)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        before = self._snapshot(db_obj)
+        if not self._versioned:
+            for field, value in obj_data.items():
+                setattr(db_obj, field, value)
+            db.flush()
+            self._commit_change(db, before, db_obj, actor_id)
+            return db_obj
+
+        if expected_version is None:
+            expected_version = db_obj.version
+        updated = db.execute(
+            update(self.model)
+            .where(self.model.id == db_obj.id, self.model.version == expected_version)
+            .values(**obj_data, version=self.model.version + 1)
+            .returning(self.model)
+        ).scalars().first()
+        if updated is None:
+            db.rollback()
+            raise ConcurrentUpdateError(self.model.__name__, db_obj.id, expected_version)
+        self._commit_change(db, before, updated, actor_id)
+        return updated
     
-    def delete(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+    def delete(
+        self, db: Session, *, id: int, actor_id: Optional[int] = None, expected_version: Optional[int] = None
+    ) -> Optional[ModelType]:
+        """Xóa bản ghi. Model không có cascade ORM được xóa bằng một câu
+        `DELETE ... WHERE id = ? [AND version = ?]` thay vì `Session.delete`
+        (vốn load relationship trước khi xóa).
+        """
+        # Object thường đã được router load -> lấy từ identity map, không SELECT lại
+        obj = db.get(self.model, id)
+        if obj is None:
+            return None
+        if expected_version is not None and obj.version != expected_version:
+            raise ConcurrentUpdateError(self.model.__name__, id, expected_version)
+        before = self._delete_snapshot(db, obj)
+        if self.orm_delete_cascade:
+            db.delete(obj)
+            self._flush_versioned(db, obj, expected_version)
+        else:
+            statement = delete(self.model).where(self.model.id == id)
+            if self._versioned:
+                statement = statement.where(self.model.version == obj.version)
+            result = db.execute(statement.execution_options(synchronize_session=False))
+            if result.rowcount == 0:
+                db.rollback()
+                raise ConcurrentUpdateError(self.model.__name__, id, expected_version)
+            db.expunge(obj)
+        self._commit_change(db, before, None, actor_id)
         return obj
 
+    @property
+    def _versioned(self) -> bool:
+        return "version" in self.model.__table__.c
+
+    def _flush_versioned(self, db: Session, obj: ModelType, expected_version: Optional[int] = None) -> None:
+        """Flush; version_id_col phát hiện ghi đồng thời -> ConcurrentUpdateError"""
+        try:
+            db.flush()
+        except StaleDataError:
+            db.rollback()
+            raise ConcurrentUpdateError(self.model.__name__, obj.id, expected_version)
+
+    def _commit_change(
+        self, db: Session, before: Optional[dict], after: Optional[ModelType], actor_id: Optional[int]
+    ) -> None:
+        """Chạy hook, commit, rồi mới ghi activity (không log thay đổi bị rollback)"""
+        self._on_change(db, before, after)
+        event = self._activity_event(before, after)
+        db.commit()
+        if event is not None and self.activity is not None:
+            self.activity.emit(actor_id=actor_id, **event)
+        self._after_commit(before, after)
+
+    # Model có relationship cascade="all, delete-orphan" phải xóa qua Session
+    orm_delete_cascade = False
+
+    # Hooks cho subclass: chạy trong cùng transaction, sau flush và trước commit.
+    # `before` là None khi tạo mới, `after` là None khi xóa.
+    def _snapshot(self, db_obj: ModelType) -> Optional[dict]:
+        return {"id": db_obj.id}
+
+    def _delete_snapshot(self, db: Session, db_obj: ModelType) -> Optional[dict]:
+        """Snapshot trước khi xóa (mặc định giống `_snapshot`)"""
+        return self._snapshot(db_obj)
+
+    def _on_change(self, db: Session, before: Optional[dict], after: Optional[ModelType]) -> None:
+        pass
+
+    def _activity_event(self, before: Optional[dict], after: Optional[ModelType]) -> Optional[dict]:
+        """Event cho activity log (board_id, action, task_id, changes) hoặc None"""
+        return None
+
+    def _after_commit(self, before: Optional[dict], after: Optional[ModelType]) -> None:
+        """Chạy sau commit (vd: báo activity log bỏ event của board đã xóa)"""
+
+def _jsonable(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _diff(before: dict, after: dict, fields: Sequence[str]) -> Dict[str, list]:
+    """{field: [giá trị cũ, giá trị mới]} cho các field thay đổi"""
+    return {
+        field: [_jsonable(before.get(field)), _jsonable(after.get(field))]
+        for field in fields
+        if before.get(field) != after.get(field)
+    }
+
 # Tạo User repository
 class UserRepository(BaseRepository[User, dict, dict]):
-    def __init__(self):
-        super().__init__(User)
+    def __init__(
+        self,
+        stats_repository: Optional["BoardStatsRepository"] = None,
+        activity_log: Optional["ActivityLogWriter"] = None
+    ):
+        super().__init__(User, activity_log)
+        self.stats = stats_repository
+
+    def _delete_snapshot(self, db: Session, db_obj: User) -> Optional[dict]:
+        snapshot = super()._delete_snapshot(db, db_obj)
+        # Board của user bị DB xóa theo (ON DELETE CASCADE)
+        snapshot["owned_board_ids"] = [
+            board_id for (board_id,) in db.query(Board.id).filter(Board.owner_id == db_obj.id).all()
+        ]
+        if self.stats is not None:
+            # Các board có task được gán cho user (assigned_to sẽ bị set NULL khi xóa)
+            snapshot["assigned_board_ids"] = [
+                board_id for (board_id,) in db.query(Task.board_id).filter(
+                    Task.assigned_to == db_obj.id
+                ).distinct().all()
+            ]
+        return snapshot
+
+    def _on_change(self, db: Session, before: Optional[dict], after: Optional[User]) -> None:
+        if after is None and before:
+            owned_board_ids = before["owned_board_ids"]
+            if owned_board_ids:
+                # activity_log không có FK -> dọn tay
+                db.query(ActivityLog).filter(
+                    ActivityLog.board_id.in_(owned_board_ids)
+                ).delete(synchronize_session=False)
+            if self.stats is not None:
+                for board_id in set(before.get("assigned_board_ids", [])) - set(owned_board_ids):
+                    self.stats.reconcile_board(db, board_id)
+
+    def _after_commit(self, before: Optional[dict], after: Optional[User]) -> None:
+        if after is None and before and self.activity is not None:
+            # Event của board bị xóa theo user có thể còn trong hàng đợi write-behind
+            self.activity.discard_boards(before["owned_board_ids"])
     
     def get_by_username(self, db: Session, username: str) -> Optional[User]:
         return db.query(User).filter(User.username == username).first()
@@ -59,7 +239,6 @@ class UserRepository(BaseRepository[User, dict, dict]):
         db_user = User(**user_data)
         db.add(db_user)
         db.commit()
-        db.refresh(db_user)
         return db_user
 
     def authenticate(self, db: Session, username: str, password: str) -> Optional[User]:
@@ -77,40 +256,669 @@ class UserRepository(BaseRepository[User, dict, dict]):
         """Cập nhật password cho user"""
         user.password_hash = get_password_hash(new_password)
         db.commit()
-        db.refresh(user)
         return user
 
         
 # Tạo Board repository
 class BoardRepository(BaseRepository[Board, dict, dict]):
-    def __init__(self):
-        super().__init__(Board)
+    ACTIVITY_FIELDS = ("name", "description", "is_public")
+
+    def __init__(self, activity_log: Optional["ActivityLogWriter"] = None):
+        super().__init__(Board, activity_log)
+
+    def _snapshot(self, db_obj: Board) -> Optional[dict]:
+        snapshot = super()._snapshot(db_obj)
+        snapshot.update({field: getattr(db_obj, field) for field in self.ACTIVITY_FIELDS})
+        return snapshot
+
+    def _on_change(self, db: Session, before: Optional[dict], after: Optional[Board]) -> None:
+        if before is None and after is not None:
+            # Board mới: tạo sẵn dòng thống kê rỗng
+            db.add(BoardStats(board_id=after.id, reconciled_at=datetime.utcnow()))
+        elif after is None and before is not None:
+            # activity_log không có FK -> dọn tay khi xóa board
+            db.query(ActivityLog).filter(
+                ActivityLog.board_id == before["id"]
+            ).delete(synchronize_session=False)
+
+    def _after_commit(self, before: Optional[dict], after: Optional[Board]) -> None:
+        if after is None and before is not None and self.activity is not None:
+            # Event emit ngay trước khi xóa còn trong hàng đợi write-behind -> bỏ/xóa sau khi ghi
+            self.activity.discard_boards([before["id"]])
+
+    def _activity_event(self, before: Optional[dict], after: Optional[Board]) -> Optional[dict]:
+        if after is None:
+            return None
+        if before is None:
+            return {"board_id": after.id, "action": "board.created", "changes": {"name": after.name}}
+        changes = _diff(before, self._snapshot(after), self.ACTIVITY_FIELDS)
+        if not changes:
+            return None
+        return {"board_id": after.id, "action": "board.updated", "changes": changes}
     
+    # Board đã soft-delete (đang chờ purge) bị ẩn khỏi mọi truy vấn đọc
+    def get(self, db: Session, id: int) -> Optional[Board]:
+        return db.query(Board).filter(Board.id == id, Board.deleted_at.is_(None)).first()
+
     def get_by_owner(self, db: Session, owner_id: int) -> List[Board]:
-        return db.query(Board).filter(Board.owner_id == owner_id).all()
+        return db.query(Board).filter(Board.owner_id == owner_id, Board.deleted_at.is_(None)).all()
 
     def get_all(self, db: Session) -> List[Board]:
-        return db.query(Board).all()
+        return db.query(Board).filter(Board.deleted_at.is_(None)).all()
 
     def get_public_boards(self, db: Session) -> List[Board]:
-        return db.query(Board).filter(Board.is_public == True).all()
+        return db.query(Board).filter(Board.is_public == True, Board.deleted_at.is_(None)).all()
+
+    def soft_delete(self, db: Session, board: Board, *, actor_id: Optional[int] = None) -> Board:
+        """Ẩn board ngay (một câu UPDATE), task được `purge` xóa sau ở nền"""
+        before = self._snapshot(board)
+        board.deleted_at = datetime.utcnow()
+        self._flush_versioned(db, board)
+        self._commit_change(db, before, board, actor_id)
+        return board
+
+    def get_deleted_ids(self, db: Session) -> List[int]:
+        return [board_id for (board_id,) in db.query(Board.id).filter(
+            Board.deleted_at.isnot(None)
+        ).order_by(Board.deleted_at).all()]
+
+    def purge(
+        self,
+        db: Session,
+        board_id: int,
+        chunk_size: int = 1000,
+        on_chunk: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """Xóa board đã soft-delete: task và transition theo từng chunk (mỗi
+        chunk một commit, không giữ lock lâu), cuối cùng là board. Trả về số task đã xóa
+
+        `on_chunk(deleted_tasks)` được gọi sau mỗi chunk task (báo tiến độ).
+        """
+        deleted_tasks = 0
+        for model in (Task, TaskTransition):
+            while True:
+                chunk = select(model.id).where(model.board_id == board_id).limit(chunk_size).scalar_subquery()
+                result = db.execute(
+                    # board_id ở ngoài subquery để session shard biết câu lệnh thuộc board nào
+                    delete(model).where(model.board_id == board_id, model.id.in_(chunk))
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                if model is Task:
+                    deleted_tasks += result.rowcount
+                    if on_chunk is not None:
+                        on_chunk(deleted_tasks)
+                if result.rowcount < chunk_size:
+                    break
+        db.execute(
+            delete(Board).where(Board.id == board_id, Board.deleted_at.isnot(None))
+            .execution_options(synchronize_session=False)
+        )
+        self._on_change(db, {"id": board_id}, None)
+        db.commit()
+        self._after_commit({"id": board_id}, None)
+        return deleted_tasks
+
+# Thống kê board (materialized, cập nhật tăng dần)
+_STATUS_COLUMNS = {
+    StatusEnum.todo: "todo_count",
+    StatusEnum.in_progress: "in_progress_count",
+    StatusEnum.done: "done_count",
+}
+_PRIORITY_COLUMNS = {
+    PriorityEnum.low: "low_count",
+    PriorityEnum.medium: "medium_count",
+    PriorityEnum.high: "high_count",
+}
+
+def is_task_overdue(status: StatusEnum, due_date: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    return due_date is not None and status != StatusEnum.done and due_date < (now or datetime.utcnow())
+
+def _overdue_count_query(board_id: int, now: datetime):
+    return select(func.count(Task.id)).where(
+        Task.board_id == board_id,
+        Task.due_date.isnot(None),
+        Task.due_date < now,
+        Task.status != StatusEnum.done
+    ).scalar_subquery()
+
+class BoardStatsRepository:
+    """Bảng `board_stats` / `board_assignee_stats`
+
+    Các thay đổi task được áp dụng dưới dạng delta (`col = col + :d`) nên không
+    mất cập nhật khi nhiều request ghi đồng thời. Riêng `overdue_count` phụ
+    thuộc đồng hồ (task có thể quá hạn sau khi được ghi) nên không dùng delta:
+    khi task có due_date thay đổi, cột được đếm lại bằng subquery COUNT trong
+    cùng câu UPDATE. Task quá hạn theo thời gian mà không bị ghi được
+    `reconcile_all` định kỳ cập nhật.
+    """
+
+    def get(self, db: Session, board_id: int) -> Optional[BoardStats]:
+        return db.query(BoardStats).filter(BoardStats.board_id == board_id).first()
+
+    def get_assignee_counts(self, db: Session, board_id: int) -> Dict[int, int]:
+        rows = db.query(BoardAssigneeStats.user_id, BoardAssigneeStats.task_count).filter(
+            BoardAssigneeStats.board_id == board_id,
+            BoardAssigneeStats.task_count > 0
+        ).all()
+        return {user_id: count for user_id, count in rows}
+
+    def get_task_counts(self, db: Session, board_ids: Sequence[int]) -> Dict[int, int]:
+        """tasks_count cho nhiều board trong một query (fallback COUNT nếu thiếu stats)"""
+        if not board_ids:
+            return {}
+        counts = dict(db.query(BoardStats.board_id, BoardStats.total_count).filter(
+            BoardStats.board_id.in_(board_ids)
+        ).all())
+        missing = [board_id for board_id in board_ids if board_id not in counts]
+        if missing:
+            counts.update(dict(db.query(Task.board_id, func.count(Task.id)).filter(
+                Task.board_id.in_(missing)
+            ).group_by(Task.board_id).all()))
+        return {board_id: counts.get(board_id, 0) for board_id in board_ids}
+
+    def apply_task_change(self, db: Session, before: Optional[dict], after: Optional[dict]) -> None:
+        """Áp dụng delta từ trạng thái task trước/sau (None = không tồn tại)"""
+        deltas: Dict[int, Dict[str, int]] = {}
+        assignee_deltas: Dict[Tuple[int, int], int] = {}
+        recount_overdue = set()
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            columns = deltas.setdefault(state["board_id"], {})
+            keys = ["total_count", _STATUS_COLUMNS[state["status"]], _PRIORITY_COLUMNS[state["priority"]]]
+            if state["assigned_to"] is None:
+                keys.append("unassigned_count")
+            else:
+                key = (state["board_id"], state["assigned_to"])
+                assignee_deltas[key] = assignee_deltas.get(key, 0) + sign
+            if state["due_date"] is not None:
+                recount_overdue.add(state["board_id"])
+            for key in keys:
+                columns[key] = columns.get(key, 0) + sign
+
+        reconciled = set()
+        now = datetime.utcnow()
+        for board_id, columns in deltas.items():
+            values = {key: getattr(BoardStats, key) + delta for key, delta in columns.items() if delta}
+            if board_id in recount_overdue:
+                # Thay đổi đã được flush: COUNT thấy trạng thái mới của task
+                values["overdue_count"] = _overdue_count_query(board_id, now)
+            if not values:
+                continue
+            result = db.execute(
+                update(BoardStats)
+                .where(BoardStats.board_id == board_id)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                # Board chưa có dòng stats (dữ liệu cũ): tính lại toàn bộ
+                self.reconcile_board(db, board_id)
+                reconciled.add(board_id)
+
+        for (board_id, user_id), delta in assignee_deltas.items():
+            if not delta or board_id in reconciled:
+                continue
+            result = db.execute(
+                update(BoardAssigneeStats)
+                .where(BoardAssigneeStats.board_id == board_id, BoardAssigneeStats.user_id == user_id)
+                .values(task_count=BoardAssigneeStats.task_count + delta)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0 and delta > 0:
+                db.add(BoardAssigneeStats(board_id=board_id, user_id=user_id, task_count=delta))
+                db.flush()
+
+    def reconcile_board(self, db: Session, board_id: int) -> BoardStats:
+        """Tính lại stats của board từ bảng tasks (không commit)"""
+        now = datetime.utcnow()
+        values = {key: 0 for key in (
+            "total_count", "unassigned_count", "overdue_count",
+            *_STATUS_COLUMNS.values(), *_PRIORITY_COLUMNS.values()
+        )}
+        rows = db.query(
+            Task.status, Task.priority, Task.assigned_to.is_(None), func.count(Task.id)
+        ).filter(Task.board_id == board_id).group_by(
+            Task.status, Task.priority, Task.assigned_to.is_(None)
+        ).all()
+        for task_status, priority, unassigned, count in rows:
+            values["total_count"] += count
+            values[_STATUS_COLUMNS[task_status]] += count
+            values[_PRIORITY_COLUMNS[priority]] += count
+            if unassigned:
+                values["unassigned_count"] += count
+        values["overdue_count"] = db.execute(select(_overdue_count_query(board_id, now))).scalar()
+
+        stats = self.get(db, board_id)
+        if stats is None:
+            stats = BoardStats(board_id=board_id)
+            db.add(stats)
+        for key, value in values.items():
+            setattr(stats, key, value)
+        stats.reconciled_at = now
+
+        db.query(BoardAssigneeStats).filter(
+            BoardAssigneeStats.board_id == board_id
+        ).delete(synchronize_session=False)
+        assignee_rows = db.query(Task.assigned_to, func.count(Task.id)).filter(
+            Task.board_id == board_id,
+            Task.assigned_to.isnot(None)
+        ).group_by(Task.assigned_to).all()
+        for user_id, count in assignee_rows:
+            db.add(BoardAssigneeStats(board_id=board_id, user_id=user_id, task_count=count))
+        db.flush()
+        return stats
+
+    def reconcile_all(self, db: Session, batch_size: int = 100) -> int:
+        """Tính lại stats cho mọi board, commit theo từng batch. Trả về số board"""
+        board_ids = [board_id for (board_id,) in db.query(Board.id).order_by(Board.id).all()]
+        for index, board_id in enumerate(board_ids, start=1):
+            self.reconcile_board(db, board_id)
+            if index % batch_size == 0:
+                db.commit()
+        db.commit()
+        return len(board_ids)
+
+# Activity log (chỉ đọc, ghi qua app.database.activity_log)
+class ActivityLogRepository:
+    def get_board_page(
+        self, db: Session, board_id: int, *, limit: int, before: Optional[int] = None
+    ) -> List[ActivityLog]:
+        """Activity của board, mới nhất trước, keyset theo id nhỏ hơn `before`
+
+        Trả về tối đa `limit + 1` dòng để caller biết còn trang sau hay không.
+        """
+        query = db.query(ActivityLog).filter(ActivityLog.board_id == board_id)
+        if before is not None:
+            query = query.filter(ActivityLog.id < before)
+        return query.order_by(ActivityLog.id.desc()).limit(limit + 1).all()
+
+# Job nền (xem app.core.jobs)
+class JobRepository:
+    ACTIVE_STATUSES = (JobStatusEnum.queued, JobStatusEnum.running)
+
+    def get(self, db: Session, job_id: int) -> Optional[Job]:
+        return db.get(Job, job_id)
+
+    def create(
+        self,
+        db: Session,
+        kind: str,
+        payload: Optional[dict] = None,
+        *,
+        priority: int = 0,
+        max_attempts: int = 3,
+        created_by: Optional[int] = None
+    ) -> Job:
+        job = Job(
+            kind=kind, payload=payload, priority=priority,
+            max_attempts=max_attempts, created_by=created_by
+        )
+        db.add(job)
+        db.commit()
+        return job
+
+    def get_active(self, db: Session, kind: str) -> List[Job]:
+        """Job đang chờ hoặc đang chạy của một loại"""
+        return db.query(Job).filter(Job.kind == kind, Job.status.in_(self.ACTIVE_STATUSES)).all()
+
+    def find_active(self, db: Session, kind: str, payload: Optional[dict] = None) -> Optional[Job]:
+        """Job cùng loại/payload đang chờ hoặc đang chạy (để không enqueue trùng)"""
+        jobs = self.get_active(db, kind)
+        return next((job for job in jobs if (job.payload or None) == (payload or None)), None)
+
+    def claim_next(self, db: Session, limit: int, worker_id: Optional[str] = None) -> List[Job]:
+        """Nhận tối đa `limit` job đến hạn theo priority; mỗi job được chuyển
+        queued -> running bằng UPDATE có điều kiện nên không bị chạy hai lần
+        """
+        now = datetime.utcnow()
+        candidates = db.query(Job.id).filter(
+            Job.status == JobStatusEnum.queued,
+            Job.run_after <= now
+        ).order_by(Job.priority.desc(), Job.id).limit(limit).all()
+        claimed = []
+        for (job_id,) in candidates:
+            result = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatusEnum.queued)
+                .values(status=JobStatusEnum.running, started_at=now, attempts=Job.attempts + 1,
+                        locked_by=worker_id, heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(job_id)
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(Job).filter(Job.id.in_(claimed)).order_by(Job.priority.desc(), Job.id).all()
+
+    def heartbeat(self, db: Session, worker_id: str) -> int:
+        """Báo các job `running` của worker vẫn đang chạy"""
+        result = db.execute(
+            update(Job).where(Job.status == JobStatusEnum.running, Job.locked_by == worker_id)
+            .values(heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    def set_progress(self, db: Session, job_id: int, progress: float) -> None:
+        db.execute(
+            update(Job).where(Job.id == job_id)
+            .values(progress=max(0.0, min(progress, 1.0)))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def finish(self, db: Session, job_id: int, result: Optional[dict] = None) -> None:
+        db.execute(
+            update(Job).where(Job.id == job_id)
+            .values(status=JobStatusEnum.succeeded, progress=1.0, result=result,
+                    error=None, finished_at=datetime.utcnow(), locked_by=None, heartbeat_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def fail(
+        self, db: Session, job: Job, error: str, *, retry_delay_seconds: float = 0, retry: bool = True
+    ) -> bool:
+        """Ghi lỗi; còn lượt thì đưa lại hàng đợi sau `retry_delay_seconds`. Trả về True nếu sẽ retry"""
+        retry = retry and job.attempts < job.max_attempts
+        values = {"error": error, "locked_by": None, "heartbeat_at": None}
+        if retry:
+            values.update(
+                status=JobStatusEnum.queued,
+                run_after=datetime.utcnow() + timedelta(seconds=retry_delay_seconds)
+            )
+        else:
+            values.update(status=JobStatusEnum.failed, finished_at=datetime.utcnow())
+        db.execute(
+            update(Job).where(Job.id == job.id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return retry
+
+    def requeue(self, db: Session, job_id: int) -> None:
+        """Trả job đang chạy về hàng đợi (bị dừng khi shutdown, không tính là một lần thử)"""
+        db.execute(
+            update(Job).where(Job.id == job_id, Job.status == JobStatusEnum.running)
+            .values(status=JobStatusEnum.queued, attempts=Job.attempts - 1, locked_by=None, heartbeat_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def requeue_interrupted(self, db: Session, stale_after_seconds: float) -> int:
+        """Job `running` có heartbeat cũ hơn `stale_after_seconds` (worker đã chết
+        giữa chừng) -> chạy lại; như `requeue`, lần chạy dở không tính là một lần thử.
+        Job của worker còn sống (heartbeat mới) không bị đụng tới.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        result = db.execute(
+            update(Job).where(
+                Job.status == JobStatusEnum.running,
+                or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < stale_before)
+            )
+            .values(status=JobStatusEnum.queued, attempts=Job.attempts - 1, locked_by=None, heartbeat_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
 
 # Tạo Task repository
 class TaskRepository(BaseRepository[Task, dict, dict]):
-    def __init__(self):
-        super().__init__(Task)
+    ACTIVITY_FIELDS = ("title", "description", "status", "priority", "position", "assigned_to", "due_date")
+
+    def __init__(
+        self,
+        stats_repository: Optional[BoardStatsRepository] = None,
+        activity_log: Optional["ActivityLogWriter"] = None
+    ):
+        super().__init__(Task, activity_log)
+        self.stats = stats_repository or BoardStatsRepository()
+
+    def _snapshot(self, db_obj: Optional[Task]) -> Optional[dict]:
+        if db_obj is None:
+            return None
+        return {
+            "id": db_obj.id,
+            "board_id": db_obj.board_id,
+            "status": db_obj.status,
+            "priority": db_obj.priority,
+            "assigned_to": db_obj.assigned_to,
+            "title": db_obj.title,
+            "description": db_obj.description,
+            "position": db_obj.position,
+            "due_date": db_obj.due_date,
+        }
+
+    def _on_change(self, db: Session, before: Optional[dict], after: Optional[Task]) -> None:
+        after_state = self._snapshot(after)
+        self.stats.apply_task_change(db, before, after_state)
+        self._record_transition(db, before, after, after_state)
+
+    def _activity_event(self, before: Optional[dict], after: Optional[Task]) -> Optional[dict]:
+        after_state = self._snapshot(after)
+        state = after_state or before
+        event = {"board_id": state["board_id"], "task_id": state["id"]}
+        if before is None:
+            return {**event, "action": "task.created", "changes": {"title": after_state["title"]}}
+        if after_state is None:
+            return {**event, "action": "task.deleted", "changes": {"title": before["title"]}}
+        changes = _diff(before, after_state, self.ACTIVITY_FIELDS)
+        if not changes:
+            return None
+        action = "task.moved" if {"status", "position"} & changes.keys() else "task.updated"
+        return {**event, "action": action, "changes": changes}
+
+    def _record_transition(
+        self, db: Session, before: Optional[dict], after: Optional[Task], after_state: Optional[dict]
+    ) -> None:
+        """Ghi lịch sử status khi task được tạo, đổi status hoặc bị xóa"""
+        from_status = before["status"] if before else None
+        to_status = after_state["status"] if after_state else None
+        if before is not None and after_state is not None and from_status == to_status:
+            return
+        db.add(TaskTransition(
+            board_id=(after_state or before)["board_id"],
+            task_id=after.id if after is not None else before["id"],
+            from_status=from_status,
+            to_status=to_status,
+            changed_at=datetime.utcnow(),
+        ))
+
+    def get_transition_rows(self, db: Session, board_id: int, until: datetime) -> List[tuple]:
+        """Lịch sử transition của board dạng cột số nguyên, sắp theo (task_id, thời gian)
+
+        Mỗi dòng: (task_id, to_status_code, changed_at epoch seconds) với
+        code 0=todo, 1=in_progress, 2=done, 3=đã xóa.
+        """
+        status_code = case(
+            (TaskTransition.to_status == StatusEnum.todo, 0),
+            (TaskTransition.to_status == StatusEnum.in_progress, 1),
+            (TaskTransition.to_status == StatusEnum.done, 2),
+            else_=3,
+        )
+        statement = select(
+            TaskTransition.task_id,
+            status_code,
+            cast(extract("epoch", TaskTransition.changed_at), Integer),
+        ).where(
+            TaskTransition.board_id == board_id,
+            TaskTransition.changed_at < until
+        ).order_by(TaskTransition.task_id, TaskTransition.changed_at, TaskTransition.id)
+        return db.execute(statement).all()
     
-    def get_by_board(self, db: Session, board_id: int) -> List[Task]:
-        return db.query(Task).filter(Task.board_id == board_id).order_by(Task.position).all()
+    def _with_fields(self, query, fields: Optional[Sequence[str]]):
+        """Chỉ SELECT các cột cần thiết (sparse fieldset), id luôn được load"""
+        if not fields:
+            return query
+        return query.options(load_only(*[getattr(Task, field) for field in fields]))
+
+    def get_by_board(
+        self,
+        db: Session,
+        board_id: int,
+        *,
+        priority: Optional[PriorityEnum] = None,
+        assigned_to: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Task]:
+        query = db.query(Task).filter(Task.board_id == board_id)
+        if priority is not None:
+            query = query.filter(Task.priority == priority)
+        if assigned_to is not None:
+            query = query.filter(Task.assigned_to == assigned_to)
+        return self._with_fields(query, fields).order_by(Task.position).all()
     
-    def get_by_status(self, db: Session, board_id: int, status: StatusEnum) -> List[Task]:
-        return db.query(Task).filter(
+    def get_by_status(
+        self,
+        db: Session,
+        board_id: int,
+        status: StatusEnum,
+        *,
+        priority: Optional[PriorityEnum] = None,
+        assigned_to: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Task]:
+        query = db.query(Task).filter(
             Task.board_id == board_id,
             Task.status == status
-        ).order_by(Task.position).all()
+        )
+        if priority is not None:
+            query = query.filter(Task.priority == priority)
+        if assigned_to is not None:
+            query = query.filter(Task.assigned_to == assigned_to)
+        return self._with_fields(query, fields).order_by(Task.position).all()
     
+    def get_column_page(
+        self,
+        db: Session,
+        board_id: int,
+        status: StatusEnum,
+        *,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Task]:
+        """Trang task của một cột, keyset theo (position, id) sau cursor `after`
+
+        Trả về tối đa `limit + 1` task để caller biết còn trang sau hay không.
+        """
+        query = db.query(Task).filter(Task.board_id == board_id, Task.status == status)
+        if after is not None:
+            after_position, after_id = after
+            query = query.filter(or_(
+                Task.position > after_position,
+                and_(Task.position == after_position, Task.id > after_id)
+            ))
+        if fields:
+            # position cần cho cursor của trang tiếp theo
+            fields = tuple(set(fields) | {"position"})
+        query = self._with_fields(query, fields)
+        return query.order_by(Task.position, Task.id).limit(limit + 1).all()
+
+    REORDER_CHUNK_SIZE = 500
+
+    def reorder_column(
+        self,
+        db: Session,
+        board_id: int,
+        status: StatusEnum,
+        task_ids: Sequence[int],
+        *,
+        actor_id: Optional[int] = None
+    ) -> None:
+        """Đánh lại position 0..n-1 cho cả cột theo thứ tự `task_ids`
+
+        `task_ids` phải gồm đúng các task đang ở cột (raise ValueError nếu
+        không). Position được ghi bằng `UPDATE ... SET position = CASE id ...`
+        (mỗi 500 task một câu) trong một transaction; số task của cột được
+        đếm lại trước khi commit, lệch thì rollback.
+        """
+        current_ids = {task_id for (task_id,) in db.query(Task.id).filter(
+            Task.board_id == board_id,
+            Task.status == status
+        ).all()}
+        requested_ids = set(task_ids)
+        if requested_ids != current_ids:
+            missing = sorted(current_ids - requested_ids)
+            unknown = sorted(requested_ids - current_ids)
+            raise ValueError(f"task_ids không khớp với cột: thiếu {missing}, không thuộc cột {unknown}")
+
+        now = datetime.utcnow()
+        updated = 0
+        for start in range(0, len(task_ids), self.REORDER_CHUNK_SIZE):
+            chunk = task_ids[start:start + self.REORDER_CHUNK_SIZE]
+            positions = {task_id: start + offset for offset, task_id in enumerate(chunk)}
+            result = db.execute(
+                update(Task)
+                .where(Task.board_id == board_id, Task.status == status, Task.id.in_(chunk))
+                .values(position=case(positions, value=Task.id), version=Task.version + 1, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        if updated == len(task_ids):
+            # Kiểm tra lại sau khi ghi, trong cùng transaction: task được thêm vào
+            # cột đồng thời sẽ giữ position trùng với một task vừa đánh số lại
+            updated = db.query(func.count(Task.id)).filter(
+                Task.board_id == board_id,
+                Task.status == status
+            ).scalar()
+        if updated != len(task_ids):
+            # Cột bị thay đổi đồng thời giữa lúc kiểm tra và lúc ghi
+            db.rollback()
+            raise ValueError("Cột đã thay đổi, vui lòng tải lại")
+        db.commit()
+        if self.activity is not None:
+            self.activity.emit(
+                board_id=board_id,
+                action="column.reordered",
+                actor_id=actor_id,
+                changes={"status": status.value, "count": len(task_ids)},
+            )
+
+    def next_position(self, db: Session, board_id: int, status: StatusEnum) -> int:
+        """Position cho task được thêm vào cuối cột (COUNT, không load cả cột)"""
+        return db.query(func.count(Task.id)).filter(
+            Task.board_id == board_id,
+            Task.status == status
+        ).scalar()
+
+    def column_state(self, db: Session, board_id: int, status: StatusEnum) -> Tuple[int, int]:
+        """(số task, tổng version) của cột: đổi khi task trong cột được ghi, thêm hoặc bớt"""
+        count, version_sum = db.query(
+            func.count(Task.id), func.coalesce(func.sum(Task.version), 0)
+        ).filter(Task.board_id == board_id, Task.status == status).one()
+        return count, version_sum
+
+    def count_by_board(self, db: Session, board_id: int) -> int:
+        """Số task của board (một câu COUNT trên bảng tasks)"""
+        return db.query(func.count(Task.id)).filter(Task.board_id == board_id).scalar()
+
+    def count_by_status(self, db: Session, board_id: int) -> Dict[StatusEnum, int]:
+        rows = db.query(Task.status, func.count(Task.id)).filter(
+            Task.board_id == board_id
+        ).group_by(Task.status).all()
+        counts = {status: 0 for status in StatusEnum}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _on_live_boards(self, query):
+        """Bỏ task của board đã soft-delete (đang chờ purge)"""
+        return query.join(Board, Board.id == Task.board_id).filter(Board.deleted_at.is_(None))
+
+    def get_multi(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Task]:
+        query = self._on_live_boards(db.query(Task)).order_by(Task.id)
+        if is_sharded(db):
+            # Mỗi shard trả về skip + limit task đầu tiên, gộp theo id rồi mới cắt trang
+            tasks = sorted(query.limit(skip + limit).all(), key=lambda task: task.id)
+            return tasks[skip:skip + limit]
+        return query.offset(skip).limit(limit).all()
+
     def get_by_assigned_user(self, db: Session, user_id: int) -> List[Task]:
-        return db.query(Task).filter(Task.assigned_to == user_id).all()
+        return self._on_live_boards(db.query(Task)).filter(Task.assigned_to == user_id).all()
     
     def search_tasks(self, db: Session, query: str, board_id: Optional[int] = None) -> List[Task]:
         search_query = db.query(Task).filter(
@@ -122,22 +930,34 @@ class TaskRepository(BaseRepository[Task, dict, dict]):
         
         return search_query.all()
     
-    def move_task(self, db: Session, task_id: int, new_status: StatusEnum, new_position: Optional[int] = None) -> Optional[Task]:
-        task = self.get(db, task_id)
+    def move_task(
+        self,
+        db: Session,
+        task_id: int,
+        new_status: StatusEnum,
+        new_position: Optional[int] = None,
+        *,
+        actor_id: Optional[int] = None,
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        # Router đã load task để kiểm tra quyền -> lấy từ identity map
+        task = db.get(Task, task_id)
         if not task:
             return None
+        if expected_version is not None and task.version != expected_version:
+            raise ConcurrentUpdateError("Task", task_id, expected_version)
         
+        before = self._snapshot(task)
         old_status = task.status
         task.status = new_status
         
 # Tính position mới nếu không được specify
         if new_status != old_status and new_position is None:
-            tasks_in_new_status = self.get_by_status(db, task.board_id, new_status)
-            new_position = len(tasks_in_new_status)
+            new_position = self.next_position(db, task.board_id, new_status)
         
         if new_position is not None:
             task.position = new_position
         
-        db.commit()
-        db.refresh(task)
+        self._flush_versioned(db, task, expected_version)
+        self._commit_change(db, before, task, actor_id)
         return task
@@ -0,0 +1,178 @@
+"""Định tuyến session của request giữa primary và read replica.
+
+Khi có `settings.database_replica_urls`, `get_db` trả về session của một
+replica (round-robin) cho request GET/HEAD/OPTIONS; mọi request khác dùng
+primary. Read-your-writes: sau một request ghi, các request đọc của cùng
+client đi vào primary trong `settings.replica_sticky_seconds` giây, đủ để
+replica bắt kịp. Thời điểm hết sticky được trả về client trong cookie
+`STICKY_COOKIE` (`StickyCookieMiddleware`) nên worker nào nhận request đọc kế
+tiếp cũng biết, không cần bảng dùng chung. Client không giữ cookie vẫn được
+sticky trong worker đã nhận request ghi (bảng trong process theo header
+Authorization, hoặc IP nếu request ghi chưa đăng nhập như đăng ký).
+
+Endpoint GET cần dữ liệu mới nhất hoặc có ghi (vd: trạng thái job) dùng
+`get_primary_db`. Không có replica thì `get_db` luôn dùng primary.
+
+`get_db` trả về `Session` thật (đúng class của sessionmaker, vd:
+`RoutedSession`), nhưng Session chỉ mở connection ở lần dùng đầu tiên. Việc
+đánh dấu sticky và đếm vào `ReplicaRouter.routed` cũng dời đến lúc đó (event
+`after_begin`), nên request dừng sớm (token sai, lỗi validate, backend không
+dùng session) không mở connection và không làm client bị sticky. Metric
+`db_sessions_total{used}` đếm session được dùng / bỏ qua.
+"""
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Sequence
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import db_sessions_total
+from .connection import ReplicaSessions, SessionLocal
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+STICKY_COOKIE = "db_primary_until"
+# request.state: thời điểm (epoch) hết sticky của request ghi, để middleware ghi cookie
+STICKY_STATE = "db_primary_until"
+# Session.info: việc cần làm khi session mở connection lần đầu / session đã mở connection
+ON_FIRST_USE = "on_first_use"
+USED = "used"
+
+
+def on_first_use(session: Session, callback: Callable[[], None]) -> Session:
+    """Gọi `callback` khi `session` mở connection lần đầu, sau đó `session.info[USED]` là True"""
+    session.info[ON_FIRST_USE] = callback
+    return session
+
+
+@event.listens_for(Session, "after_begin")
+def _after_begin(session: Session, transaction, connection) -> None:
+    callback = session.info.pop(ON_FIRST_USE, None)
+    if callback is not None:
+        session.info[USED] = True
+        callback()
+
+
+class ReplicaRouter:
+    def __init__(self, primary: sessionmaker, replicas: Sequence[sessionmaker], sticky_seconds: float = 5.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.routed = {"primary": 0, "replica": 0, "sticky": 0}
+        self._next_replica = itertools.cycle(range(len(self.replicas)))
+        self._sticky: Dict[object, float] = {}
+        self._lock = threading.Lock()
+
+    def _keys(self, request: Request) -> List[object]:
+        keys: List[object] = []
+        authorization = request.headers.get("authorization")
+        if authorization:
+            # Chỉ giữ hash, không giữ token trong memory
+            keys.append(hash(authorization))
+        if request.client is not None:
+            keys.append(("ip", request.client.host))
+        return keys
+
+    def _mark_write(self, request: Request) -> None:
+        setattr(request.state, STICKY_STATE, time.time() + self.sticky_seconds)
+        keys = self._keys(request)
+        if not keys:
+            return
+        until = time.monotonic() + self.sticky_seconds
+        with self._lock:
+            # Request ghi có đăng nhập -> sticky theo token; chưa đăng nhập -> theo IP
+            self._sticky[keys[0]] = until
+            if len(self._sticky) > 10000:
+                now = time.monotonic()
+                self._sticky = {key: expiry for key, expiry in self._sticky.items() if expiry > now}
+
+    def _sticky_cookie(self, request: Request) -> bool:
+        try:
+            until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return False
+        now = time.time()
+        # Cookie do client giữ: không tin thời hạn dài hơn sticky_seconds
+        return now < until <= now + self.sticky_seconds
+
+    def _is_sticky(self, request: Request) -> bool:
+        if self._sticky_cookie(request):
+            return True
+        now = time.monotonic()
+        with self._lock:
+            return any(self._sticky.get(key, 0) > now for key in self._keys(request))
+
+    def _count(self, target: str) -> None:
+        with self._lock:
+            self.routed[target] += 1
+
+    def session_for(self, request: Request) -> Session:
+        """Session của request; đánh dấu sticky và đếm khi session được dùng (xem `on_first_use`)"""
+        if not self.replicas:
+            return on_first_use(self.primary(), lambda: None)
+        if request.method not in SAFE_METHODS:
+            return on_first_use(self.primary(), lambda: self._write_started(request))
+        if self._is_sticky(request):
+            return on_first_use(self.primary(), lambda: self._count("sticky"))
+        with self._lock:
+            index = next(self._next_replica)
+        session = self.replicas[index]()
+        session.info["replica"] = index
+        return on_first_use(session, lambda: self._count("replica"))
+
+    def _write_started(self, request: Request) -> None:
+        self._mark_write(request)
+        self._count("primary")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"replicas": len(self.replicas), "routed": dict(self.routed)}
+
+
+replica_router = ReplicaRouter(SessionLocal, ReplicaSessions, sticky_seconds=settings.replica_sticky_seconds)
+
+
+class StickyCookieMiddleware:
+    """ASGI middleware gắn cookie `STICKY_COOKIE` vào response của request ghi đã dùng session primary"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start":
+                until = scope.get("state", {}).get(STICKY_STATE)
+                if until is not None:
+                    cookie = (
+                        f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(until - time.time())}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def get_db(request: Request) -> Iterator[Session]:
+    db = replica_router.session_for(request)
+    try:
+        yield db
+    finally:
+        db.close()
+        db_sessions_total.inc("true" if db.info.get(USED) else "false")
+
+
+def get_primary_db() -> Iterator[Session]:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
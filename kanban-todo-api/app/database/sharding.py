@@ -0,0 +1,302 @@
+"""Shard ngang board và task ra nhiều database theo `board_id`.
+
+Bật bằng `settings.database_shard_urls` (JSON list): shard "0" là
+`database_url` (primary), các URL thêm vào là shard "1", "2", ... Khi đó
+`SessionLocal` tạo `RoutedSession` (`sqlalchemy.ext.horizontal_shard`):
+repository vẫn dùng một session, session chọn database cho từng câu lệnh.
+
+- boards, tasks, board_stats, board_assignee_stats, task_transitions: theo
+  board. Vị trí board nằm trong bảng `board_shards` ở primary (board mới được
+  đặt theo `id % số shard`, board không có trong bảng là ở primary). Câu lệnh
+  có điều kiện `board_id = ?`/`IN (...)` (hoặc `boards.id`) chỉ chạy trên
+  shard của các board đó, task theo id đã load chạy trên shard của object;
+  còn lại chạy trên mọi shard và gộp kết quả (scatter-gather, vd:
+  `/tasks/my/assigned`, danh sách board của admin).
+- users: bảng tham chiếu, đọc ở primary, ghi ra mọi shard để FK của
+  board/task ở từng shard vẫn có hiệu lực (xóa user cascade trên mọi shard).
+- các bảng khác (jobs, activity_log, ...): chỉ ở primary.
+
+Id của board và task phải duy nhất trên mọi shard nên được cấp theo block từ
+bảng `id_sequences` ở primary thay cho autoincrement (đã bật shard thì không
+tắt lại). Mỗi shard commit riêng (không 2PC). Schema của shard tạo bằng
+`alembic upgrade head` với DATABASE_URL là URL của shard, user có sẵn được
+chép sang bằng `scripts/rebalance_shards.py sync-users`; script này cũng
+chuyển board giữa các shard.
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Column, event, func, insert, inspect, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+PRIMARY_SHARD = "0"
+ID_BLOCK_SIZE = 100
+
+# Bảng chia theo board -> cột chứa board_id
+BOARD_KEY_COLUMNS = {
+    "boards": "id",
+    "tasks": "board_id",
+    "board_stats": "board_id",
+    "board_assignee_stats": "board_id",
+    "task_transitions": "board_id",
+}
+REPLICATED_TABLES = frozenset({"users"})
+# Bảng có id được cấp từ id_sequences
+SEQUENCE_TABLES = ("boards", "tasks")
+
+
+def _conjuncts(clause) -> Iterable[Any]:
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for child in clause.clauses:
+            yield from _conjuncts(child)
+    else:
+        yield clause
+
+
+def where_values(
+    statement, table_name: str, column_name: str, parameters: Optional[dict] = None
+) -> Optional[Set[Any]]:
+    """Giá trị của `table.column` trong điều kiện `col = ?` / `col IN (...)`
+    nối bằng AND ở mức ngoài cùng của WHERE; None nếu câu lệnh không giới hạn cột đó
+
+    `parameters` là tham số lúc execute (vd: `Session.get` truyền khóa chính qua đây).
+    """
+    parameters = parameters if isinstance(parameters, dict) else {}
+    whereclause = getattr(statement, "whereclause", None)
+    if whereclause is None:
+        return None
+    found: Optional[Set[Any]] = None
+    for clause in _conjuncts(whereclause):
+        if not isinstance(clause, BinaryExpression):
+            continue
+        column, value = clause.left, clause.right
+        if not isinstance(column, Column) or column.name != column_name:
+            continue
+        if getattr(column.table, "name", None) != table_name or not isinstance(value, BindParameter):
+            continue
+        bound = parameters.get(value.key, value.effective_value)
+        if clause.operator is operators.eq:
+            values = {bound}
+        elif clause.operator is operators.in_op:
+            values = set(bound or ())
+        else:
+            continue
+        found = values if found is None else found & values
+    return found
+
+
+class IdAllocator:
+    """Cấp id duy nhất trên mọi shard: mỗi process giữ một block `block_size`
+    id, hết block thì lấy block tiếp theo bằng một câu UPDATE ở primary
+    """
+
+    def __init__(self, engines: Dict[str, Engine], primary: str = PRIMARY_SHARD, block_size: int = ID_BLOCK_SIZE):
+        self.engines = engines
+        self.primary = primary
+        self.block_size = block_size
+        self._blocks: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def next_id(self, name: str) -> int:
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                start = self._reserve(name)
+                block = self._blocks[name] = [start, start + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _reserve(self, name: str) -> int:
+        from .models import IdSequence
+
+        with self.engines[self.primary].begin() as connection:
+            end = connection.execute(
+                update(IdSequence.__table__)
+                .where(IdSequence.name == name)
+                .values(next_value=IdSequence.next_value + self.block_size)
+                .returning(IdSequence.next_value)
+            ).scalar()
+        if end is not None:
+            return end - self.block_size
+        # Lần đầu: bắt đầu sau id lớn nhất đang có trên mọi shard
+        start = self._max_id(name) + 1
+        try:
+            with self.engines[self.primary].begin() as connection:
+                connection.execute(
+                    insert(IdSequence.__table__).values(name=name, next_value=start + self.block_size)
+                )
+        except IntegrityError:
+            # Process khác vừa tạo dòng sequence
+            return self._reserve(name)
+        return start
+
+    def _max_id(self, name: str) -> int:
+        from .connection import Base
+
+        table = Base.metadata.tables[name]
+        highest = 0
+        for shard_engine in self.engines.values():
+            with shard_engine.connect() as connection:
+                highest = max(highest, connection.execute(select(func.max(table.c.id))).scalar() or 0)
+        return highest
+
+
+class ShardRouter:
+    """Các engine theo shard id và bảng `board_shards` (board -> shard)"""
+
+    def __init__(self, engines: Dict[str, Engine], primary: str = PRIMARY_SHARD):
+        self.engines = dict(engines)
+        self.primary = primary
+        self.shard_ids = list(self.engines)
+        self.ids = IdAllocator(self.engines, primary)
+
+    def place(self, board_id: int) -> str:
+        """Shard cho board mới"""
+        return self.shard_ids[board_id % len(self.shard_ids)]
+
+    def _directory(self, session: Session) -> Dict[int, str]:
+        # Cache theo session: board được chuyển shard có hiệu lực từ request sau
+        return session.info.setdefault("board_shards", {})
+
+    def shard_for_board(self, session: Session, board_id: int) -> str:
+        directory = self._directory(session)
+        shard_id = directory.get(board_id)
+        if shard_id is None:
+            from .models import BoardShard
+
+            connection = session.connection(bind_arguments={"shard_id": self.primary})
+            shard_id = connection.execute(
+                select(BoardShard.shard_id).where(BoardShard.board_id == board_id)
+            ).scalar() or self.primary
+            directory[board_id] = shard_id
+        return shard_id
+
+    def shards_for_boards(self, session: Session, board_ids: Iterable[int]) -> List[str]:
+        shard_ids = {self.shard_for_board(session, board_id) for board_id in board_ids}
+        return sorted(shard_ids) or [self.primary]
+
+    def assign_board(self, session: Session, board_id: int) -> str:
+        """Ghi vị trí của board mới vào `board_shards` (cùng transaction với session)"""
+        from .models import BoardShard
+
+        shard_id = self.place(board_id)
+        session.connection(bind_arguments={"shard_id": self.primary}).execute(
+            insert(BoardShard.__table__).values(board_id=board_id, shard_id=shard_id, placed_at=datetime.utcnow())
+        )
+        self._directory(session)[board_id] = shard_id
+        return shard_id
+
+
+class RoutedSession(ShardedSession):
+    """Session chọn shard cho từng câu lệnh theo `ShardRouter`"""
+
+    def __init__(self, router: ShardRouter, **kwargs: Any):
+        self.router = router
+        super().__init__(
+            shard_chooser=self._choose_shard,
+            identity_chooser=self._choose_identity_shards,
+            execute_chooser=self._choose_execute_shards,
+            shards=router.engines,
+            **kwargs
+        )
+
+    def _choose_shard(self, mapper, instance, clause=None, **kw) -> str:
+        """Shard để flush một object mới"""
+        table = mapper.local_table.name if mapper is not None else None
+        key_column = BOARD_KEY_COLUMNS.get(table)
+        if key_column is None or instance is None:
+            return self.router.primary
+        return self.router.shard_for_board(self, getattr(instance, key_column))
+
+    def _choose_identity_shards(self, mapper, primary_key, *, lazy_loaded_from=None, **kw) -> List[str]:
+        """Shard có thể chứa object trong identity map (chỉ tra memory)"""
+        if lazy_loaded_from is not None:
+            return [lazy_loaded_from.identity_token]
+        if mapper.local_table.name in BOARD_KEY_COLUMNS:
+            return self.router.shard_ids
+        return [self.router.primary]
+
+    def _choose_execute_shards(self, orm_context: ORMExecuteState) -> List[str]:
+        router = self.router
+        mapper = orm_context.bind_mapper
+        table = mapper.local_table.name if mapper is not None else None
+        if table in REPLICATED_TABLES:
+            return [router.primary] if orm_context.is_select else router.shard_ids
+        key_column = BOARD_KEY_COLUMNS.get(table)
+        if key_column is None:
+            return [router.primary]
+
+        statement, parameters = orm_context.statement, orm_context.parameters
+        board_ids = where_values(statement, table, key_column, parameters)
+        if board_ids is not None:
+            return router.shards_for_boards(self, board_ids)
+        if table == "tasks":
+            # Task đã load trong session (vd: router kiểm tra quyền trước khi ghi)
+            task_ids = where_values(statement, "tasks", "id", parameters)
+            if task_ids:
+                shard_ids = set()
+                for task_id in task_ids:
+                    shard_id = next((
+                        shard_id for shard_id in router.shard_ids
+                        if (mapper.class_, (task_id,), shard_id) in self.identity_map
+                    ), None)
+                    if shard_id is None:
+                        return router.shard_ids
+                    shard_ids.add(shard_id)
+                return sorted(shard_ids)
+        return router.shard_ids
+
+
+def _before_flush(session: RoutedSession, flush_context, instances) -> None:
+    """Cấp id cho board/task mới và ghi vị trí board mới"""
+    for obj in list(session.new):
+        table = obj.__table__.name
+        if table in SEQUENCE_TABLES and obj.id is None:
+            obj.id = session.router.ids.next_id(table)
+            if table == "boards":
+                session.router.assign_board(session, obj.id)
+
+
+def _after_flush(session: RoutedSession, flush_context) -> None:
+    """Chép thay đổi của users (bảng tham chiếu) sang các shard còn lại"""
+    router = session.router
+    changed = [
+        (obj, obj in session.new) for obj in session.new | session.dirty
+        if obj.__table__.name in REPLICATED_TABLES and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if obj.__table__.name in REPLICATED_TABLES]
+    if not changed and not deleted:
+        return
+    for shard_id in router.shard_ids:
+        if shard_id == router.primary:
+            continue
+        connection = session.connection(bind_arguments={"shard_id": shard_id})
+        for obj, is_new in changed:
+            table = obj.__table__
+            row = {prop.columns[0].name: getattr(obj, prop.key) for prop in inspect(obj).mapper.column_attrs}
+            if is_new:
+                connection.execute(insert(table).values(**row))
+            else:
+                connection.execute(update(table).where(table.c.id == obj.id).values(**row))
+        for obj in deleted:
+            connection.execute(obj.__table__.delete().where(obj.__table__.c.id == obj.id))
+
+
+def create_sharded_sessionmaker(engines: Dict[str, Engine], **kwargs: Any) -> sessionmaker:
+    """sessionmaker tạo `RoutedSession` trên các engine `{shard_id: engine}`"""
+    return sessionmaker(class_=RoutedSession, router=ShardRouter(engines), **kwargs)
+
+
+def is_sharded(db: Session) -> bool:
+    return isinstance(db, RoutedSession)
+
+
+event.listen(RoutedSession, "before_flush", _before_flush)
+event.listen(RoutedSession, "after_flush", _after_flush)
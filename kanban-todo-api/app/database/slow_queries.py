@@ -0,0 +1,183 @@
+"""Slow-query log: ghi lại câu SQL chậm kèm EXPLAIN plan.
+
+Câu lệnh vượt `settings.slow_query_threshold_ms` được đưa vào hàng đợi; một
+thread nền chạy `EXPLAIN QUERY PLAN` (SQLite) hoặc `EXPLAIN` (PostgreSQL) trên
+connection riêng nên request không phải chờ. EXPLAIN chạy trên chính engine đã
+thực thi câu lệnh (replica, shard...), trừ engine trong `explain_engines` (vd:
+writer của write queue chỉ có một connection) được thay bằng engine cùng
+database. Kết quả lưu trong ring buffer có kích thước
+`settings.slow_query_log_size`.
+"""
+import logging
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("select", "update", "delete", "with")
+
+
+class SlowQueryLog:
+    def __init__(self, engine: Optional[Engine] = None, threshold_ms: float = 200.0, size: int = 100):
+        # Engine dùng khi không biết engine gốc của câu lệnh
+        self.engine = engine
+        self.explain_engines: Dict[Engine, Engine] = {}
+        self.threshold_ms = threshold_ms
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=size)
+        self._worker: Optional[threading.Thread] = None
+
+    # Query observer (xem app.database.instrumentation)
+    def observe_query(self, statement: str, parameters, context, duration: float) -> None:
+        duration_ms = duration * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        if "password" in statement.lower():
+            # Không lưu password hash vào log
+            parameters_view = "<redacted>"
+        else:
+            parameters_view = _safe_parameters(parameters)
+        engine = getattr(getattr(context, "root_connection", None), "engine", None)
+        with self._lock:
+            record = {
+                "id": self._next_id,
+                "engine": engine.url.render_as_string(hide_password=True) if engine is not None else None,
+                "statement": statement,
+                "parameters": parameters_view,
+                "duration_ms": round(duration_ms, 3),
+                "recorded_at": datetime.utcnow().isoformat(),
+                "plan": None,
+                "full_scans": [],
+            }
+            self._next_id += 1
+            self._records.append(record)
+        executemany = getattr(context, "executemany", False)
+        if not executemany and statement.lstrip()[:6].lower().startswith(_EXPLAINABLE):
+            try:
+                self._pending.put_nowait((record, parameters, engine))
+            except queue.Full:
+                # Không chặn request nếu worker EXPLAIN bị chậm
+                pass
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._pending.put(None)
+        self._worker.join(timeout=5)
+        self._worker = None
+
+    def records(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            items = list(self._records)
+        items.reverse()
+        return items[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def full_scan_summary(self) -> dict:
+        """Số câu chậm có full scan theo từng bảng"""
+        summary: dict = {}
+        with self._lock:
+            for record in self._records:
+                for table in record["full_scans"]:
+                    summary[table] = summary.get(table, 0) + 1
+        return summary
+
+    def _run(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            record, parameters, engine = item
+            engine = self.explain_engines.get(engine, engine) or self.engine
+            try:
+                if engine is None:
+                    raise RuntimeError("không có engine để EXPLAIN")
+                plan = explain(engine, record["statement"], parameters)
+            except Exception as exc:
+                logger.debug("EXPLAIN thất bại: %s", exc)
+                plan = [f"EXPLAIN failed: {exc}"]
+            with self._lock:
+                record["plan"] = plan
+                record["full_scans"] = full_scan_tables(plan)
+
+
+def explain(engine: Engine, statement: str, parameters) -> List[str]:
+    """Chạy EXPLAIN cho câu lệnh với chính tham số của nó, trả về danh sách dòng plan"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return [f"EXPLAIN không hỗ trợ dialect {dialect}"]
+
+    with engine.connect() as connection:
+        # Chạy trên raw DBAPI cursor: tránh lặp lại event instrumentation
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        connection.rollback()
+
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [str(row[-1]) for row in rows]
+    return [str(row[0]) for row in rows]
+
+
+def full_scan_tables(plan: List[str]) -> List[str]:
+    """Tên các bảng bị full scan trong plan (gợi ý thiếu index)"""
+    tables = []
+    for line in plan:
+        words = line.replace('"', "").split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] not in ("CONSTANT", "SUBQUERY"):
+            # SQLite: "SCAN tasks" (không kèm "USING INDEX")
+            if "USING" not in words:
+                tables.append(words[1])
+        elif "Seq Scan on" in line:
+            # PostgreSQL: "Seq Scan on tasks  (cost=...)"
+            tables.append(line.split("Seq Scan on", 1)[1].split()[0])
+    return sorted(set(tables))
+
+
+def _safe_parameters(parameters):
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: _safe_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_safe_parameters(p) if isinstance(p, (list, tuple, dict)) else _safe_value(p) for p in parameters]
+    return _safe_value(parameters)
+
+
+def _safe_value(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= 200 else text[:200] + "..."
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    size=settings.slow_query_log_size,
+)
@@ -0,0 +1,144 @@
+"""Một writer cho SQLite: các session ghi lần lượt trên một connection và được commit theo nhóm.
+
+Bật bằng `settings.sqlite_write_queue_enabled` (chỉ SQLite, một database).
+`SessionLocal` khi đó tạo `WriteQueueSession`:
+
+- Đọc đi qua pool như thường; database chạy WAL nên đọc không bị chặn bởi ghi.
+- Câu lệnh ghi đầu tiên (flush hoặc INSERT/UPDATE/DELETE) chờ đến lượt giữ
+  connection ghi duy nhất của `SQLiteWriteQueue`; phần còn lại của transaction
+  (kể cả đọc) chạy trên connection đó trong một SAVEPOINT. Các request ghi
+  xếp hàng trong process thay vì tranh file lock của SQLite (`database is locked`).
+- `commit()` giải phóng SAVEPOINT rồi nhường connection. Nếu không còn ai chờ
+  ghi (hoặc nhóm đã đủ `settings.sqlite_write_group_max`) session đó COMMIT
+  cả nhóm, nếu không thì chờ session ghi cuối nhóm COMMIT hộ. Khi tải thấp
+  mỗi request tự commit ngay, khi tải cao nhiều request chung một lần fsync.
+  `commit()` chỉ trả về sau khi dữ liệu đã được COMMIT; COMMIT lỗi thì mọi
+  session trong nhóm nhận lỗi.
+- `rollback()` chỉ hủy SAVEPOINT của session đó.
+
+Session ghi không được mở thêm session ghi khác trong cùng thread khi đang giữ
+connection ghi (raise RuntimeError thay vì deadlock).
+"""
+import threading
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+
+class _Ticket:
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class SQLiteWriteQueue:
+    def __init__(self, engine: Engine, group_max: int = 32):
+        self.engine = engine
+        self.group_max = max(1, group_max)
+        self._turn = threading.Lock()
+        self._state = threading.Lock()
+        self._owner: Optional[int] = None
+        self._waiting = 0
+        self._connection: Optional[Connection] = None
+        self._group: List[_Ticket] = []
+        self.commits = 0
+        self.committed_sessions = 0
+        self.largest_group = 0
+
+    def acquire(self) -> Connection:
+        """Chờ đến lượt ghi; trả về connection ghi đang trong transaction của nhóm"""
+        if self._owner == threading.get_ident():
+            raise RuntimeError("Thread đang giữ connection ghi SQLite, không mở thêm session ghi lồng nhau")
+        with self._state:
+            self._waiting += 1
+        self._turn.acquire()
+        with self._state:
+            self._waiting -= 1
+        self._owner = threading.get_ident()
+        if self._connection is None:
+            self._connection = self.engine.connect()
+        if not self._connection.in_transaction():
+            self._connection.begin()
+        return self._connection
+
+    def release(self, committed: bool) -> None:
+        """Session trả connection ghi. `committed`: SAVEPOINT đã được giải phóng
+        (chờ đến khi nhóm được COMMIT), False: đã rollback SAVEPOINT
+        """
+        ticket = None
+        if committed:
+            ticket = _Ticket()
+            self._group.append(ticket)
+        try:
+            with self._state:
+                last_in_group = self._waiting == 0
+            if self._group and (last_in_group or len(self._group) >= self.group_max):
+                self._commit_group()
+        finally:
+            self._owner = None
+            self._turn.release()
+        if ticket is not None:
+            ticket.done.wait()
+            if ticket.error is not None:
+                raise ticket.error
+
+    def _commit_group(self) -> None:
+        group, self._group = self._group, []
+        error = None
+        try:
+            self._connection.commit()
+        except Exception as exc:
+            error = exc
+            self._connection.rollback()
+        self.commits += 1
+        self.committed_sessions += len(group)
+        self.largest_group = max(self.largest_group, len(group))
+        for ticket in group:
+            ticket.error = error
+            ticket.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "committed_sessions": self.committed_sessions,
+            "largest_group": self.largest_group,
+            "waiting": self._waiting,
+        }
+
+
+class WriteQueueSession(Session):
+    """Session đọc qua pool, ghi qua `SQLiteWriteQueue` (SAVEPOINT trên connection ghi)"""
+
+    def __init__(self, write_queue: SQLiteWriteQueue, **kwargs: Any):
+        self.write_queue = write_queue
+        self._writer: Optional[Connection] = None
+        super().__init__(join_transaction_mode="create_savepoint", **kwargs)
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if self._writer is None and (self._flushing or (clause is not None and getattr(clause, "is_dml", False))):
+            self._writer = self.write_queue.acquire()
+        if self._writer is not None:
+            return self._writer
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _release_writer(self, committed: bool) -> None:
+        if self._writer is not None:
+            self._writer = None
+            self.write_queue.release(committed)
+
+
+@event.listens_for(WriteQueueSession, "after_commit")
+def _after_commit(session: WriteQueueSession) -> None:
+    session._release_writer(committed=True)
+
+
+@event.listens_for(WriteQueueSession, "after_transaction_end")
+def _after_transaction_end(session: WriteQueueSession, transaction) -> None:
+    # Rollback hoặc close khi chưa commit
+    if transaction.parent is None:
+        session._release_writer(committed=False)
+
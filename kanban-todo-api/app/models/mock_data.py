@@ -1,19 +1,49 @@
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-
-# Mock databases - dictionary lưu trữ dữ liệu trong memory
-users_db: Dict[int, dict] = {}
-boards_db: Dict[int, dict] = {}
-tasks_db: Dict[int, dict] = {}
-
-# Auto-increment IDs
-next_user_id = 1
-next_board_id = 1
-next_task_id = 1
+from typing import List, NamedTuple, Optional
+
+from app.database.memory import (
+    MemoryStore, MemoryUserRepository, MemoryBoardRepository, MemoryTaskRepository
+)
+
+# Mock database: storage engine trong memory có index (app.database.memory).
+# Các hàm bên dưới giữ API cũ (nhận/trả dict) và chuyển tiếp sang repository.
+store = MemoryStore()
+users = MemoryUserRepository(store)
+boards = MemoryBoardRepository(store)
+tasks = MemoryTaskRepository(store)
+
+_init_lock = threading.Lock()
+_initialized = False
+
+class _Repositories(NamedTuple):
+    users: MemoryUserRepository
+    boards: MemoryBoardRepository
+    tasks: MemoryTaskRepository
+
+_repositories = _Repositories(users, boards, tasks)
+
+def _as_dict(record) -> Optional[dict]:
+    return record.to_dict() if record is not None else None
+
+def _repos() -> _Repositories:
+    """Repository của mock database; dữ liệu mẫu được nạp ở lần gọi đầu tiên
+    (một lần, kể cả khi nhiều thread gọi cùng lúc) thay vì lúc import module
+    """
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                _load_sample_data()
+    return _repositories
 
 def init_sample_data():
-    """Khởi tạo dữ liệu mẫu để test"""
-    global next_user_id, next_board_id, next_task_id
+    """Khởi tạo (lại) dữ liệu mẫu để test"""
+    with _init_lock:
+        _load_sample_data()
+
+def _load_sample_data():
+    global _initialized
+    store.reset()
     
     # Tạo sample users
     sample_users = [
@@ -21,7 +51,7 @@ def init_sample_data():
             "id": 1,
             "username": "admin",
             "email": "admin@example.com",
-            "password": "admin123",  # Thực tế sẽ hash password
+            "password": "admin123",  # create_user hash password
             "full_name": "Administrator",
             "is_active": True,
             "created_at": datetime.utcnow(),
@@ -40,8 +70,7 @@ def init_sample_data():
     ]
     
     for user in sample_users:
-        users_db[user["id"]] = user
-    next_user_id = 3
+        users.create_user(None, user)
     
 # Tạo sample boards
     sample_boards = [
@@ -66,8 +95,7 @@ def init_sample_data():
     ]
     
     for board in sample_boards:
-        boards_db[board["id"]] = board
-    next_board_id = 3
+        boards.create(None, obj_in=board)
     
 # Tạo sample tasks
     sample_tasks = [
@@ -113,88 +141,54 @@ def init_sample_data():
     ]
     
     for task in sample_tasks:
-        tasks_db[task["id"]] = task
-    next_task_id = 4
+        tasks.create(None, obj_in=task)
+    _initialized = True
 
 # Helper functions cho User operations
 def get_user_by_username(username: str) -> Optional[dict]:
     """Tìm user theo username"""
-    for user in users_db.values():
-        if user["username"] == username:
-            return user
-    return None
+    return _as_dict(_repos().users.get_by_username(None, username))
 
 def get_user_by_id(user_id: int) -> Optional[dict]:
     """Tìm user theo ID"""
-    return users_db.get(user_id)
+    return _as_dict(_repos().users.get(None, user_id))
 
 def create_user(user_data: dict) -> dict:
     """Tạo user mới"""
-    global next_user_id
-    user = {
-        "id": next_user_id,
-        "is_active": True,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
-        **user_data  # Spread operator - giải nén tất cả key-value từ user_data
-    }
-    users_db[next_user_id] = user
-    next_user_id += 1
-    return user
+    return _as_dict(_repos().users.create_user(None, dict(user_data)))
 
 def update_user(user_id: int, updates: dict) -> Optional[dict]:
     """Cập nhật thông tin user"""
-    if user_id in users_db:
-        users_db[user_id].update(updates)
-        users_db[user_id]["updated_at"] = datetime.utcnow()
-        return users_db[user_id]
-    return None
+    users = _repos().users
+    user = users.get(None, user_id)
+    if user is None:
+        return None
+    return _as_dict(users.update(None, db_obj=user, obj_in=updates))
 
 # Helper functions cho Board operations  
 def get_all_boards() -> List[dict]:
     """Lấy tất cả boards"""
-    return list(boards_db.values())
+    return [board.to_dict() for board in _repos().boards.get_all(None)]
 
 def get_board_by_id(board_id: int) -> Optional[dict]:
     """Tìm board theo ID"""
-    return boards_db.get(board_id)
+    return _as_dict(_repos().boards.get(None, board_id))
 
 def create_board(board_data: dict) -> dict:
     """Tạo board mới"""
-    global next_board_id
-    board = {
-        "id": next_board_id,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
-        **board_data
-    }
-    boards_db[next_board_id] = board
-    next_board_id += 1
-    return board
+    return _as_dict(_repos().boards.create(None, obj_in=board_data))
 
 def update_board(board_id: int, updates: dict) -> Optional[dict]:
     """Cập nhật board"""
-    if board_id in boards_db:
-        boards_db[board_id].update(updates)
-        boards_db[board_id]["updated_at"] = datetime.utcnow()
-        return boards_db[board_id]
-    return None
+    boards = _repos().boards
+    board = boards.get(None, board_id)
+    if board is None:
+        return None
+    return _as_dict(boards.update(None, db_obj=board, obj_in=updates))
 
 def delete_board(board_id: int) -> bool:
     """Xóa board và tất cả tasks trong board đó"""
-    if board_id in boards_db:
-        # Xóa tất cả tasks thuộc board này
-        task_ids_to_delete = [
-            task_id for task_id, task in tasks_db.items() 
-            if task["board_id"] == board_id
-        ]
-        for task_id in task_ids_to_delete:
-            del tasks_db[task_id]
-        
-        # Xóa board
-        del boards_db[board_id]
-        return True
-    return False
+    return _repos().boards.delete(None, id=board_id) is not None
 
 # Helper functions cho Task operations
 def get_tasks_by_board(
@@ -202,97 +196,40 @@ def get_tasks_by_board(
     status: Optional[str] = None, 
     priority: Optional[str] = None
 ) -> List[dict]:
-    """Lấy tasks theo board, có thể filter theo status và priority"""
-    tasks = [task for task in tasks_db.values() if task["board_id"] == board_id]
-    
+    """Lấy tasks theo board (sắp theo position), có thể filter theo status và priority"""
+    tasks = _repos().tasks
     if status:
-        tasks = [task for task in tasks if task["status"] == status]
-    
-    if priority:
-        tasks = [task for task in tasks if task["priority"] == priority]
-    
-    # Sắp xếp theo position, sau đó theo created_at
-    tasks.sort(key=lambda x: (x["position"], x["created_at"]))
-    return tasks
+        board_tasks = tasks.get_by_status(None, board_id, status, priority=priority)
+    else:
+        board_tasks = tasks.get_by_board(None, board_id, priority=priority)
+    return [task.to_dict() for task in board_tasks]
 
 def get_task_by_id(task_id: int) -> Optional[dict]:
     """Tìm task theo ID"""
-    return tasks_db.get(task_id)
+    return _as_dict(_repos().tasks.get(None, task_id))
 
 def create_task(task_data: dict) -> dict:
-    """Tạo task mới"""
-    global next_task_id
-    
-    # Tính position tiếp theo cho status này
-    board_tasks = get_tasks_by_board(task_data["board_id"], task_data["status"])
-    next_position = len(board_tasks)
-    
-    task = {
-        "id": next_task_id,
-        "position": next_position,
-        "assigned_to": None,
-        "due_date": None,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
-        **task_data
-    }
-    tasks_db[next_task_id] = task
-    next_task_id += 1
-    return task
+    """Tạo task mới ở cuối cột của status"""
+    tasks = _repos().tasks
+    position = tasks.next_position(None, task_data["board_id"], task_data["status"])
+    return _as_dict(tasks.create(None, obj_in={"position": position, **task_data}))
 
 def update_task(task_id: int, updates: dict) -> Optional[dict]:
     """Cập nhật task"""
-    if task_id in tasks_db:
-        tasks_db[task_id].update(updates)
-        tasks_db[task_id]["updated_at"] = datetime.utcnow()
-        return tasks_db[task_id]
-    return None
+    tasks = _repos().tasks
+    task = tasks.get(None, task_id)
+    if task is None:
+        return None
+    return _as_dict(tasks.update(None, db_obj=task, obj_in=updates))
 
 def delete_task(task_id: int) -> bool:
     """Xóa task"""
-    if task_id in tasks_db:
-        del tasks_db[task_id]
-        return True
-    return False
+    return _repos().tasks.delete(None, id=task_id) is not None
 
 def move_task(task_id: int, new_status: str, new_position: Optional[int] = None) -> Optional[dict]:
     """Di chuyển task sang status mới và/hoặc position mới"""
-    if task_id not in tasks_db:
-        return None
-    
-    task = tasks_db[task_id]
-    old_status = task["status"]
-    
-    # Nếu chuyển sang status khác, tính position mới
-    if new_status != old_status:
-        if new_position is None:
-            # Chuyển xuống cuối danh sách status mới
-            same_status_tasks = get_tasks_by_board(task["board_id"], new_status)
-            new_position = len(same_status_tasks)
-    
-    updates = {"status": new_status}
-    if new_position is not None:
-        updates["position"] = new_position
-    
-    return update_task(task_id, updates)
+    return _as_dict(_repos().tasks.move_task(None, task_id, new_status, new_position))
 
 def search_tasks(query: str, board_id: Optional[int] = None) -> List[dict]:
-    """Tìm kiếm tasks theo từ khóa"""
-    all_tasks = list(tasks_db.values())
-    
-    if board_id:
-        all_tasks = [task for task in all_tasks if task["board_id"] == board_id]
-    
-    # Tìm trong title và description
-    search_query = query.lower()
-    matching_tasks = []
-    
-    for task in all_tasks:
-        if (search_query in task["title"].lower() or 
-            (task["description"] and search_query in task["description"].lower())):
-            matching_tasks.append(task)
-    
-    return matching_tasks
-
-# Khởi tạo dữ liệu mẫu khi import module
-init_sample_data()
+    """Tìm kiếm tasks theo từ khóa trong title và description"""
+    return [task.to_dict() for task in _repos().tasks.search_tasks(None, query, board_id)]
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_admin_user
+from app.core.jobs import PRIORITY_HIGH, job_runner
+from app.core.maintenance import RECONCILE_JOB
+from app.database import get_db
+from app.core.profiling import profile_store
+from app.database.models import User
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/profiling/routes")
+def get_worst_routes(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("avg_queries", pattern="^(avg_queries|max_queries|avg_db_ms|n_plus_one_requests|requests)$"),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Các route tệ nhất theo số query / thời gian DB từ các request đã được profile (Admin only)"""
+    return {"routes": profile_store.worst_routes(limit=limit, sort=sort)}
+
+@router.delete("/profiling/routes")
+def reset_profiling_stats(admin_user: User = Depends(get_current_admin_user)):
+    """Xóa thống kê profiling (Admin only)"""
+    profile_store.reset()
+    return {"message": "Đã xóa thống kê profiling"}
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Các câu SQL chậm gần nhất kèm EXPLAIN plan (Admin only)"""
+    from app.database.slow_queries import slow_query_log
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "full_scans_by_table": slow_query_log.full_scan_summary(),
+        "queries": slow_query_log.records(limit=limit)
+    }
+
+@router.delete("/slow-queries")
+def clear_slow_queries(admin_user: User = Depends(get_current_admin_user)):
+    """Xóa slow-query log (Admin only)"""
+    from app.database.slow_queries import slow_query_log
+    slow_query_log.clear()
+    return {"message": "Đã xóa slow-query log"}
+
+@router.post("/board-stats/reconcile", status_code=status.HTTP_202_ACCEPTED)
+def reconcile_board_stats(
+    admin_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Tính lại board_stats bằng job nền (Admin only)"""
+    job = job_runner.enqueue(db, RECONCILE_JOB, priority=PRIORITY_HIGH, created_by=admin_user.id, dedupe=True)
+    return {"job_id": job.id, "status_url": f"/jobs/{job.id}"}
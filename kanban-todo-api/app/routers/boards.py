@@ -1,12 +1,29 @@
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from app.schemas.board import BoardCreate, BoardResponse, BoardUpdate, BoardWithTasks
-from app.schemas.task import TaskResponse
-from app.database import get_db, board_repository, task_repository
-from app.database.models import User
-from app.core.deps import get_current_user, optional_current_user
+from app.schemas.board import (
+    BoardCreate, BoardResponse, BoardUpdate, BoardWithTasks, BoardWithColumns, BoardStatsResponse,
+    BoardAnalyticsResponse
+)
+from app.schemas.activity import ActivityPage
+from app.schemas.task import TaskColumnOrder, TaskColumnPage, parse_task_fields
+from app.schemas.pagination import decode_cursor, encode_cursor
+from app.schemas.serializers import (
+    AttributeOverlay, activity_page_adapter, analytics_adapter, etag_headers, board_adapter, board_list_adapter, board_with_columns_adapter,
+    board_with_tasks_adapter, column_etag_headers, column_page_adapter, json_response, partial_board_with_columns_adapter,
+    partial_board_with_tasks_adapter, partial_column_page_adapter
+)
+from app.database import (
+    get_db, SessionLocal, activity_log_repository, board_repository, board_stats_repository, task_repository,
+    ConcurrentUpdateError
+)
+from app.database.models import Board, PriorityEnum, StatusEnum, User
+from app.core.config import settings
+from app.core.single_flight import coalesced_response, viewer_class
+from app.core.maintenance import enqueue_board_purge
+from app.core.deps import get_current_user, get_if_match_version, optional_current_user
 
 router = APIRouter(prefix="/boards", tags=["boards"])
 
@@ -26,15 +43,13 @@ def get_boards(
     # Pagination
     paginated_boards = boards[skip:skip+limit]
     
-    # Thêm tasks_count
-    response_boards = []
-    for board in paginated_boards:
-        board_tasks = task_repository.get_by_board(db, board.id)
-        board_response = BoardResponse.from_orm(board)
-        board_response.tasks_count = len(board_tasks)
-        response_boards.append(board_response)
+    # Thêm tasks_count (đọc từ board_stats, một query cho cả trang)
+    counts = board_stats_repository.get_task_counts(db, [board.id for board in paginated_boards])
+    response_boards = [
+        AttributeOverlay(board, tasks_count=counts[board.id]) for board in paginated_boards
+    ]
     
-    return response_boards
+    return json_response(board_list_adapter, response_boards)
 
 @router.get("/public", response_model=List[BoardResponse])
 def get_public_boards(
@@ -44,19 +59,20 @@ def get_public_boards(
     db: Session = Depends(get_db)
 ):
     """Lấy danh sách public boards (không cần authentication)"""
-    public_boards = board_repository.get_public_boards(db)
-    
-    # Pagination
-    paginated_boards = public_boards[skip:skip+limit]
-    
-    response_boards = []
-    for board in paginated_boards:
-        board_tasks = task_repository.get_by_board(db, board.id)
-        board_response = BoardResponse.from_orm(board)
-        board_response.tasks_count = len(board_tasks)
-        response_boards.append(board_response)
-    
-    return response_boards
+    def build():
+        public_boards = board_repository.get_public_boards(db)
+
+        # Pagination
+        paginated_boards = public_boards[skip:skip+limit]
+
+        counts = board_stats_repository.get_task_counts(db, [board.id for board in paginated_boards])
+        response_boards = [
+            AttributeOverlay(board, tasks_count=counts[board.id]) for board in paginated_boards
+        ]
+        return json_response(board_list_adapter, response_boards)
+
+    # Danh sách giống nhau với mọi người xem -> không cần lớp người xem trong key
+    return coalesced_response("/boards/public", (skip, limit), build)
 
 @router.post("/", response_model=BoardResponse, status_code=status.HTTP_201_CREATED)
 def create_board(
@@ -68,18 +84,13 @@ def create_board(
     board_dict = board_data.dict()
     board_dict["owner_id"] = current_user.id
     
-    board = board_repository.create(db, obj_in=board_dict)
-    board_response = BoardResponse.from_orm(board)
-    board_response.tasks_count = 0
-    return board_response
+    board = board_repository.create(db, obj_in=board_dict, actor_id=current_user.id)
+    return json_response(
+        board_adapter, AttributeOverlay(board, tasks_count=0), status_code=status.HTTP_201_CREATED
+    )
 
-@router.get("/{board_id}", response_model=BoardWithTasks)
-def get_board_detail(
-    board_id: int,
-    current_user: Optional[User] = Depends(optional_current_user),
-    db: Session = Depends(get_db)
-):
-    """Lấy chi tiết board kèm tasks"""
+def get_readable_board(db: Session, board_id: int, current_user: Optional[User]) -> Board:
+    """Lấy board và kiểm tra quyền xem (public, owner hoặc admin)"""
     board = board_repository.get(db, board_id)
     if not board:
         raise HTTPException(
@@ -101,22 +112,243 @@ def get_board_detail(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Không có quyền truy cập board này"
         )
-    
-    tasks = task_repository.get_by_board(db, board_id)
-    task_responses = [TaskResponse.from_orm(task) for task in tasks]
-    
-    board_response = BoardWithTasks.from_orm(board)
-    board_response.tasks = task_responses
-    return board_response
+    return board
+
+def parse_fields_param(fields: Optional[str]):
+    try:
+        return parse_task_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Field không hợp lệ: {exc}"
+        )
+
+def build_column_page(
+    db: Session,
+    board_id: int,
+    column_status: StatusEnum,
+    count: int,
+    limit: int,
+    after=None,
+    fields=None
+) -> dict:
+    """Trang task đầu tiên (hoặc sau cursor) của một cột kèm count và next_cursor"""
+    tasks = task_repository.get_column_page(
+        db, board_id, column_status, limit=limit, after=after, fields=fields
+    )
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        next_cursor = encode_cursor(last.position, last.id)
+    return {"status": column_status, "count": count, "tasks": tasks, "next_cursor": next_cursor}
+
+@router.get("/{board_id}", response_model=Union[BoardWithTasks, BoardWithColumns])
+def get_board_detail(
+    board_id: int,
+    fields: Optional[str] = Query(None, description="Field của task cần trả về, vd: id,title,status hoặc card"),
+    per_column: Optional[int] = Query(
+        None, ge=1, le=500,
+        description="Chỉ trả về N task đầu mỗi cột kèm count + cursor (board rất lớn)"
+    ),
+    current_user: Optional[User] = Depends(optional_current_user),
+    db: Session = Depends(get_db)
+):
+    """Lấy chi tiết board kèm tasks"""
+    selected_fields = parse_fields_param(fields)
+
+    def build():
+        board = get_readable_board(db, board_id, current_user)
+
+        if per_column is not None:
+            # Chế độ phân trang theo cột: O(columns x N) thay vì O(tasks)
+            counts = task_repository.count_by_status(db, board_id)
+            columns = [
+                build_column_page(db, board_id, column_status, counts[column_status], per_column, fields=selected_fields)
+                for column_status in StatusEnum
+            ]
+            adapter = (
+                partial_board_with_columns_adapter(selected_fields) if selected_fields
+                else board_with_columns_adapter
+            )
+            return json_response(
+                adapter, AttributeOverlay(board, columns=columns, tasks_count=sum(counts.values())),
+                headers=etag_headers(board)
+            )
+
+        tasks = task_repository.get_by_board(db, board_id, fields=selected_fields)
+        adapter = (
+            partial_board_with_tasks_adapter(selected_fields) if selected_fields
+            else board_with_tasks_adapter
+        )
+        return json_response(
+            adapter, AttributeOverlay(board, tasks=tasks, tasks_count=len(tasks)), headers=etag_headers(board)
+        )
+
+    # Board public được nhiều client mở cùng lúc: request giống nhau dùng chung một lần đọc
+    return coalesced_response(
+        "/boards/{board_id}", (board_id, fields, per_column, viewer_class(current_user)), build
+    )
+
+@router.get("/{board_id}/columns/{column_status}", response_model=TaskColumnPage)
+def get_board_column(
+    board_id: int,
+    column_status: StatusEnum,
+    after: Optional[str] = Query(None, description="Cursor next_cursor của trang trước"),
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Field của task cần trả về"),
+    current_user: Optional[User] = Depends(optional_current_user),
+    db: Session = Depends(get_db)
+):
+    """Load thêm task của một cột (keyset pagination theo position, id)"""
+    selected_fields = parse_fields_param(fields)
+    after_key = None
+    if after:
+        try:
+            after_key = decode_cursor(after, 2)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+
+    get_readable_board(db, board_id, current_user)
+    count, version_sum = task_repository.column_state(db, board_id, column_status)
+    page = build_column_page(
+        db, board_id, column_status, count, limit, after=after_key, fields=selected_fields
+    )
+    adapter = partial_column_page_adapter(selected_fields) if selected_fields else column_page_adapter
+    return json_response(adapter, page, headers=column_etag_headers(count, version_sum))
+
+@router.put("/{board_id}/columns/{column_status}/order")
+def reorder_board_column(
+    board_id: int,
+    column_status: StatusEnum,
+    column_order: TaskColumnOrder,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Sắp xếp lại toàn bộ cột theo danh sách task id (chỉ owner hoặc admin)"""
+    board = board_repository.get(db, board_id)
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board không tồn tại"
+        )
+
+    if board.owner_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Không có quyền chỉnh sửa board này"
+        )
+
+    try:
+        task_repository.reorder_column(
+            db, board_id, column_status, column_order.task_ids, actor_id=current_user.id
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    return {
+        "message": f"Đã sắp xếp lại {len(column_order.task_ids)} task",
+        "status": column_status,
+        "task_ids": column_order.task_ids
+    }
+
+@router.get("/{board_id}/stats", response_model=BoardStatsResponse)
+def get_board_stats(
+    board_id: int,
+    current_user: Optional[User] = Depends(optional_current_user),
+    db: Session = Depends(get_db)
+):
+    """Thống kê tasks của board (theo status, priority, assignee, quá hạn)"""
+    get_readable_board(db, board_id, current_user)
+    stats = board_stats_repository.get(db, board_id)
+    if stats is None:
+        # Board cũ chưa có stats: tính lại một lần trên primary (session đọc có thể là replica)
+        with SessionLocal() as primary:
+            stats = board_stats_repository.reconcile_board(primary, board_id)
+            primary.commit()
+            assignee_counts = board_stats_repository.get_assignee_counts(primary, board_id)
+    else:
+        assignee_counts = board_stats_repository.get_assignee_counts(db, board_id)
+
+    by_assignee = {str(user_id): count for user_id, count in assignee_counts.items()}
+    by_assignee["unassigned"] = stats.unassigned_count
+    return BoardStatsResponse(
+        board_id=board_id,
+        total=stats.total_count,
+        by_status={
+            StatusEnum.todo.value: stats.todo_count,
+            StatusEnum.in_progress.value: stats.in_progress_count,
+            StatusEnum.done.value: stats.done_count,
+        },
+        by_priority={
+            PriorityEnum.low.value: stats.low_count,
+            PriorityEnum.medium.value: stats.medium_count,
+            PriorityEnum.high.value: stats.high_count,
+        },
+        by_assignee=by_assignee,
+        overdue=stats.overdue_count,
+        reconciled_at=stats.reconciled_at,
+    )
+
+@router.get("/{board_id}/analytics", response_model=BoardAnalyticsResponse)
+def get_board_analytics(
+    board_id: int,
+    days: int = Query(90, ge=1, description="Số ngày gần nhất cần phân tích"),
+    current_user: Optional[User] = Depends(optional_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cumulative flow, throughput theo tuần và cycle time của board"""
+    if days > settings.analytics_max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"days không được quá {settings.analytics_max_days}"
+        )
+    get_readable_board(db, board_id, current_user)
+    # Import khi cần: NumPy chiếm phần lớn thời gian import của app
+    from app.core import analytics
+
+    report, cached = analytics.get_board_analytics(db, board_id, days)
+    return json_response(analytics_adapter, {**report, "cached": cached})
+
+@router.get("/{board_id}/activity", response_model=ActivityPage)
+def get_board_activity(
+    board_id: int,
+    after: Optional[str] = Query(None, description="Cursor next_cursor của trang trước"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Optional[User] = Depends(optional_current_user),
+    db: Session = Depends(get_db)
+):
+    """Lịch sử hoạt động của board (mới nhất trước, keyset pagination theo id)"""
+    before_id = None
+    if after:
+        try:
+            (before_id,) = decode_cursor(after, 1)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+
+    get_readable_board(db, board_id, current_user)
+    rows = activity_log_repository.get_board_page(db, board_id, limit=limit, before=before_id)
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].id) if len(rows) > limit else None
+    return json_response(activity_page_adapter, {"items": items, "next_cursor": next_cursor})
 
 @router.put("/{board_id}", response_model=BoardResponse)
 def update_board(
     board_id: int,
     board_update: BoardUpdate,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Cập nhật board (chỉ owner hoặc admin)"""
+    """Cập nhật board (chỉ owner hoặc admin, gửi If-Match để tránh ghi đè)"""
     board = board_repository.get(db, board_id)
     if not board:
         raise HTTPException(
@@ -131,16 +363,20 @@ def update_board(
             detail="Không có quyền chỉnh sửa board này"
         )
     
-    updated_board = board_repository.update(db, db_obj=board, obj_in=board_update)
+    updated_board = board_repository.update(
+        db, db_obj=board, obj_in=board_update, actor_id=current_user.id, expected_version=expected_version
+    )
     
-    tasks = task_repository.get_by_board(db, board_id)
-    board_response = BoardResponse.from_orm(updated_board)
-    board_response.tasks_count = len(tasks)
-    return board_response
+    tasks_count = board_stats_repository.get_task_counts(db, [board_id])[board_id]
+    return json_response(
+        board_adapter, AttributeOverlay(updated_board, tasks_count=tasks_count),
+        headers=etag_headers(updated_board)
+    )
 
 @router.delete("/{board_id}")
 def delete_board(
     board_id: int,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -159,10 +395,28 @@ def delete_board(
             detail="Không có quyền xóa board này"
         )
     
-    tasks = task_repository.get_by_board(db, board_id)
-    deleted_tasks_count = len(tasks)
-    
-    board_repository.delete(db, id=board_id)
+    if expected_version is not None and board.version != expected_version:
+        raise ConcurrentUpdateError("Board", board_id, expected_version)
+
+    # Một câu COUNT trên tasks thay vì load toàn bộ task (không dựa vào board_stats có thể lệch)
+    deleted_tasks_count = task_repository.count_by_board(db, board_id)
+
+    if deleted_tasks_count > settings.board_soft_delete_threshold:
+        # Board rất lớn: ẩn ngay, task được purge theo chunk bằng job nền
+        board_repository.soft_delete(db, board, actor_id=current_user.id)
+        job = enqueue_board_purge(db, board_id, deleted_tasks_count, created_by=current_user.id)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/jobs/{job.id}"},
+            content={
+                "message": f"Board '{board.name}' đã được xóa, dữ liệu đang được dọn ở nền",
+                "deleted_tasks_count": deleted_tasks_count,
+                "job_id": job.id
+            }
+        )
+
+    # ON DELETE CASCADE ở DB xóa tasks/stats/transitions trong cùng câu DELETE
+    board_repository.delete(db, id=board_id, actor_id=current_user.id, expected_version=expected_version)
     
     return {
         "message": f"Đã xóa board '{board.name}'",
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from sqlalchemy.orm import Session
+
+from app.schemas.job import JobResponse
+from app.schemas.serializers import job_adapter, json_response
+from app.database import get_primary_db, job_repository
+from app.database.models import User
+from app.core.deps import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_primary_db)  # job được worker nền cập nhật liên tục
+):
+    """Trạng thái và tiến độ của job nền (người tạo job hoặc admin)"""
+    job = job_repository.get(db, job_id)
+    if not job or (job.created_by != current_user.id and current_user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job không tồn tại"
+        )
+    return json_response(job_adapter, job)
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi.responses import JSONResponse
 from starlette import status as starlette_status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskMove, TaskAssign
+from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskMove, TaskAssign, parse_task_fields
+from app.schemas.serializers import (
+    etag_headers, json_response, partial_task_list_adapter, task_adapter, task_list_adapter
+)
 from app.database import get_db, task_repository, board_repository, user_repository
-from app.database.models import StatusEnum, User
-from app.core.deps import get_current_user
+from app.database.models import PriorityEnum, StatusEnum, User
+from app.core.config import settings
+from app.core.deps import get_current_user, get_if_match_version
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -41,10 +46,19 @@ def get_tasks(
     status: Optional[str] = Query(None, description="Filter theo status"),
     priority: Optional[str] = Query(None, description="Filter theo priority"),
     assigned_to: Optional[int] = Query(None, description="Filter theo assigned user"),
+    fields: Optional[str] = Query(None, description="Chỉ trả về các field này, vd: id,title,status hoặc card"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Lấy tasks với filters"""
+    try:
+        selected_fields = parse_task_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=starlette_status.HTTP_400_BAD_REQUEST,
+            detail=f"Field không hợp lệ: {exc}"
+        )
+
     # Kiểm tra board tồn tại
     board = board_repository.get(db, board_id)
     if not board:
@@ -60,27 +74,31 @@ def get_tasks(
             detail="Không có quyền truy cập board này"
         )
     
-    # Get tasks với filters
+    adapter = partial_task_list_adapter(selected_fields) if selected_fields else task_list_adapter
+
+    # Priority không hợp lệ -> không task nào khớp
+    priority_enum = None
+    if priority:
+        try:
+            priority_enum = PriorityEnum(priority)
+        except ValueError:
+            return json_response(adapter, [])
+
+    # Get tasks với filters (filter chạy trong SQL)
+    filters = {"priority": priority_enum, "assigned_to": assigned_to, "fields": selected_fields}
     if status:
         try:
             status_enum = StatusEnum(status)
-            tasks = task_repository.get_by_status(db, board_id, status_enum)
         except ValueError:
             raise HTTPException(
                 status_code=starlette_status.HTTP_400_BAD_REQUEST,
                 detail=f"Status không hợp lệ: {status}"
             )
+        tasks = task_repository.get_by_status(db, board_id, status_enum, **filters)
     else:
-        tasks = task_repository.get_by_board(db, board_id)
-    
-    # Apply additional filters
-    if priority:
-        tasks = [task for task in tasks if task.priority.value == priority]
-    
-    if assigned_to is not None:
-        tasks = [task for task in tasks if task.assigned_to == assigned_to]
+        tasks = task_repository.get_by_board(db, board_id, **filters)
     
-    return [TaskResponse.from_orm(task) for task in tasks]
+    return json_response(adapter, tasks)
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(
@@ -96,13 +114,12 @@ def create_task(
             detail="Không có quyền tạo task trong board này"
         )
     
-    # Tính position cho task mới
-    existing_tasks = task_repository.get_by_status(db, task_data.board_id, task_data.status)
+    # Task mới nằm cuối cột (COUNT, không load cả cột)
     task_dict = task_data.dict()
-    task_dict["position"] = len(existing_tasks)
+    task_dict["position"] = task_repository.next_position(db, task_data.board_id, task_data.status)
     
-    task = task_repository.create(db, obj_in=task_dict)
-    return TaskResponse.from_orm(task)
+    task = task_repository.create(db, obj_in=task_dict, actor_id=current_user.id)
+    return json_response(task_adapter, task, status_code=status.HTTP_201_CREATED)
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
@@ -125,16 +142,17 @@ def get_task(
             detail="Không có quyền truy cập task này"
         )
     
-    return TaskResponse.from_orm(task)
+    return json_response(task_adapter, task, headers=etag_headers(task))
 
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: int,
     task_update: TaskUpdate,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Cập nhật task"""
+    """Cập nhật task (gửi If-Match để tránh ghi đè thay đổi của người khác)"""
     task = task_repository.get(db, task_id)
     if not task:
         raise HTTPException(
@@ -149,13 +167,27 @@ def update_task(
             detail="Không có quyền chỉnh sửa task này"
         )
     
-    updated_task = task_repository.update(db, db_obj=task, obj_in=task_update)
-    return TaskResponse.from_orm(updated_task)
+    updated_task = task_repository.update(
+        db, db_obj=task, obj_in=task_update, actor_id=current_user.id, expected_version=expected_version
+    )
+    return json_response(task_adapter, updated_task, headers=etag_headers(updated_task))
+
+def running_move_coalescer():
+    """Bộ gộp move nếu đang chạy; chế độ off (mặc định) thì không import module"""
+    if settings.move_coalescing_mode == "off":
+        return None
+    from app.core.move_coalescer import move_coalescer
+    return move_coalescer if move_coalescer.running else None
 
-@router.patch("/{task_id}/move", response_model=TaskResponse)
+@router.patch(
+    "/{task_id}/move",
+    response_model=TaskResponse,
+    responses={202: {"description": "move_coalescing_mode=deferred: move đã nhận nhưng chưa ghi"}}
+)
 def move_task(
     task_id: int,
     task_move: TaskMove,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -174,13 +206,52 @@ def move_task(
             detail="Không có quyền di chuyển task này"
         )
     
-    moved_task = task_repository.move_task(db, task_id, task_move.status, task_move.position)
-    return TaskResponse.from_orm(moved_task)
+    move_coalescer = running_move_coalescer() if expected_version is None else None
+    if move_coalescer is not None:
+        # Gộp các move liên tiếp của task thành một lần ghi (move có If-Match ghi ngay)
+        pending = move_coalescer.submit(
+            db, task, task_move.status, task_move.position, actor_id=current_user.id
+        )
+        if move_coalescer.mode == "deferred":
+            # Chưa ghi: không có version/ETag mới, client GET lại task (Location) sau cửa sổ gộp
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"Location": f"/tasks/{task.id}"},
+                content={
+                    "id": task.id,
+                    "board_id": task.board_id,
+                    "status": pending.status.value,
+                    "position": pending.position
+                }
+            )
+        try:
+            # Lỗi đã có mã HTTP (vd: ConcurrentUpdateError -> 412) đi thẳng tới exception handler
+            move_coalescer.wait(pending)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Move chưa được ghi, vui lòng thử lại sau",
+                headers={"Retry-After": "1"}
+            )
+        task = None if pending.missing else task_repository.refresh(db, task)
+        if task is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task không tồn tại"
+            )
+        return json_response(task_adapter, task, headers=etag_headers(task))
+
+    moved_task = task_repository.move_task(
+        db, task_id, task_move.status, task_move.position,
+        actor_id=current_user.id, expected_version=expected_version
+    )
+    return json_response(task_adapter, moved_task, headers=etag_headers(moved_task))
 
 @router.patch("/{task_id}/assign", response_model=TaskResponse)
 def assign_task(
     task_id: int,
     task_assign: TaskAssign,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -217,13 +288,16 @@ def assign_task(
     updated_task = task_repository.update(
         db, 
         db_obj=task, 
-        obj_in={"assigned_to": task_assign.assigned_to}
+        obj_in={"assigned_to": task_assign.assigned_to},
+        actor_id=current_user.id,
+        expected_version=expected_version
     )
-    return TaskResponse.from_orm(updated_task)
+    return json_response(task_adapter, updated_task, headers=etag_headers(updated_task))
 
 @router.delete("/{task_id}")
 def delete_task(
     task_id: int,
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -242,7 +316,7 @@ def delete_task(
             detail="Không có quyền xóa task này"
         )
     
-    task_repository.delete(db, id=task_id)
+    task_repository.delete(db, id=task_id, actor_id=current_user.id, expected_version=expected_version)
     return {
         "message": f"Đã xóa task '{task.title}'",
         "deleted_task_id": task_id
@@ -258,5 +332,5 @@ def get_my_assigned_tasks(
         tasks = task_repository.get_multi(db)  # Admin xem tất cả tasks
     else:
         tasks = task_repository.get_by_assigned_user(db, current_user.id)
-    return [TaskResponse.from_orm(task) for task in tasks]
+    return json_response(task_list_adapter, tasks)
 
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class ActivityResponse(BaseModel):
+    id: int
+    board_id: int
+    task_id: Optional[int] = None
+    actor_id: Optional[int] = None
+    action: str
+    changes: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ActivityPage(BaseModel):
+    """Một trang activity (mới nhất trước), `next_cursor` là None ở trang cuối"""
+    items: List[ActivityResponse] = []
+    next_cursor: Optional[str] = None
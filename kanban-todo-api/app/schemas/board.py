@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Optional, List, Dict
 
 class BoardBase(BaseModel):
     name: str
@@ -32,6 +32,7 @@ class BoardUpdate(BaseModel):
 class BoardResponse(BoardBase):
     id: int
     owner_id: int
+    version: int = 1
     created_at: datetime
     updated_at: datetime
     tasks_count: Optional[int] = 0
@@ -42,12 +43,56 @@ class BoardResponse(BoardBase):
 class BoardWithTasks(BoardResponse):
     tasks: List['TaskResponse'] = []
 
+class BoardWithColumns(BoardResponse):
+    """Board detail phân trang theo cột: N task đầu mỗi status + count + cursor"""
+    columns: List['TaskColumnPage'] = []
+
+class BoardStatsResponse(BaseModel):
+    board_id: int
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_assignee: Dict[str, int]  # key: user id, "unassigned" cho task chưa gán
+    overdue: int
+    reconciled_at: Optional[datetime] = None
+
+class DurationSummary(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p85: Optional[float] = None
+    p95: Optional[float] = None
+
+class CumulativeFlow(BaseModel):
+    dates: List[date]
+    todo: List[int]
+    in_progress: List[int]
+    done: List[int]
+
+class Throughput(BaseModel):
+    week_starts: List[date]
+    done: List[int]
+
+class BoardAnalyticsResponse(BaseModel):
+    board_id: int
+    window_start: datetime
+    window_end: datetime
+    days: int
+    cumulative_flow: CumulativeFlow
+    throughput: Throughput
+    cycle_time_days: DurationSummary
+    lead_time_days: DurationSummary
+    transitions_count: int
+    generated_at: datetime
+    cached: bool = False
+
 # Try to resolve forward references (TaskResponse is defined in app.schemas.task)
 try:
     # Importing here avoids circular import at module import time
-    from app.schemas.task import TaskResponse  # noqa: F401
+    from app.schemas.task import TaskResponse, TaskColumnPage  # noqa: F401
     # Rebuild model to let Pydantic resolve the forward ref
     BoardWithTasks.model_rebuild()
+    BoardWithColumns.model_rebuild()
 except Exception:
     # If rebuild fails during import time, FastAPI/Pydantic will attempt resolution later.
     pass
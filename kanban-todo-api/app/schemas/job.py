@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.database.models import JobStatusEnum
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: JobStatusEnum
+    priority: int
+    progress: float = 0.0
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,26 @@
+"""Cursor cho phân trang keyset.
+
+Cursor là chuỗi base64 (url-safe) của các giá trị khoá sắp xếp, vd
+`(position, id)` của task cuối cùng trong trang trước. Client coi cursor là
+opaque và chỉ gửi lại qua `?after=`.
+"""
+import base64
+from typing import Tuple
+
+
+def encode_cursor(*values: int) -> str:
+    raw = ":".join(str(value) for value in values).encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[int, ...]:
+    """Giải mã cursor gồm `size` số nguyên, raise ValueError nếu cursor hỏng"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        values = tuple(int(part) for part in raw.split(":"))
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("Cursor không hợp lệ") from exc
+    if len(values) != size:
+        raise ValueError("Cursor không hợp lệ")
+    return values
@@ -0,0 +1,127 @@
+"""Serialize response một lượt: ORM -> Pydantic (validate 1 lần) -> JSON bytes.
+
+Router trả về `Response` đã chứa bytes nên FastAPI bỏ qua bước validate lại
+`response_model` và `jsonable_encoder`. `response_model=` vẫn được giữ trên
+route để sinh OpenAPI docs.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Response
+from pydantic import ConfigDict, TypeAdapter, create_model
+
+from .activity import ActivityPage
+from .job import JobResponse
+from .board import BoardAnalyticsResponse, BoardResponse, BoardWithColumns, BoardWithTasks
+from .task import TaskColumnPage, TaskResponse
+
+# TypeAdapter build schema khá tốn kém -> tạo một lần lúc import
+task_adapter = TypeAdapter(TaskResponse)
+task_list_adapter = TypeAdapter(List[TaskResponse])
+board_adapter = TypeAdapter(BoardResponse)
+board_list_adapter = TypeAdapter(List[BoardResponse])
+board_with_tasks_adapter = TypeAdapter(BoardWithTasks)
+column_page_adapter = TypeAdapter(TaskColumnPage)
+board_with_columns_adapter = TypeAdapter(BoardWithColumns)
+analytics_adapter = TypeAdapter(BoardAnalyticsResponse)
+activity_page_adapter = TypeAdapter(ActivityPage)
+job_adapter = TypeAdapter(JobResponse)
+
+
+@lru_cache(maxsize=64)
+def partial_task_model(fields: Tuple[str, ...]):
+    """Model TaskResponse chỉ gồm các field được chọn (cache theo tuple fields)"""
+    definitions = {
+        name: (TaskResponse.model_fields[name].annotation, TaskResponse.model_fields[name])
+        for name in fields
+    }
+    return create_model(
+        "TaskFields_" + "_".join(fields),
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=64)
+def partial_task_list_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[partial_task_model(fields)])
+
+
+@lru_cache(maxsize=64)
+def partial_board_with_tasks_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    model = create_model(
+        "BoardWithTaskFields_" + "_".join(fields),
+        __base__=BoardResponse,
+        tasks=(List[partial_task_model(fields)], []),
+    )
+    return TypeAdapter(model)
+
+
+@lru_cache(maxsize=64)
+def _partial_column_page_model(fields: Tuple[str, ...]):
+    return create_model(
+        "TaskColumnPageFields_" + "_".join(fields),
+        __base__=TaskColumnPage,
+        tasks=(List[partial_task_model(fields)], []),
+    )
+
+
+@lru_cache(maxsize=64)
+def partial_column_page_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(_partial_column_page_model(fields))
+
+
+@lru_cache(maxsize=64)
+def partial_board_with_columns_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    model = create_model(
+        "BoardWithColumnFields_" + "_".join(fields),
+        __base__=BoardResponse,
+        columns=(List[_partial_column_page_model(fields)], []),
+    )
+    return TypeAdapter(model)
+
+
+class AttributeOverlay:
+    """Bọc ORM object và ghi đè vài attribute (vd: `tasks_count`, `tasks`)
+
+    Dùng để validate `from_attributes` mà không phải sửa ORM object hay copy
+    sang dict.
+    """
+
+    __slots__ = ("_obj", "_overrides")
+
+    def __init__(self, obj: Any, **overrides: Any):
+        self._obj = obj
+        self._overrides = overrides
+
+    def __getattr__(self, name: str) -> Any:
+        overrides = object.__getattribute__(self, "_overrides")
+        if name in overrides:
+            return overrides[name]
+        return getattr(object.__getattribute__(self, "_obj"), name)
+
+
+def dump_json(adapter: TypeAdapter, obj: Any) -> bytes:
+    """Validate từ ORM object (from_attributes) và serialize thẳng ra JSON bytes"""
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def json_response(
+    adapter: TypeAdapter, obj: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    return Response(
+        content=dump_json(adapter, obj),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def etag_headers(obj: Any) -> Dict[str, str]:
+    """Header ETag theo version của bản ghi (dùng lại qua If-Match)"""
+    return {"ETag": f'"{obj.version}"'}
+
+
+def column_etag_headers(count: int, version_sum: int) -> Dict[str, str]:
+    """Header ETag của một cột: số task và tổng version (xem TaskRepository.column_state)"""
+    return {"ETag": f'"{count}-{version_sum}"'}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 from enum import Enum
 
 class StatusEnum(str, Enum):
@@ -45,6 +45,16 @@ class TaskMove(BaseModel):
     status: StatusEnum
     position: Optional[int] = None
 
+class TaskColumnOrder(BaseModel):
+    """Thứ tự mới của toàn bộ task trong một cột (task đầu tiên có position 0)"""
+    task_ids: List[int]
+
+    @validator('task_ids')
+    def task_ids_must_be_unique(cls, v):
+        if len(set(v)) != len(v):
+            raise ValueError('task_ids bị trùng')
+        return v
+
 class TaskAssign(BaseModel):
     assigned_to: Optional[int] = None
 
@@ -54,9 +64,39 @@ class TaskResponse(TaskBase):
     position: int
     assigned_to: Optional[int] = None
     due_date: Optional[datetime] = None
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True  # Pydantic V2
 
+
+class TaskColumnPage(BaseModel):
+    """Một trang task trong một cột (status) của board, phân trang keyset"""
+    status: StatusEnum
+    count: int
+    tasks: List[TaskResponse] = []
+    next_cursor: Optional[str] = None
+
+# Sparse fieldsets (?fields=...)
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+# Các field đủ để render một card trên kanban (`?fields=card`)
+TASK_CARD_FIELDS = ("id", "title", "status", "priority", "position", "assigned_to", "version")
+
+def parse_task_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse `?fields=id,title,...` thành tuple field theo thứ tự của TaskResponse
+
+    Trả về None nếu không giới hạn field. Raise ValueError nếu có field lạ.
+    """
+    if value is None or not value.strip():
+        return None
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    if "card" in requested:
+        requested.discard("card")
+        requested.update(TASK_CARD_FIELDS)
+    unknown = requested - set(TASK_FIELDS)
+    if unknown:
+        raise ValueError(", ".join(sorted(unknown)))
+    requested.add("id")
+    return tuple(field for field in TASK_FIELDS if field in requested)
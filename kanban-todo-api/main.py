@@ -1,23 +1,114 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from sqlalchemy import text
 
-from app.routers import auth, users, boards, tasks  # Thêm auth router
-from app.database import create_tables
+from app.routers import auth, users, boards, tasks, admin, jobs  # Thêm auth router
+from app.database import (
+    create_tables, engine, replica_engines, replica_router, shard_engines, sqlite_write_queue, instrumentation, activity_log,
+    ConcurrentUpdateError
+)
+from app.database.migrations import check_schema_revision
+from app.database.routing import StickyCookieMiddleware
+from app.core import metrics, profiling
 from app.core.config import settings
 
-# Tạo tables khi khởi động (development only)
-create_tables()
+# Subsystem tùy chọn (rate limit, admission, slow-query log, gộp move) chỉ được
+# import khi bật trong settings; job runner/bảo trì import lúc startup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema: tạo tables khi phát triển, còn lại chỉ kiểm tra đã `alembic upgrade head`
+    if settings.database_create_tables:
+        create_tables()
+    else:
+        check_schema_revision(shard_engines)
+    # Khởi động các worker nền
+    from app.core.jobs import job_runner
+    from app.core.maintenance import enqueue_pending_purges, stats_reconciler
+
+    if settings.slow_query_log_enabled:
+        from app.database.slow_queries import slow_query_log
+        slow_query_log.start()
+    if settings.activity_log_enabled:
+        activity_log.start()
+    move_coalescer = None
+    if settings.move_coalescing_mode != "off":
+        from app.core.move_coalescer import move_coalescer
+        move_coalescer.start()
+    job_runner.start()
+    # Board soft-delete còn sót từ lần chạy trước mà không có job purge
+    enqueue_pending_purges()
+    stats_reconciler.start()
+    yield
+    stats_reconciler.stop()
+    # Job đang chạy dừng ở lần báo tiến độ kế tiếp và được chạy lại lần khởi động sau
+    job_runner.stop()
+    # Ghi nốt các move đang gộp trước activity log (move cũng sinh activity)
+    if move_coalescer is not None:
+        move_coalescer.stop()
+    # Flush activity còn trong hàng đợi trước khi tắt
+    activity_log.stop()
+    if settings.slow_query_log_enabled:
+        slow_query_log.stop()
 
 # Tạo FastAPI app
 app = FastAPI(
     title=settings.app_name,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     version="1.0.0",
     description="Kanban TODO API với JWT Authentication",
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
-# CORS middleware
+# Cookie sticky về primary sau request ghi (chỉ cần khi có read replica)
+if settings.database_replica_urls:
+    app.add_middleware(StickyCookieMiddleware)
+
+# SQL instrumentation (observer cho metrics và profiler)
+instrumentation.install(engine)
+for extra_engine in [*replica_engines, *shard_engines.values(), *([sqlite_write_queue.engine] if sqlite_write_queue else [])]:
+    instrumentation.install(extra_engine)
+instrumentation.add_query_observer(profiling.observe_query)
+app.add_middleware(profiling.QueryProfilerMiddleware)
+
+# Slow-query log
+if settings.slow_query_log_enabled:
+    from app.database.slow_queries import slow_query_log
+    slow_query_log.engine = engine
+    if sqlite_write_queue is not None:
+        # Writer chỉ có một connection: EXPLAIN câu ghi trên pool đọc (cùng database)
+        slow_query_log.explain_engines[sqlite_write_queue.engine] = engine
+    instrumentation.add_query_observer(slow_query_log.observe_query)
+
+# Admission control (bên trong metrics để 503 vẫn được đếm)
+if settings.admission_control_enabled:
+    from app.core import admission
+    app.add_middleware(admission.AdmissionControlMiddleware)
+
+# Rate limit theo client (ngoài admission: client vượt budget không chiếm chỗ xếp hàng)
+if settings.rate_limit_enabled:
+    from app.core import rate_limit
+    app.add_middleware(rate_limit.RateLimitMiddleware)
+
+# Metrics middleware
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+    instrumentation.add_query_observer(metrics.observe_query)
+    # Pool của mọi engine: primary, replica, shard (shard "0" là primary) và writer của write queue
+    pool_engines = {"primary": engine}
+    pool_engines.update({f"replica_{index}": replica for index, replica in enumerate(replica_engines)})
+    pool_engines.update({f"shard_{name}": shard for name, shard in shard_engines.items() if shard is not engine})
+    if sqlite_write_queue is not None:
+        pool_engines["write_queue"] = sqlite_write_queue.engine
+    metrics.register_pool_metrics(pool_engines)
+
+# CORS middleware (thêm sau cùng = ngoài cùng: 503/429 trả sớm vẫn có header CORS,
+# preflight được trả lời trước khi tới admission/rate limit)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -26,11 +117,21 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+@app.exception_handler(ConcurrentUpdateError)
+async def concurrent_update_handler(request: Request, exc: ConcurrentUpdateError):
+    """Ghi có điều kiện (If-Match/version) thất bại -> 412"""
+    return JSONResponse(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        content={"detail": "Dữ liệu đã bị thay đổi bởi người khác, vui lòng tải lại"}
+    )
+
 # Include routers
 app.include_router(auth.router)  # Authentication routes
 app.include_router(users.router)
 app.include_router(boards.router)
 app.include_router(tasks.router)
+app.include_router(admin.router)
+app.include_router(jobs.router)
 
 @app.get("/")
 def read_root():
@@ -53,9 +154,35 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {
-        "status": "healthy",
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        database_status = "connected"
+    except Exception:
+        database_status = "unavailable"
+
+    body = {
+        "status": "healthy" if database_status == "connected" else "unhealthy",
         "service": settings.app_name,
         "authentication": "enabled",
-        "database": "connected"
+        "database": database_status
     }
+    if replica_engines:
+        body["read_replicas"] = replica_router.stats()
+    if len(shard_engines) > 1:
+        body["shards"] = len(shard_engines)
+    if sqlite_write_queue is not None:
+        body["sqlite_write_queue"] = sqlite_write_queue.stats()
+    if settings.admission_control_enabled:
+        body["admission"] = admission.admission_stats()
+    if database_status != "connected":
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Metrics theo định dạng Prometheus text"""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    # Content-Type đặt qua header: media_type kiểu text/ bị Starlette gắn thêm charset lần nữa
+    return PlainTextResponse(metrics.registry.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
@@ -0,0 +1,33 @@
+"""Add (board_id, status, position, id) index to tasks
+
+Revision ID: 3c9e1f7a2b4d
+Revises: 781ccb6b257f
+Create Date: 2026-10-19 09:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1f7a2b4d'
+down_revision: Union[str, Sequence[str], None] = '781ccb6b257f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_tasks_board_status_position',
+        'tasks',
+        ['board_id', 'status', 'position', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_board_status_position', table_name='tasks')
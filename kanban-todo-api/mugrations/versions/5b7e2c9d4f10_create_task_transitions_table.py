@@ -0,0 +1,60 @@
+"""Create task_transitions table
+
+Revision ID: 5b7e2c9d4f10
+Revises: 8d2f4a6c1e93
+Create Date: 2026-10-19 10:31:42.118034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d4f10'
+down_revision: Union[str, Sequence[str], None] = '8d2f4a6c1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Type statusenum đã được tạo cùng bảng tasks -> không tạo lại trên PostgreSQL
+status_enum = sa.Enum('todo', 'in_progress', 'done', name='statusenum').with_variant(
+    postgresql.ENUM('todo', 'in_progress', 'done', name='statusenum', create_type=False),
+    'postgresql',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_transitions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', status_enum, nullable=True),
+    sa.Column('to_status', status_enum, nullable=True),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_transitions_board_changed_at', 'task_transitions', ['board_id', 'changed_at'], unique=False)
+
+    # Backfill gần đúng: task tạo ở todo lúc created_at, rồi nhảy thẳng sang
+    # status hiện tại lúc updated_at (lịch sử trung gian không còn).
+    op.execute("""
+        INSERT INTO task_transitions (board_id, task_id, from_status, to_status, changed_at)
+        SELECT board_id, id, NULL, 'todo', created_at
+        FROM tasks
+    """)
+    op.execute("""
+        INSERT INTO task_transitions (board_id, task_id, from_status, to_status, changed_at)
+        SELECT board_id, id, 'todo', status, COALESCE(updated_at, created_at)
+        FROM tasks
+        WHERE status <> 'todo'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_transitions_board_changed_at', table_name='task_transitions')
+    op.drop_table('task_transitions')
@@ -29,14 +29,17 @@ def upgrade() -> None:
     #    Use SQL to populate the new column for existing rows.
     op.execute("UPDATE users SET password_hash = password WHERE password_hash IS NULL AND password IS NOT NULL")
 
-    # 3) Drop the old column
-    op.drop_column('users', 'password')
+    # batch_alter_table: SQLite has no ALTER COLUMN, the table is recreated there;
+    # other databases get the same plain ALTER statements as before
+    with op.batch_alter_table('users') as batch_op:
+        # 3) Drop the old column
+        batch_op.drop_column('password')
 
-    # 4) Make password_hash NOT NULL now that data has been migrated
-    op.alter_column('users', 'password_hash', nullable=False)
+        # 4) Make password_hash NOT NULL now that data has been migrated
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=255), nullable=False)
 
-    # 5) Remove the server default for role (optional) so future inserts must set it or rely on ORM default
-    op.alter_column('users', 'role', server_default=None)
+        # 5) Remove the server default for role (optional) so future inserts must set it or rely on ORM default
+        batch_op.alter_column('role', existing_type=sa.String(length=20), server_default=None)
     # ### end Alembic commands ###
 
 
@@ -49,10 +52,11 @@ def downgrade() -> None:
     # 2) Copy data back from password_hash to password where applicable
     op.execute("UPDATE users SET password = password_hash WHERE password IS NULL AND password_hash IS NOT NULL")
 
-    # 3) Make password NOT NULL to match previous schema expectation
-    op.alter_column('users', 'password', nullable=False)
+    with op.batch_alter_table('users') as batch_op:
+        # 3) Make password NOT NULL to match previous schema expectation
+        batch_op.alter_column('password', existing_type=sa.VARCHAR(length=255), nullable=False)
 
-    # 4) Drop the columns added in upgrade
-    op.drop_column('users', 'role')
-    op.drop_column('users', 'password_hash')
+        # 4) Drop the columns added in upgrade
+        batch_op.drop_column('role')
+        batch_op.drop_column('password_hash')
     # ### end Alembic commands ###
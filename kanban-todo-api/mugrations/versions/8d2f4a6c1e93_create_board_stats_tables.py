@@ -0,0 +1,80 @@
+"""Create board_stats and board_assignee_stats tables
+
+Revision ID: 8d2f4a6c1e93
+Revises: 3c9e1f7a2b4d
+Create Date: 2026-10-19 10:02:17.304511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4a6c1e93'
+down_revision: Union[str, Sequence[str], None] = '3c9e1f7a2b4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('board_stats',
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('total_count', sa.Integer(), nullable=False),
+    sa.Column('todo_count', sa.Integer(), nullable=False),
+    sa.Column('in_progress_count', sa.Integer(), nullable=False),
+    sa.Column('done_count', sa.Integer(), nullable=False),
+    sa.Column('low_count', sa.Integer(), nullable=False),
+    sa.Column('medium_count', sa.Integer(), nullable=False),
+    sa.Column('high_count', sa.Integer(), nullable=False),
+    sa.Column('unassigned_count', sa.Integer(), nullable=False),
+    sa.Column('overdue_count', sa.Integer(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('board_id')
+    )
+    op.create_table('board_assignee_stats',
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('board_id', 'user_id')
+    )
+
+    # Backfill từ bảng tasks. overdue_count được job reconciliation tính lần đầu.
+    op.execute("""
+        INSERT INTO board_stats (
+            board_id, total_count, todo_count, in_progress_count, done_count,
+            low_count, medium_count, high_count, unassigned_count, overdue_count
+        )
+        SELECT
+            boards.id,
+            COUNT(tasks.id),
+            SUM(CASE WHEN tasks.status = 'todo' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.status = 'in_progress' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.status = 'done' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.priority = 'low' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.priority = 'medium' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.priority = 'high' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN tasks.id IS NOT NULL AND tasks.assigned_to IS NULL THEN 1 ELSE 0 END),
+            0
+        FROM boards
+        LEFT JOIN tasks ON tasks.board_id = boards.id
+        GROUP BY boards.id
+    """)
+    op.execute("""
+        INSERT INTO board_assignee_stats (board_id, user_id, task_count)
+        SELECT board_id, assigned_to, COUNT(id)
+        FROM tasks
+        WHERE assigned_to IS NOT NULL
+        GROUP BY board_id, assigned_to
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('board_assignee_stats')
+    op.drop_table('board_stats')
@@ -0,0 +1,39 @@
+"""Create board_shards and id_sequences tables
+
+Revision ID: b8e4c7a1d205
+Revises: f3b6d2a8c051
+Create Date: 2026-10-19 15:02:41.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4c7a1d205'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d2a8c051'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('board_shards',
+    sa.Column('board_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard_id', sa.String(length=32), nullable=False),
+    sa.Column('placed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('board_id')
+    )
+    op.create_table('id_sequences',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('next_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('id_sequences')
+    op.drop_table('board_shards')
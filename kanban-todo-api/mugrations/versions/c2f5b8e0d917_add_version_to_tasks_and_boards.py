@@ -0,0 +1,33 @@
+"""Add version column to tasks and boards
+
+Revision ID: c2f5b8e0d917
+Revises: a4c8e1d3f672
+Create Date: 2026-10-19 11:14:36.205871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f5b8e0d917'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e1d3f672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server_default để các dòng hiện có bắt đầu từ version 1
+    op.add_column('boards', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('tasks', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('boards') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,32 @@
+"""Add locked_by and heartbeat_at to jobs
+
+Revision ID: d5a9c3e7f142
+Revises: b8e4c7a1d205
+Create Date: 2026-10-19 18:40:12.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c3e7f142'
+down_revision: Union[str, Sequence[str], None] = 'b8e4c7a1d205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Job `running` hiện có không có heartbeat -> được coi là bị bỏ dở và chạy lại
+    op.add_column('jobs', sa.Column('locked_by', sa.String(length=100), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('locked_by')
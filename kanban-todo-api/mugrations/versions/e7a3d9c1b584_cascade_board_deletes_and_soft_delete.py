@@ -0,0 +1,61 @@
+"""Cascade board deletes in the database and add boards.deleted_at
+
+Revision ID: e7a3d9c1b584
+Revises: c2f5b8e0d917
+Create Date: 2026-10-19 11:48:52.771390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3d9c1b584'
+down_revision: Union[str, Sequence[str], None] = 'c2f5b8e0d917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# FK trong migration đầu tiên không có tên: PostgreSQL tự đặt "<table>_<column>_fkey",
+# SQLite không lưu tên nên batch mode dùng naming convention để tham chiếu
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# (table, column, referred table, ondelete mới)
+FOREIGN_KEYS = [
+    ('boards', 'owner_id', 'users', 'CASCADE'),
+    ('tasks', 'board_id', 'boards', 'CASCADE'),
+    ('tasks', 'assigned_to', 'users', 'SET NULL'),
+]
+
+
+def _fk_name(table: str, column: str, referred: str) -> str:
+    if op.get_bind().dialect.name == 'sqlite':
+        return f'fk_{table}_{column}_{referred}'
+    return f'{table}_{column}_fkey'
+
+
+def _replace_foreign_keys(with_ondelete: bool) -> None:
+    for table in ('boards', 'tasks'):
+        with op.batch_alter_table(table, naming_convention=SQLITE_NAMING) as batch_op:
+            for fk_table, column, referred, ondelete in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                name = _fk_name(table, column, referred)
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(
+                    name, referred, [column], ['id'], ondelete=ondelete if with_ondelete else None
+                )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('boards', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    _replace_foreign_keys(with_ondelete=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(with_ondelete=False)
+    with op.batch_alter_table('boards') as batch_op:
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,50 @@
+"""Create jobs table
+
+Revision ID: f3b6d2a8c051
+Revises: e7a3d9c1b584
+Create Date: 2026-10-19 12:31:15.204877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d2a8c051'
+down_revision: Union[str, Sequence[str], None] = 'e7a3d9c1b584'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_STATUS = sa.Enum('queued', 'running', 'succeeded', 'failed', name='jobstatusenum')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('status', JOB_STATUS, nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_priority_id', 'jobs', ['status', 'priority', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_priority_id', table_name='jobs')
+    op.drop_table('jobs')
+    JOB_STATUS.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,75 @@
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Dùng SQLite file tạm, không đụng vào database thật
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'analytics_bench.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from app.database import Base, engine, SessionLocal, task_repository
+from app.database.models import Board, StatusEnum, TaskTransition, User
+from app.core.analytics import compute_board_analytics
+
+TASKS_COUNT = 50_000
+DAYS = 365
+
+
+def seed(db):
+    """50k tasks, mỗi task đi todo -> in_progress -> done (một phần) trong một năm"""
+    db.add(User(id=1, username="bench", password_hash="x"))
+    db.add(Board(id=1, name="Benchmark", owner_id=1))
+    db.commit()
+
+    random.seed(42)
+    start = datetime.utcnow() - timedelta(days=DAYS)
+    rows = []
+    for task_id in range(1, TASKS_COUNT + 1):
+        created = start + timedelta(seconds=random.randint(0, DAYS * 86400))
+        rows.append({"board_id": 1, "task_id": task_id, "from_status": None,
+                     "to_status": StatusEnum.todo, "changed_at": created})
+        if random.random() < 0.8:
+            started = created + timedelta(hours=random.randint(1, 24 * 14))
+            rows.append({"board_id": 1, "task_id": task_id, "from_status": StatusEnum.todo,
+                         "to_status": StatusEnum.in_progress, "changed_at": started})
+            if random.random() < 0.8:
+                done = started + timedelta(hours=random.randint(1, 24 * 21))
+                rows.append({"board_id": 1, "task_id": task_id, "from_status": StatusEnum.in_progress,
+                             "to_status": StatusEnum.done, "changed_at": done})
+    db.execute(insert(TaskTransition), rows)
+    db.commit()
+    return len(rows)
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        transitions = seed(db)
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        window_start = today + timedelta(days=1) - timedelta(days=DAYS)
+
+        started_at = time.perf_counter()
+        rows = task_repository.get_transition_rows(db, 1, until=window_start + timedelta(days=DAYS))
+        loaded_at = time.perf_counter()
+        report = compute_board_analytics(rows, window_start, DAYS)
+        finished_at = time.perf_counter()
+    finally:
+        db.close()
+
+    print(f"{TASKS_COUNT} tasks, {transitions} transitions, {DAYS} days")
+    print(f"  load columns: {(loaded_at - started_at) * 1000:8.1f} ms")
+    print(f"  compute:      {(finished_at - loaded_at) * 1000:8.1f} ms")
+    print(f"  total:        {(finished_at - started_at) * 1000:8.1f} ms")
+    print(f"  cycle time p50/p85/p95 (days): "
+          f"{report['cycle_time_days']['p50']}/{report['cycle_time_days']['p85']}/{report['cycle_time_days']['p95']}")
+
+
+if __name__ == "__main__":
+    main()
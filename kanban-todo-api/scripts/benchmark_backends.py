@@ -0,0 +1,106 @@
+"""So sánh các storage backend (app.database.backends) trên cùng một workload.
+
+Workload: 10 board x 200 task (tạo qua repository), sau đó đo các thao tác mà router hay gọi
+(get user/task theo id, trang đầu mỗi cột, đếm theo status, move, search).
+Backend SQL dùng SQLite file tạm.
+
+    python scripts/benchmark_backends.py [backend ...]
+"""
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Dùng SQLite file tạm, không đụng vào database thật
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'backends_bench.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, engine, SessionLocal, available_backends, create_backend
+from app.database.models import StatusEnum
+
+BOARDS = 10
+TASKS_PER_BOARD = 200
+OPERATIONS = 2000
+WORDS = ["deploy", "review", "design", "api", "bug", "docs", "release", "refactor"]
+
+
+def seed(backend, db, prefix):
+    owner = backend.user_repository.create_user(db, {"username": f"{prefix}_owner", "password_hash": "x"})
+    board_ids, task_ids = [], []
+    random.seed(42)
+    for board_index in range(BOARDS):
+        board = backend.board_repository.create(db, obj_in={"name": f"Board {board_index}", "owner_id": owner.id})
+        board_ids.append(board.id)
+        for index in range(TASKS_PER_BOARD):
+            status = random.choice(list(StatusEnum))
+            task = backend.task_repository.create(db, obj_in={
+                "title": f"{random.choice(WORDS)} {random.choice(WORDS)} {index}",
+                "status": status,
+                "position": backend.task_repository.next_position(db, board.id, status),
+                "board_id": board.id,
+            })
+            task_ids.append(task.id)
+    return owner.id, board_ids, task_ids
+
+
+def timed(label, func, rounds=OPERATIONS):
+    start = time.perf_counter()
+    for index in range(rounds):
+        func(index)
+    elapsed = time.perf_counter() - start
+    return label, elapsed * 1e6 / rounds
+
+
+def bench(name):
+    backend = create_backend(name)
+    db = SessionLocal()
+    start = time.perf_counter()
+    owner_id, board_ids, task_ids = seed(backend, db, name)
+    seed_seconds = time.perf_counter() - start
+    db.close()
+
+    users, tasks = backend.user_repository, backend.task_repository
+    results = [("seed (s)", seed_seconds)]
+    rng = random.Random(7)
+
+    # Mỗi thao tác đọc dùng session mới như một request
+    def per_request(func):
+        def run(index):
+            session = SessionLocal()
+            try:
+                func(session, index)
+            finally:
+                session.close()
+        return run
+
+    results.append(timed("get user", per_request(lambda s, i: users.get(s, owner_id))))
+    results.append(timed("get task", per_request(lambda s, i: tasks.get(s, rng.choice(task_ids)))))
+    results.append(timed("column page (20)", per_request(lambda s, i: tasks.get_column_page(
+        s, rng.choice(board_ids), StatusEnum.todo, limit=20))))
+    results.append(timed("count_by_status", per_request(
+        lambda s, i: tasks.count_by_status(s, rng.choice(board_ids)))))
+    results.append(timed("search", per_request(
+        lambda s, i: tasks.search_tasks(s, rng.choice(WORDS), board_id=rng.choice(board_ids))), rounds=200))
+
+    def move(session, index):
+        task_id = rng.choice(task_ids)
+        tasks.move_task(session, task_id, rng.choice(list(StatusEnum)))
+    results.append(timed("move_task", per_request(move), rounds=500))
+    return results
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    names = sys.argv[1:] or available_backends()
+    table = {name: dict(bench(name)) for name in names}
+    labels = list(next(iter(table.values())))
+    print(f"{'µs/op':<20}" + "".join(f"{name:>14}" for name in names))
+    for label in labels:
+        print(f"{label:<20}" + "".join(f"{table[name][label]:>14.1f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Đo chi phí của rate limiter (app.core.rate_limit) theo micro giây.
+
+- `bucket`: một lần `MemoryRateLimitBackend.take_nowait` theo số thread và số
+  shard (1 shard = một lock chung cho mọi client).
+- `middleware`: một request qua `RateLimitMiddleware` so với gọi thẳng app
+  rỗng (chọn budget theo route, đọc user id từ JWT hoặc IP, lấy token).
+
+    python scripts/benchmark_rate_limit.py [--threads 1 8] [--shards 1 16] [--requests 20000]
+"""
+import sys
+import os
+import argparse
+import asyncio
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+
+from app.core.rate_limit import Budget, MemoryRateLimitBackend, RateLimiter, RateLimitMiddleware
+from app.core.security import create_access_token
+
+# Budget lớn: đo đường đi "được phép" (trường hợp thường gặp)
+BUDGETS = {"GET /boards/{board_id}": "1000000000/1", "*": "1000000000/1"}
+
+
+def bench_buckets(shards: int, threads: int, operations: int) -> float:
+    """µs mỗi lần lấy token (thời gian thực / tổng số lần, mọi thread chạy song song)"""
+    backend = MemoryRateLimitBackend(shards)
+    budget = Budget.parse("*", BUDGETS["*"])
+    per_thread = operations // threads
+
+    def worker(index):
+        keys = [f"*|user:{index * 1000 + client}" for client in range(100)]
+        for operation in range(per_thread):
+            backend.take_nowait(keys[operation % 100], budget)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started_at = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - started_at) / (per_thread * threads) * 1e6
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/boards/{board_id}")
+    def get_board(board_id: int):
+        return {}
+
+    return app
+
+
+async def _noop_app(scope, receive, send):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def bench_middleware(requests: int, token: str) -> dict:
+    """µs mỗi request: app rỗng, qua middleware với JWT, qua middleware ẩn danh"""
+    app = build_app()
+    middleware = RateLimitMiddleware(_noop_app, RateLimiter(MemoryRateLimitBackend(), BUDGETS))
+
+    def scope(board_id, headers):
+        return {
+            "type": "http", "method": "GET", "path": f"/boards/{board_id}", "app": app,
+            "headers": headers, "client": (f"10.0.{board_id % 250}.1", 1234), "query_string": b"",
+            "root_path": "",
+        }
+
+    authorized = [(b"authorization", f"Bearer {token}".encode())]
+    results = {}
+    for name, target, headers in (
+        ("app rỗng", _noop_app, []),
+        ("middleware + JWT", middleware, authorized),
+        ("middleware ẩn danh", middleware, []),
+    ):
+        scopes = [scope(index % 500, headers) for index in range(requests)]
+        started_at = time.perf_counter()
+        for item in scopes:
+            await target(item, _receive, _send)
+        results[name] = (time.perf_counter() - started_at) / requests * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'bucket':<10}{'shards':>8}{'threads':>9}{'µs/op':>9}")
+    for shards in args.shards:
+        for threads in args.threads:
+            print(f"{'':<10}{shards:>8}{threads:>9}{bench_buckets(shards, threads, args.requests * 5):>9.2f}")
+
+    results = asyncio.run(bench_middleware(args.requests, create_access_token(42)))
+    print(f"\n{'middleware':<22}{'µs/request':>12}")
+    for name, elapsed in results.items():
+        print(f"{name:<22}{elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
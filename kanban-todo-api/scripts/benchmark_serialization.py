@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+import json
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.database.models import Board, Task, StatusEnum, PriorityEnum
+from app.schemas.board import BoardWithTasks
+from app.schemas.task import TaskResponse
+from app.schemas.serializers import AttributeOverlay, board_with_tasks_adapter, dump_json
+
+TASKS_COUNT = 5000
+ROUNDS = 5
+
+
+def build_board():
+    """Tạo board + 5,000 tasks trong memory (không cần DB)"""
+    now = datetime.utcnow()
+    board = Board(
+        id=1, name="Benchmark", description="Board lớn", is_public=True,
+        owner_id=1, created_at=now, updated_at=now,
+    )
+    statuses = list(StatusEnum)
+    priorities = list(PriorityEnum)
+    tasks = [
+        Task(
+            id=i, title=f"Task {i}", description="x" * 300,
+            status=statuses[i % 3], priority=priorities[i % 3], position=i,
+            board_id=1, assigned_to=None, due_date=None, created_at=now, updated_at=now,
+        )
+        for i in range(1, TASKS_COUNT + 1)
+    ]
+    return board, tasks
+
+
+def legacy_path(field, board, tasks):
+    """Cách cũ: from_orm từng task, rồi FastAPI validate lại response_model + json.dumps"""
+    board_response = BoardWithTasks.model_validate(AttributeOverlay(board, tasks=[]))
+    board_response.tasks = [TaskResponse.model_validate(task) for task in tasks]
+    content = asyncio.run(serialize_response(field=field, response_content=board_response))
+    return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+
+def fast_path(board, tasks):
+    """Cách mới: validate một lần từ ORM và dump JSON bằng pydantic-core"""
+    return dump_json(board_with_tasks_adapter, AttributeOverlay(board, tasks=tasks, tasks_count=len(tasks)))
+
+
+def measure(fn, *args):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main():
+    board, tasks = build_board()
+    field = create_response_field(name="Response_board_detail", type_=BoardWithTasks)
+
+    legacy = measure(legacy_path, field, board, tasks)
+    fast = measure(fast_path, board, tasks)
+    print(f"{TASKS_COUNT} tasks, best of {ROUNDS}")
+    print(f"  legacy (from_orm + response_model + json): {legacy * 1000:8.2f} ms")
+    print(f"  single-pass TypeAdapter.dump_json:        {fast * 1000:8.2f} ms")
+    print(f"  speedup: {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Đo ghi đồng thời vào SQLite: session thường vs `SQLiteWriteQueue` (app.database.write_queue).
+
+Mỗi thread tạo task liên tục qua TaskRepository (mỗi task một transaction như
+một request POST /tasks), trên SQLite file tạm. In số task/giây, p50/p99 mỗi
+lần ghi và số lần lỗi (vd: `database is locked`) theo số thread.
+
+    python scripts/benchmark_sqlite_writes.py [--threads 1 4 16] [--seconds 3]
+"""
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+
+# Dùng SQLite file tạm, không đụng vào database thật
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'writes_bench.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, BoardRepository, TaskRepository, UserRepository
+from app.database.connection import _create_engine, _enable_sqlite_wal
+from app.database.models import StatusEnum
+from app.database.write_queue import SQLiteWriteQueue, WriteQueueSession
+
+SESSION_OPTIONS = {"autoflush": False, "expire_on_commit": False}
+
+
+def plain_sessions(url):
+    return sessionmaker(bind=_create_engine(url), **SESSION_OPTIONS), None
+
+
+def queued_sessions(url):
+    engine = _create_engine(url)
+    writer = _create_engine(url, pool_size=1, max_overflow=0, connect_args={"check_same_thread": False})
+    for created in (engine, writer):
+        event.listen(created, "connect", _enable_sqlite_wal)
+    queue = SQLiteWriteQueue(writer)
+    return sessionmaker(class_=WriteQueueSession, write_queue=queue, bind=engine, **SESSION_OPTIONS), queue
+
+
+def run(factory, board_id, threads, seconds):
+    tasks = TaskRepository()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        local_latencies, local_errors = [], []
+        while time.perf_counter() < deadline:
+            db = factory()
+            started_at = time.perf_counter()
+            try:
+                tasks.create(db, obj_in={
+                    "title": f"bench {index}", "status": StatusEnum.todo, "position": 0, "board_id": board_id
+                })
+                local_latencies.append(time.perf_counter() - started_at)
+            except Exception as exc:
+                db.rollback()
+                local_errors.append(type(exc).__name__)
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+    return len(latencies) / seconds, percentile(0.5), percentile(0.99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'threads':>8}{'tasks/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'groups':>8}")
+    for mode, build in (("plain", plain_sessions), ("queue", queued_sessions)):
+        for threads in args.threads:
+            url = f"sqlite:///{os.path.join(_tmp_dir, f'{mode}_{threads}.db')}"
+            factory, queue = build(url)
+            Base.metadata.create_all(bind=factory.kw["bind"])
+            db = factory()
+            owner = UserRepository().create_user(db, {"username": "bench", "password_hash": "x"})
+            board_id = BoardRepository().create(db, obj_in={"name": "Bench", "owner_id": owner.id}).id
+            db.close()
+            rate, p50, p99, errors = run(factory, board_id, threads, args.seconds)
+            groups = f"{queue.committed_sessions / max(queue.commits, 1):.1f}" if queue else "-"
+            print(f"{mode:<8}{threads:>8}{rate:>10.0f}{p50:>9.1f}{p99:>9.1f}{errors:>8}{groups:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Đo thời gian khởi động của app trong process mới (cold start của worker).
+
+Mỗi lần chạy một process Python mới đo: import `main`, startup (lifespan:
+kiểm tra Alembic head, khởi động worker nền) và request đầu tiên
+(GET /health, GET /boards/public). In median/max theo từng bước cho cấu hình
+mặc định và cấu hình tắt các subsystem tùy chọn (rate limit, admission,
+slow-query log, gộp move: các module này chỉ được import khi bật), kèm các
+module import chậm nhất nếu có `--importtime`.
+
+    python scripts/benchmark_startup.py [--runs 5] [--importtime]
+"""
+import sys
+import os
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+# Subsystem tùy chọn: biến môi trường tắt chúng và module chỉ được import khi bật
+MINIMAL_ENV = {
+    "RATE_LIMIT_ENABLED": "false",
+    "ADMISSION_CONTROL_ENABLED": "false",
+    "SLOW_QUERY_LOG_ENABLED": "false",
+    "MOVE_COALESCING_MODE": "off",
+}
+OPTIONAL_MODULES = [
+    "app.core.rate_limit", "app.core.admission", "app.database.slow_queries", "app.core.move_coalescer",
+]
+
+CHILD = """
+import json, sys, time
+from fastapi.testclient import TestClient
+started_at = time.perf_counter()
+import main
+imported_at = time.perf_counter()
+with TestClient(main.app) as client:
+    ready_at = time.perf_counter()
+    client.get("/health")
+    health_at = time.perf_counter()
+    client.get("/boards/public")
+    boards_at = time.perf_counter()
+print(json.dumps({"steps": {
+    "import": imported_at - started_at,
+    "startup": ready_at - imported_at,
+    "first /health": health_at - ready_at,
+    "first /boards/public": boards_at - health_at,
+}, "modules": sorted(set(sys.modules) & set(%r))}))
+""" % OPTIONAL_MODULES
+
+
+def prepare_database(url: str) -> None:
+    """Tạo schema và đánh dấu Alembic head (như database đã `alembic upgrade head`)"""
+    os.environ["DATABASE_URL"] = url
+    from alembic import command
+    from alembic.config import Config
+
+    from app.database import create_tables
+    from app.database.migrations import ALEMBIC_INI
+
+    create_tables()
+    command.stamp(Config(ALEMBIC_INI), "head")
+
+
+def run_child(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, limit: int = 15) -> list:
+    """(ms cộng dồn, module) của các module import chậm nhất khi import `main`"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="in các module import chậm nhất")
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup_bench.db')}"
+    prepare_database(url)
+    env = {**os.environ, "DATABASE_URL": url}
+    env.pop("DATABASE_CREATE_TABLES", None)
+
+    configurations = {"mặc định": env, "tắt subsystem tùy chọn": {**env, **MINIMAL_ENV}}
+    for name, config_env in configurations.items():
+        results = [run_child(config_env) for _ in range(args.runs)]
+        samples = [result["steps"] for result in results]
+        print(f"\n[{name}] module tùy chọn đã import: {', '.join(results[0]['modules']) or '-'}")
+        print(f"{'step':<24}{'median ms':>11}{'max ms':>9}")
+        for step in samples[0]:
+            values = [sample[step] * 1000 for sample in samples]
+            print(f"{step:<24}{statistics.median(values):>11.1f}{max(values):>9.1f}")
+        totals = [sum(sample.values()) * 1000 for sample in samples]
+        print(f"{'total':<24}{statistics.median(totals):>11.1f}{max(totals):>9.1f}")
+
+    if args.importtime:
+        print("\nImport chậm nhất (ms cộng dồn):")
+        for elapsed, module in slowest_imports(env):
+            print(f"{elapsed:>9.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
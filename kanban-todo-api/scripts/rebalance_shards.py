@@ -0,0 +1,203 @@
+"""Xem và cân bằng phân bố board giữa các shard (app.database.sharding).
+
+Shard "0" là DATABASE_URL, các shard khác là DATABASE_SHARD_URLS, ví dụ:
+
+    DATABASE_SHARD_URLS='["sqlite:///./kanban_shard1.db", "sqlite:///./kanban_shard2.db"]'
+
+    python scripts/rebalance_shards.py status            # số board/task theo shard
+    python scripts/rebalance_shards.py sync-users        # chép user còn thiếu sang mọi shard (khi bật shard)
+    python scripts/rebalance_shards.py move 42 2         # chuyển board 42 sang shard "2"
+    python scripts/rebalance_shards.py balance [--dry-run]
+
+Chuyển một board: chép board, stats và task sang shard mới (lặp lại nếu board
+bị ghi trong lúc chép), đổi `board_shards`, chờ `--grace` giây cho request
+đang dùng vị trí cũ kết thúc, kiểm tra shard cũ không bị ghi thêm rồi mới xóa
+bản cũ. Nếu shard cũ vẫn bị ghi thì giữ cả hai bản và báo lỗi để xử lý tay.
+"""
+import sys
+import os
+import argparse
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.database import Base, shard_engines
+from app.database.models import Board, BoardShard, Task, User
+from app.database.sharding import BOARD_KEY_COLUMNS, PRIMARY_SHARD
+
+# Thứ tự chép (cha trước con); xóa theo thứ tự ngược lại
+BOARD_TABLES = ["boards", "board_stats", "board_assignee_stats", "tasks", "task_transitions"]
+COPY_ATTEMPTS = 3
+
+
+def board_column(table_name):
+    table = Base.metadata.tables[table_name]
+    return table, table.c[BOARD_KEY_COLUMNS[table_name]]
+
+
+def shard_of(board_id: int) -> str:
+    with shard_engines[PRIMARY_SHARD].connect() as connection:
+        return connection.execute(
+            select(BoardShard.shard_id).where(BoardShard.board_id == board_id)
+        ).scalar() or PRIMARY_SHARD
+
+
+def fingerprint(engine, board_id: int) -> tuple:
+    """Thay đổi khi board hoặc task của board bị ghi (version tăng, thêm/xóa task)"""
+    with engine.connect() as connection:
+        board_version = connection.execute(select(Board.version).where(Board.id == board_id)).scalar()
+        tasks = connection.execute(
+            select(func.count(Task.id), func.coalesce(func.sum(Task.version), 0)).where(Task.board_id == board_id)
+        ).one()
+    return board_version, tuple(tasks)
+
+
+def sync_users(target) -> int:
+    """Chép user có ở primary mà chưa có ở shard `target`. Trả về số user đã chép"""
+    users = User.__table__
+    with shard_engines[PRIMARY_SHARD].connect() as source:
+        rows = source.execute(select(users)).mappings().all()
+    with target.begin() as connection:
+        existing = set(connection.execute(select(users.c.id)).scalars())
+        missing = [dict(row) for row in rows if row["id"] not in existing]
+        if missing:
+            connection.execute(insert(users), missing)
+    return len(missing)
+
+
+def delete_board_rows(engine, board_id: int) -> None:
+    with engine.begin() as connection:
+        for table_name in reversed(BOARD_TABLES):
+            table, column = board_column(table_name)
+            connection.execute(delete(table).where(column == board_id))
+
+
+def copy_board(source, target, board_id: int) -> tuple:
+    """Chép board sang `target`; trả về fingerprint của bản đã chép"""
+    for _ in range(COPY_ATTEMPTS):
+        before = fingerprint(source, board_id)
+        with source.connect() as reader, target.begin() as writer:
+            for table_name in BOARD_TABLES:
+                table, column = board_column(table_name)
+                rows = [dict(row) for row in reader.execute(
+                    select(table).where(column == board_id).order_by(*table.primary_key.columns)
+                ).mappings()]
+                if table_name == "task_transitions":
+                    # id của transition chỉ duy nhất trong một shard -> cấp lại, giữ thứ tự
+                    for row in rows:
+                        row.pop("id")
+                if rows:
+                    writer.execute(insert(table), rows)
+        if fingerprint(source, board_id) == before:
+            return before
+        # Board bị ghi trong lúc chép: chép lại
+        delete_board_rows(target, board_id)
+    raise SystemExit(f"Board {board_id} bị ghi liên tục, thử lại lúc ít tải hơn")
+
+
+def move_board(board_id: int, target_id: str, grace_seconds: float) -> bool:
+    if target_id not in shard_engines:
+        raise SystemExit(f"Shard '{target_id}' không tồn tại, chọn một trong {list(shard_engines)}")
+    source_id = shard_of(board_id)
+    if source_id == target_id:
+        print(f"Board {board_id} đã ở shard {target_id}")
+        return True
+    source, target = shard_engines[source_id], shard_engines[target_id]
+    if fingerprint(source, board_id)[0] is None:
+        raise SystemExit(f"Board {board_id} không có ở shard {source_id}")
+
+    sync_users(target)
+    copied = copy_board(source, target, board_id)
+    with shard_engines[PRIMARY_SHARD].begin() as connection:
+        values = {"shard_id": target_id, "placed_at": datetime.utcnow()}
+        result = connection.execute(update(BoardShard).where(BoardShard.board_id == board_id).values(**values))
+        if result.rowcount == 0:
+            connection.execute(insert(BoardShard).values(board_id=board_id, **values))
+
+    # Request bắt đầu trước khi đổi vị trí vẫn có thể ghi vào shard cũ
+    time.sleep(grace_seconds)
+    if fingerprint(source, board_id) != copied:
+        print(f"Board {board_id} bị ghi vào shard {source_id} sau khi chép: giữ bản cũ, cần kiểm tra tay")
+        return False
+    delete_board_rows(source, board_id)
+    print(f"Đã chuyển board {board_id}: shard {source_id} -> {target_id} ({copied[1][0]} task)")
+    return True
+
+
+def shard_loads() -> dict:
+    """{shard_id: {board_id: số task}}"""
+    loads = {}
+    for shard_id, engine in shard_engines.items():
+        with engine.connect() as connection:
+            boards = connection.execute(select(Board.id)).scalars().all()
+            counts = dict(connection.execute(
+                select(Task.board_id, func.count(Task.id)).group_by(Task.board_id)
+            ).all())
+        loads[shard_id] = {board_id: counts.get(board_id, 0) for board_id in boards}
+    return loads
+
+
+def plan_balance(loads: dict) -> list:
+    """Chuyển board lớn nhất vừa đủ từ shard nhiều task nhất sang shard ít nhất"""
+    totals = {shard_id: sum(boards.values()) for shard_id, boards in loads.items()}
+    boards = {shard_id: dict(items) for shard_id, items in loads.items()}
+    moves = []
+    while True:
+        fullest = max(totals, key=totals.get)
+        emptiest = min(totals, key=totals.get)
+        gap = totals[fullest] - totals[emptiest]
+        # Chỉ chuyển board làm khoảng cách giữa hai shard nhỏ đi
+        candidates = [(tasks, board_id) for board_id, tasks in boards[fullest].items() if 0 < tasks < gap]
+        if not candidates:
+            return moves
+        tasks, board_id = max(candidates, key=lambda item: min(item[0], gap - item[0]))
+        moves.append((board_id, fullest, emptiest, tasks))
+        del boards[fullest][board_id]
+        boards[emptiest][board_id] = tasks
+        totals[fullest] -= tasks
+        totals[emptiest] += tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grace", type=float, default=2.0, help="số giây chờ sau khi đổi vị trí board")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    commands.add_parser("sync-users")
+    move = commands.add_parser("move")
+    move.add_argument("board_id", type=int)
+    move.add_argument("shard_id")
+    balance = commands.add_parser("balance")
+    balance.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if len(shard_engines) < 2:
+        raise SystemExit("DATABASE_SHARD_URLS trống: chỉ có một shard")
+
+    if args.command == "status":
+        for shard_id, boards in shard_loads().items():
+            print(f"shard {shard_id}: {len(boards)} board, {sum(boards.values())} task")
+    elif args.command == "sync-users":
+        for shard_id, engine in shard_engines.items():
+            if shard_id != PRIMARY_SHARD:
+                print(f"shard {shard_id}: chép {sync_users(engine)} user")
+    elif args.command == "move":
+        if not move_board(args.board_id, args.shard_id, args.grace):
+            sys.exit(1)
+    else:
+        moves = plan_balance(shard_loads())
+        if not moves:
+            print("Các shard đã cân bằng")
+        failed = False
+        for board_id, source_id, target_id, tasks in moves:
+            print(f"board {board_id} ({tasks} task): shard {source_id} -> {target_id}")
+            if not args.dry_run:
+                failed = not move_board(board_id, target_id, args.grace) or failed
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
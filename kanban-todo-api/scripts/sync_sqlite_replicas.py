@@ -0,0 +1,65 @@
+"""Đồng bộ SQLite primary sang các file replica (thử read replica ở local).
+
+Dùng backup API của sqlite3 (copy nhất quán kể cả khi app đang ghi). Primary
+là DATABASE_URL, replica là DATABASE_REPLICA_URLS, ví dụ:
+
+    DATABASE_URL=sqlite:///./kanban.db
+    DATABASE_REPLICA_URLS='["sqlite:///./kanban_replica1.db", "sqlite:///./kanban_replica2.db"]'
+
+    python scripts/sync_sqlite_replicas.py              # đồng bộ một lần
+    python scripts/sync_sqlite_replicas.py --interval 2 # mỗi 2 giây (giả lập replication lag)
+"""
+import sys
+import os
+import argparse
+import sqlite3
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+
+def sqlite_path(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        raise SystemExit(f"Chỉ hỗ trợ SQLite file: {url}")
+    return parsed.database
+
+
+def sync(primary_path: str, replica_paths) -> None:
+    source = sqlite3.connect(primary_path)
+    try:
+        for replica_path in replica_paths:
+            target = sqlite3.connect(replica_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, default=0, help="lặp lại mỗi N giây (0 = một lần)")
+    args = parser.parse_args()
+
+    if not settings.database_replica_urls:
+        raise SystemExit("DATABASE_REPLICA_URLS trống")
+    primary_path = sqlite_path(settings.database_url)
+    replica_paths = [sqlite_path(url) for url in settings.database_replica_urls]
+
+    while True:
+        started_at = time.perf_counter()
+        sync(primary_path, replica_paths)
+        print(f"Đã đồng bộ {len(replica_paths)} replica trong {(time.perf_counter() - started_at) * 1000:.1f} ms")
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
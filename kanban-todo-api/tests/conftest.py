@@ -0,0 +1,81 @@
+"""Cấu hình chung cho test: database là SQLite file tạm, không đụng vào database thật"""
+import os
+import tempfile
+from functools import lru_cache
+from itertools import count
+
+import pytest
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("DATABASE_CREATE_TABLES", "true")
+
+PASSWORD = "secret1"
+_user_ids = count(1)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Tạo schema một lần cho cả phiên test"""
+    from app.database import create_tables
+    create_tables()
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    """TestClient của app chính (chạy lifespan một lần cho cả phiên test)"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@lru_cache(maxsize=None)
+def _password_hash() -> str:
+    # bcrypt chậm: hash một lần, dùng chung cho mọi user test
+    from app.core.security import get_password_hash
+    return get_password_hash(PASSWORD)
+
+
+def create_user(role: str = "user") -> dict:
+    """User mới ghi thẳng qua repository (không qua /auth/register bị rate limit), kèm header JWT"""
+    from app.core.security import create_access_token
+    from app.database import SessionLocal, user_repository
+
+    username = f"u{next(_user_ids)}_{os.getpid()}"
+    with SessionLocal() as db:
+        user = user_repository.create_user(
+            db, {"username": username, "password_hash": _password_hash(), "role": role}
+        )
+        user_id = user.id
+    return {
+        "id": user_id,
+        "username": username,
+        "headers": {"Authorization": f"Bearer {create_access_token(subject=user_id, role=role)}"},
+    }
+
+
+@pytest.fixture(scope="session")
+def owner(database):
+    return create_user()
+
+
+@pytest.fixture(scope="session")
+def other_user(database):
+    return create_user()
+
+
+@pytest.fixture(scope="session")
+def admin(database):
+    return create_user(role="admin")
+
+
+@pytest.fixture
+def board(client, owner):
+    """Board mới của `owner` cho từng test"""
+    response = client.post("/boards/", json={"name": "Board test"}, headers=owner["headers"])
+    assert response.status_code == 201, response.text
+    return response.json()
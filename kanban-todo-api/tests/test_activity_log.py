@@ -0,0 +1,83 @@
+"""Activity log write-behind: flush khi stop, bỏ event của board đã xóa"""
+import pytest
+from sqlalchemy import func
+
+from app.database import SessionLocal, board_repository
+from app.database.activity_log import ActivityLogWriter
+from app.database.models import ActivityLog
+
+
+@pytest.fixture
+def writer():
+    """Writer riêng với cửa sổ flush dài: event chỉ được ghi khi flush/stop/discard"""
+    writer = ActivityLogWriter(SessionLocal, flush_interval_ms=60000, batch_size=1000)
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def board_ids(database, owner):
+    with SessionLocal() as db:
+        return [board_repository.create(db, obj_in={"name": f"B{i}", "owner_id": owner["id"]}).id for i in range(2)]
+
+
+def stored(board_id):
+    with SessionLocal() as db:
+        return db.query(func.count(ActivityLog.id)).filter(ActivityLog.board_id == board_id).scalar()
+
+
+def emit(writer, board_id, count=1):
+    for index in range(count):
+        writer.emit(board_id=board_id, action="task.created", changes={"index": index})
+
+
+def test_emit_ignored_until_started(writer, board_ids):
+    emit(writer, board_ids[0])
+    writer.start()
+    writer.stop()
+    assert stored(board_ids[0]) == 0
+
+
+def test_stop_flushes_pending_events(writer, board_ids):
+    writer.start()
+    emit(writer, board_ids[0], 3)
+    assert stored(board_ids[0]) == 0
+    writer.stop()
+    assert stored(board_ids[0]) == 3
+    assert not writer.running
+
+
+def test_batch_size_triggers_write(board_ids):
+    writer = ActivityLogWriter(SessionLocal, flush_interval_ms=60000, batch_size=2)
+    writer.start()
+    try:
+        emit(writer, board_ids[0], 2)
+        assert writer.flush()
+        assert stored(board_ids[0]) == 2
+    finally:
+        writer.stop()
+
+
+def test_discard_boards(writer, board_ids):
+    deleted, kept = board_ids
+    writer.start()
+    emit(writer, deleted, 2)
+    emit(writer, kept)
+    assert writer.flush()
+    emit(writer, deleted)  # chưa ghi lúc board bị xóa
+    writer.discard_boards([deleted])
+    emit(writer, deleted)  # emit muộn sau khi xóa
+    writer.stop()
+    assert stored(deleted) == 0
+    assert stored(kept) == 1
+
+
+def test_board_delete_discards_activity(client, owner, board):
+    from app.database import activity_log
+
+    client.post("/tasks/", json={"title": "T", "board_id": board["id"]}, headers=owner["headers"])
+    assert activity_log.flush()
+    assert stored(board["id"]) > 0
+    assert client.delete(f"/boards/{board['id']}", headers=owner["headers"]).status_code == 200
+    assert activity_log.flush()
+    assert stored(board["id"]) == 0
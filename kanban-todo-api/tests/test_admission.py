@@ -0,0 +1,39 @@
+"""Admission control: 503 khi quá tải vẫn có header CORS, preflight không bị giới hạn"""
+import pytest
+
+from app.core import admission
+
+ORIGIN = "http://localhost:3000"
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """Lớp "read" hết chỗ và không còn hàng đợi: mọi GET bị từ chối ngay"""
+    limiter = admission.AdmissionLimiter("read", limit=1, queue_size=0, max_wait_seconds=0)
+    limiter.in_flight = 1
+    monkeypatch.setitem(admission.limiters, "read", limiter)
+    return limiter
+
+
+def test_route_class():
+    assert admission.route_class({"path": "/boards/", "method": "GET"}) == "read"
+    assert admission.route_class({"path": "/boards/", "method": "POST"}) == "write"
+    assert admission.route_class({"path": "/auth/login", "method": "POST"}) == "auth"
+    assert admission.route_class({"path": "/health", "method": "GET"}) is None
+    assert admission.route_class({"path": "/boards/", "method": "OPTIONS"}) is None
+
+
+def test_rejection_carries_cors_headers(client, owner, saturated):
+    response = client.get("/boards/", headers={**owner["headers"], "Origin": ORIGIN})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+
+
+def test_preflight_is_not_admitted(client, saturated):
+    response = client.options(
+        "/boards/", headers={"Origin": ORIGIN, "Access-Control-Request-Method": "GET"}
+    )
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert saturated.in_flight == 1
@@ -0,0 +1,75 @@
+"""Analytics của board tính trên lịch sử transition đã biết trước"""
+from datetime import date, datetime
+
+import pytest
+
+from app.core.analytics import DAY_SECONDS, _epoch, compute_board_analytics
+
+WINDOW_START = datetime(2024, 1, 1)
+TODO, IN_PROGRESS, DONE = 0, 1, 2
+
+
+def at(day):
+    """Giữa trưa của ngày thứ `day` trong cửa sổ (âm = trước cửa sổ)"""
+    return _epoch(WINDOW_START) + day * DAY_SECONDS + DAY_SECONDS // 2
+
+
+# (task_id, status code, epoch) sắp xếp theo task rồi thời gian, như get_transition_rows
+ROWS = [
+    (1, TODO, at(0)), (1, IN_PROGRESS, at(1)), (1, DONE, at(3)),
+    (2, TODO, at(2)), (2, IN_PROGRESS, at(4)), (2, DONE, at(9)),
+    (3, TODO, at(5)),
+    (4, TODO, at(-3)), (4, DONE, at(10)),
+]
+
+
+@pytest.fixture(scope="module")
+def report():
+    return compute_board_analytics(ROWS, WINDOW_START, 14)
+
+
+def test_cumulative_flow(report):
+    flow = report["cumulative_flow"]
+    assert flow["dates"][0] == date(2024, 1, 1) and len(flow["dates"]) == 14
+    assert flow["todo"] == [2, 1, 2, 2, 1, 2, 2, 2, 2, 2, 1, 1, 1, 1]
+    assert flow["in_progress"] == [0, 1, 1, 0, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0]
+    assert flow["done"] == [0, 0, 0, 1, 1, 1, 1, 1, 1, 2, 3, 3, 3, 3]
+
+
+def test_throughput(report):
+    assert report["throughput"] == {"week_starts": [date(2024, 1, 1), date(2024, 1, 8)], "done": [1, 2]}
+
+
+def test_cycle_and_lead_time(report):
+    # Cycle: task 1 (2 ngày), task 2 (5 ngày); task 4 không qua in_progress
+    assert report["cycle_time_days"] == {"count": 2, "mean": 3.5, "p50": 3.5, "p85": 4.55, "p95": 4.85}
+    # Lead: 3, 7 và 13 ngày (task 4 tạo trước cửa sổ)
+    assert report["lead_time_days"] == {"count": 3, "mean": 7.667, "p50": 7.0, "p85": 11.2, "p95": 12.4}
+    assert report["transitions_count"] == len(ROWS)
+
+
+def test_done_outside_window_is_ignored():
+    report = compute_board_analytics(ROWS, WINDOW_START, 5)
+    assert report["throughput"]["done"] == [1]
+    assert report["cycle_time_days"]["count"] == 1
+    assert report["lead_time_days"]["count"] == 1
+
+
+def test_empty_board():
+    report = compute_board_analytics([], WINDOW_START, 7)
+    assert report["cumulative_flow"]["todo"] == [0] * 7
+    assert report["throughput"]["done"] == [0]
+    assert report["cycle_time_days"] == {"count": 0, "mean": None, "p50": None, "p85": None, "p95": None}
+
+
+def test_endpoint_counts_transitions(client, owner, board):
+    task = client.post("/tasks/", json={"title": "T", "board_id": board["id"]}, headers=owner["headers"]).json()
+    client.patch(f"/tasks/{task['id']}/move", json={"status": "in_progress"}, headers=owner["headers"])
+    client.patch(f"/tasks/{task['id']}/move", json={"status": "done"}, headers=owner["headers"])
+    response = client.get(f"/boards/{board['id']}/analytics?days=7", headers=owner["headers"])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["transitions_count"] == 3
+    assert body["cumulative_flow"]["done"][-1] == 1
+    assert body["throughput"]["done"][-1] == 1
+    assert body["cycle_time_days"]["count"] == 1
@@ -0,0 +1,207 @@
+"""Bộ kiểm tra mà mọi storage backend (app.database.backends) phải qua.
+
+Mỗi test chạy các method repository mà router dùng trên dữ liệu mới và so
+sánh kết quả với hành vi của backend SQL, lần lượt trên từng backend của
+`available_backends()`:
+
+    python -m pytest tests/test_backend_conformance.py
+    python -m pytest tests/test_backend_conformance.py -k memory   # chỉ một backend
+"""
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+from app.database import SessionLocal, ConcurrentUpdateError, available_backends, create_backend
+from app.database.models import PriorityEnum, StatusEnum
+
+_suffixes = count()
+
+
+class Fixture:
+    """Một user, một board và 6 task (4 todo, 2 done) trên backend đang kiểm tra"""
+
+    def __init__(self, backend, db, suffix):
+        self.backend = backend
+        self.db = db
+        self.users = backend.user_repository
+        self.boards = backend.board_repository
+        self.tasks = backend.task_repository
+        self.stats = backend.board_stats_repository
+        self.owner = self.users.create_user(db, {
+            "username": f"owner_{suffix}", "email": f"owner_{suffix}@example.com", "password": "secret1"
+        })
+        self.other = self.users.create_user(db, {"username": f"other_{suffix}", "password": "secret1"})
+        self.board = self.boards.create(db, obj_in={"name": "Board", "owner_id": self.owner.id})
+        self.task_ids = []
+        for index, (status, priority) in enumerate([
+            (StatusEnum.todo, PriorityEnum.high), (StatusEnum.todo, PriorityEnum.low),
+            (StatusEnum.todo, PriorityEnum.medium), (StatusEnum.todo, PriorityEnum.medium),
+            (StatusEnum.done, PriorityEnum.low), (StatusEnum.done, PriorityEnum.high),
+        ]):
+            position = self.tasks.next_position(db, self.board.id, status)
+            task = self.tasks.create(db, obj_in={
+                "title": f"Task {index} deploy" if index % 2 else f"Task {index} review",
+                "description": "Cần làm gấp" if index == 0 else None,
+                "status": status, "priority": priority, "position": position,
+                "board_id": self.board.id, "assigned_to": self.other.id if index < 2 else None,
+            })
+            self.task_ids.append(task.id)
+
+    def column(self, status):
+        return [task.id for task in self.tasks.get_by_status(self.db, self.board.id, status)]
+
+
+@pytest.fixture(params=available_backends())
+def f(request, database):
+    backend = create_backend(request.param)
+    db = SessionLocal()
+    try:
+        fixture = Fixture(backend, db, f"{request.param}_{next(_suffixes)}")
+    finally:
+        db.close()
+    # Session mới: không đọc lại object từ identity map của lúc tạo
+    fixture.db = db = SessionLocal()
+    try:
+        yield fixture
+    finally:
+        db.close()
+
+
+def test_users_lookup(f):
+    assert f.users.get(f.db, f.owner.id).username == f.owner.username
+    assert f.users.get_by_username(f.db, f.owner.username).id == f.owner.id
+    assert f.users.get_by_email(f.db, f.owner.email).id == f.owner.id
+    assert f.users.get_by_username(f.db, "khong-ton-tai") is None
+    assert f.users.authenticate(f.db, f.owner.username, "secret1").id == f.owner.id
+    assert f.users.authenticate(f.db, f.owner.username, "sai") is None
+
+
+def test_user_update_and_password(f):
+    f.users.update(f.db, db_obj=f.users.get(f.db, f.owner.id), obj_in={"full_name": "Owner"})
+    assert f.users.get(f.db, f.owner.id).full_name == "Owner"
+    f.users.update_password(f.db, f.users.get(f.db, f.owner.id), "secret2")
+    assert f.users.authenticate(f.db, f.owner.username, "secret2") is not None
+
+
+def test_boards_listing(f):
+    public = f.boards.create(f.db, obj_in={"name": "Public", "owner_id": f.other.id, "is_public": True})
+    assert [b.id for b in f.boards.get_by_owner(f.db, f.owner.id)] == [f.board.id]
+    assert public.id in [b.id for b in f.boards.get_public_boards(f.db)]
+    assert f.board.id not in [b.id for b in f.boards.get_public_boards(f.db)]
+    assert {f.board.id, public.id} <= {b.id for b in f.boards.get_all(f.db)}
+
+
+def test_board_update_bumps_version(f):
+    board = f.boards.get(f.db, f.board.id)
+    version = board.version
+    updated = f.boards.update(f.db, db_obj=board, obj_in={"name": "Renamed"})
+    assert updated.name == "Renamed" and updated.version == version + 1
+    assert f.boards.get(f.db, f.board.id).name == "Renamed"
+
+
+def test_stale_version_rejected(f):
+    task = f.tasks.get(f.db, f.task_ids[0])
+    with pytest.raises(ConcurrentUpdateError):
+        f.tasks.update(f.db, db_obj=task, obj_in={"title": "x"}, expected_version=task.version + 5)
+    f.db.rollback()
+    assert f.tasks.get(f.db, f.task_ids[0]).title != "x"
+
+
+def test_columns_ordered(f):
+    assert f.column(StatusEnum.todo) == f.task_ids[:4]
+    assert f.column(StatusEnum.done) == f.task_ids[4:]
+    assert f.column(StatusEnum.in_progress) == []
+    assert f.tasks.next_position(f.db, f.board.id, StatusEnum.todo) == 4
+    counts = f.tasks.count_by_status(f.db, f.board.id)
+    assert counts == {StatusEnum.todo: 4, StatusEnum.in_progress: 0, StatusEnum.done: 2}, counts
+    assert f.tasks.count_by_board(f.db, f.board.id) == 6
+    count, version_sum = f.tasks.column_state(f.db, f.board.id, StatusEnum.todo)
+    assert (count, version_sum) == (4, sum(f.tasks.get(f.db, task_id).version for task_id in f.task_ids[:4]))
+    assert f.tasks.column_state(f.db, f.board.id, StatusEnum.in_progress) == (0, 0)
+    by_board = f.tasks.get_by_board(f.db, f.board.id, priority=PriorityEnum.high)
+    assert sorted(task.id for task in by_board) == [f.task_ids[0], f.task_ids[5]]
+
+
+def test_column_keyset_pages(f):
+    first = f.tasks.get_column_page(f.db, f.board.id, StatusEnum.todo, limit=2)
+    assert [t.id for t in first] == f.task_ids[:3]  # limit + 1
+    cursor = (first[1].position, first[1].id)
+    second = f.tasks.get_column_page(f.db, f.board.id, StatusEnum.todo, limit=2, after=cursor)
+    assert [t.id for t in second] == f.task_ids[2:4]
+
+
+def test_move_task_appends_to_column(f):
+    moved = f.tasks.move_task(f.db, f.task_ids[0], StatusEnum.done)
+    assert moved.status == StatusEnum.done and moved.position == 2
+    assert f.column(StatusEnum.done)[-1] == f.task_ids[0]
+    assert f.task_ids[0] not in f.column(StatusEnum.todo)
+    assert f.tasks.move_task(f.db, 10 ** 9, StatusEnum.done) is None
+
+
+def test_reorder_column(f):
+    new_order = list(reversed(f.task_ids[:4]))
+    f.tasks.reorder_column(f.db, f.board.id, StatusEnum.todo, new_order)
+    assert f.column(StatusEnum.todo) == new_order
+    assert [f.tasks.get(f.db, task_id).position for task_id in new_order] == [0, 1, 2, 3]
+    with pytest.raises(ValueError):
+        f.tasks.reorder_column(f.db, f.board.id, StatusEnum.todo, new_order[:2])
+
+
+def test_search(f):
+    assert sorted(t.id for t in f.tasks.search_tasks(f.db, "deploy", board_id=f.board.id)) == f.task_ids[1::2]
+    assert [t.id for t in f.tasks.search_tasks(f.db, "làm gấp", board_id=f.board.id)] == [f.task_ids[0]]
+    assert f.tasks.search_tasks(f.db, "không có", board_id=f.board.id) == []
+    f.tasks.update(f.db, db_obj=f.tasks.get(f.db, f.task_ids[1]), obj_in={"title": "Renamed"})
+    assert f.task_ids[1] not in [t.id for t in f.tasks.search_tasks(f.db, "deploy", board_id=f.board.id)]
+
+
+def test_stats(f):
+    stats = f.stats.get(f.db, f.board.id)
+    assert (stats.total_count, stats.todo_count, stats.done_count) == (6, 4, 2)
+    assert (stats.high_count, stats.low_count, stats.medium_count) == (2, 2, 2)
+    assert stats.unassigned_count == 4
+    assert f.stats.get_assignee_counts(f.db, f.board.id) == {f.other.id: 2}
+    assert f.stats.get_task_counts(f.db, [f.board.id]) == {f.board.id: 6}
+    f.tasks.delete(f.db, id=f.task_ids[2])
+    assert f.stats.get_task_counts(f.db, [f.board.id]) == {f.board.id: 5}
+
+
+def test_assigned_tasks(f):
+    assert sorted(t.id for t in f.tasks.get_by_assigned_user(f.db, f.other.id)) == f.task_ids[:2]
+
+
+def test_transitions(f):
+    f.tasks.move_task(f.db, f.task_ids[1], StatusEnum.in_progress)
+    rows = f.tasks.get_transition_rows(f.db, f.board.id, until=datetime.utcnow() + timedelta(minutes=1))
+    assert [(row[0], row[1]) for row in rows if row[0] == f.task_ids[1]] == [(f.task_ids[1], 0), (f.task_ids[1], 1)]
+
+
+def test_soft_delete_and_purge(f):
+    board = f.boards.get(f.db, f.board.id)
+    f.boards.soft_delete(f.db, board)
+    assert f.boards.get(f.db, f.board.id) is None
+    assert f.board.id not in [b.id for b in f.boards.get_by_owner(f.db, f.owner.id)]
+    assert f.tasks.get_by_assigned_user(f.db, f.other.id) == []
+    assert f.board.id in f.boards.get_deleted_ids(f.db)
+    chunks = []
+    assert f.boards.purge(f.db, f.board.id, chunk_size=4, on_chunk=chunks.append) == 6
+    assert chunks and chunks[-1] == 6
+    assert f.tasks.get(f.db, f.task_ids[0]) is None
+    assert f.board.id not in f.boards.get_deleted_ids(f.db)
+
+
+def test_delete_board_cascades(f):
+    f.boards.delete(f.db, id=f.board.id)
+    assert f.boards.get(f.db, f.board.id) is None
+    assert all(f.tasks.get(f.db, task_id) is None for task_id in f.task_ids)
+
+
+def test_delete_user_cascades(f):
+    f.users.delete(f.db, id=f.other.id)
+    assert f.users.get(f.db, f.other.id) is None
+    assert f.tasks.get(f.db, f.task_ids[0]).assigned_to is None
+    assert f.stats.get(f.db, f.board.id).unassigned_count == 6
+    f.users.delete(f.db, id=f.owner.id)
+    assert f.boards.get(f.db, f.board.id) is None
+    assert f.tasks.get(f.db, f.task_ids[0]) is None
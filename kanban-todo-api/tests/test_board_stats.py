@@ -0,0 +1,74 @@
+"""board_stats cập nhật bằng delta phải khớp với việc đếm lại từ bảng tasks"""
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal, board_stats_repository, task_repository
+
+STATS_COLUMNS = (
+    "total_count", "todo_count", "in_progress_count", "done_count",
+    "low_count", "medium_count", "high_count", "unassigned_count", "overdue_count",
+)
+
+
+def incremental_and_recount(board_id):
+    """(stats + assignee hiện tại, stats + assignee đếm lại); phần đếm lại bị rollback"""
+    with SessionLocal() as db:
+        stats = board_stats_repository.get(db, board_id)
+        current = ({key: getattr(stats, key) for key in STATS_COLUMNS},
+                   board_stats_repository.get_assignee_counts(db, board_id))
+    with SessionLocal() as db:
+        stats = board_stats_repository.reconcile_board(db, board_id)
+        recounted = ({key: getattr(stats, key) for key in STATS_COLUMNS},
+                     board_stats_repository.get_assignee_counts(db, board_id))
+        db.rollback()
+    return current, recounted
+
+
+def test_deltas_match_recount(client, owner, other_user, board):
+    headers = owner["headers"]
+
+    def create(**fields):
+        response = client.post("/tasks/", json={"title": "T", "board_id": board["id"], **fields}, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    ids = [create(priority=priority, status=status) for priority, status in [
+        ("low", "todo"), ("medium", "todo"), ("high", "in_progress"), ("high", "done"), ("low", "todo"),
+    ]]
+    with SessionLocal() as db:
+        overdue = task_repository.create(db, obj_in={
+            "title": "Quá hạn", "board_id": board["id"], "due_date": datetime.utcnow() - timedelta(days=1),
+        }).id
+    current, recounted = incremental_and_recount(board["id"])
+    assert current == recounted
+
+    steps = [
+        ("PATCH", f"/tasks/{ids[0]}/move", {"status": "done"}),
+        ("PATCH", f"/tasks/{ids[1]}/move", {"status": "in_progress", "position": 0}),
+        ("PUT", f"/tasks/{ids[2]}", {"priority": "low"}),
+        ("PATCH", f"/tasks/{ids[3]}/assign", {"assigned_to": owner["id"]}),
+        ("PATCH", f"/tasks/{ids[4]}/assign", {"assigned_to": owner["id"]}),
+        ("PATCH", f"/tasks/{ids[4]}/assign", {"assigned_to": None}),
+        ("PATCH", f"/tasks/{overdue}/move", {"status": "done"}),
+        ("DELETE", f"/tasks/{ids[1]}", None),
+        ("DELETE", f"/tasks/{overdue}", None),
+    ]
+    for method, url, body in steps:
+        response = client.request(method, url, json=body, headers=headers)
+        assert response.status_code == 200, (url, response.text)
+        current, recounted = incremental_and_recount(board["id"])
+        assert current == recounted, (method, url)
+
+    stats, by_assignee = current
+    assert stats["total_count"] == 4
+    assert by_assignee == {owner["id"]: 1}
+
+
+def test_stats_endpoint_matches_tasks(client, owner, board):
+    for status in ("todo", "todo", "done"):
+        client.post("/tasks/", json={"title": "T", "board_id": board["id"], "status": status}, headers=owner["headers"])
+    response = client.get(f"/boards/{board['id']}/stats", headers=owner["headers"])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 3
+    assert body["by_status"] == {"todo": 2, "in_progress": 0, "done": 1}
+    assert body["by_assignee"] == {"unassigned": 3}
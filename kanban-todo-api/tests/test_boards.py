@@ -0,0 +1,191 @@
+"""Router /boards"""
+import pytest
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.database.models import BoardStats
+
+
+def create_task(client, user, board, **fields):
+    response = client.post("/tasks/", json={"title": "Task", "board_id": board["id"], **fields}, headers=user["headers"])
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_delete_counts_tasks_not_stats(client, owner, board):
+    create_task(client, owner, board)
+    create_task(client, owner, board, status="done")
+    # board_stats lệch không ảnh hưởng số task báo về khi xóa
+    with SessionLocal() as db:
+        db.execute(update(BoardStats).where(BoardStats.board_id == board["id"]).values(total_count=99))
+        db.commit()
+    response = client.delete(f"/boards/{board['id']}", headers=owner["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()["deleted_tasks_count"] == 2
+
+
+def column(client, user, board, status="todo"):
+    response = client.get(f"/boards/{board['id']}/columns/{status}", headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response
+
+
+def reorder(client, user, board, task_ids, status="todo"):
+    return client.put(
+        f"/boards/{board['id']}/columns/{status}/order", json={"task_ids": task_ids}, headers=user["headers"]
+    )
+
+
+def test_reorder_column(client, owner, board):
+    ids = [create_task(client, owner, board)["id"] for _ in range(3)]
+    before = column(client, owner, board).headers["ETag"]
+    response = reorder(client, owner, board, ids[::-1])
+    assert response.status_code == 200, response.text
+    page = column(client, owner, board)
+    assert [task["id"] for task in page.json()["tasks"]] == ids[::-1]
+    assert [task["position"] for task in page.json()["tasks"]] == [0, 1, 2]
+    # Version các task tăng -> ETag của cột đổi
+    assert page.headers["ETag"] != before
+
+
+def test_reorder_rejects_duplicate_ids(client, owner, board):
+    ids = [create_task(client, owner, board)["id"] for _ in range(2)]
+    response = reorder(client, owner, board, [ids[0], ids[0], ids[1]])
+    assert response.status_code == 422
+    assert "trùng" in response.text
+
+
+def test_reorder_rejects_ids_outside_column(client, owner, board):
+    ids = [create_task(client, owner, board)["id"] for _ in range(2)]
+    done = create_task(client, owner, board, status="done")["id"]
+    other_board = client.post("/boards/", json={"name": "Khác"}, headers=owner["headers"]).json()
+    foreign = create_task(client, owner, other_board)["id"]
+
+    for task_ids in ([*ids, done], [*ids, foreign], ids[:1]):
+        response = reorder(client, owner, board, task_ids)
+        assert response.status_code == 400, task_ids
+    assert [task["id"] for task in column(client, owner, board).json()["tasks"]] == ids
+
+
+def test_reorder_requires_owner(client, owner, other_user, board):
+    ids = [create_task(client, owner, board)["id"] for _ in range(2)]
+    assert reorder(client, other_user, board, ids[::-1]).status_code == 403
+
+
+def test_reorder_writes_in_chunks(owner, board, monkeypatch):
+    from app.database import instrumentation, engine, task_repository
+    from app.database.models import StatusEnum, Task
+
+    with SessionLocal() as db:
+        ids = [task_repository.create(db, obj_in={"title": f"T{i}", "board_id": board["id"], "position": i}).id
+               for i in range(5)]
+    monkeypatch.setattr(type(task_repository), "REORDER_CHUNK_SIZE", 2)
+    updates = []
+
+    def observe(statement, parameters, context, duration):
+        if statement.lstrip().upper().startswith("UPDATE TASKS"):
+            updates.append(statement)
+
+    instrumentation.install(engine)
+    instrumentation.add_query_observer(observe)
+    try:
+        with SessionLocal() as db:
+            task_repository.reorder_column(db, board["id"], StatusEnum.todo, ids[::-1])
+    finally:
+        instrumentation.remove_query_observer(observe)
+    assert len(updates) == 3
+    with SessionLocal() as db:
+        rows = db.query(Task.id, Task.position).filter(Task.board_id == board["id"]).order_by(Task.position).all()
+    assert [task_id for task_id, _ in rows] == ids[::-1]
+    assert [position for _, position in rows] == list(range(5))
+
+
+def test_reorder_recount_guard(owner, board):
+    from app.database import task_repository
+    from app.database.models import StatusEnum, Task
+
+    with SessionLocal() as db:
+        ids = [task_repository.create(db, obj_in={"title": f"T{i}", "board_id": board["id"], "position": i}).id
+               for i in range(3)]
+
+    db = SessionLocal()
+    execute = db.execute
+    inserted = []
+
+    def execute_with_concurrent_insert(statement, *args, **kwargs):
+        # Một task được thêm vào cột giữa lúc kiểm tra task_ids và lúc ghi position
+        if statement.is_dml and not inserted:
+            with SessionLocal() as other:
+                other.add(Task(title="late", board_id=board["id"], status=StatusEnum.todo, position=0))
+                other.commit()
+            inserted.append(True)
+        return execute(statement, *args, **kwargs)
+
+    db.execute = execute_with_concurrent_insert
+    try:
+        with pytest.raises(ValueError, match="thay đổi"):
+            task_repository.reorder_column(db, board["id"], StatusEnum.todo, ids[::-1])
+    finally:
+        db.close()
+    # Rollback: position cũ giữ nguyên
+    with SessionLocal() as db:
+        positions = dict(db.query(Task.id, Task.position).filter(Task.id.in_(ids)).all())
+    assert positions == {task_id: index for index, task_id in enumerate(ids)}
+
+
+def board_etag(client, user, board):
+    response = client.get(f"/boards/{board['id']}", headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response.headers["ETag"]
+
+
+@pytest.mark.parametrize("if_match, expected", [
+    (None, 200),
+    ("*", 200),
+    ('"{version}"', 200),
+    ('W/"{version}"', 200),
+    ('"{stale}"', 412),
+    ('"abc"', 412),
+])
+def test_update_if_match(client, owner, board, if_match, expected):
+    headers = dict(owner["headers"])
+    if if_match is not None:
+        headers["If-Match"] = if_match.format(version=board["version"], stale=board["version"] + 1)
+    response = client.put(f"/boards/{board['id']}", json={"name": "Đổi tên"}, headers=headers)
+    assert response.status_code == expected, response.text
+    if expected == 200:
+        assert response.headers["ETag"] == f'"{board["version"] + 1}"'
+    else:
+        assert board_etag(client, owner, board) == f'"{board["version"]}"'
+
+
+def test_delete_with_stale_if_match(client, owner, board):
+    etag = board_etag(client, owner, board)
+    assert client.put(f"/boards/{board['id']}", json={"name": "Đổi"}, headers=owner["headers"]).status_code == 200
+    response = client.delete(f"/boards/{board['id']}", headers={**owner["headers"], "If-Match": etag})
+    assert response.status_code == 412
+    response = client.delete(
+        f"/boards/{board['id']}", headers={**owner["headers"], "If-Match": board_etag(client, owner, board)}
+    )
+    assert response.status_code == 200
+
+
+def test_concurrent_board_write_between_read_and_update(client, owner, board, monkeypatch):
+    from app.database import board_repository
+
+    etag = board_etag(client, owner, board)
+    update = board_repository.update
+
+    def update_after_concurrent_write(db, *, db_obj, obj_in, **kwargs):
+        # Request khác đổi board sau khi router đã đọc version, trước câu UPDATE có điều kiện
+        with SessionLocal() as other:
+            update(other, db_obj=board_repository.get(other, board["id"]), obj_in={"name": "Ghi trước"})
+        return update(db, db_obj=db_obj, obj_in=obj_in, **kwargs)
+
+    monkeypatch.setattr(board_repository, "update", update_after_concurrent_write)
+    response = client.put(
+        f"/boards/{board['id']}", json={"name": "Ghi sau"}, headers={**owner["headers"], "If-Match": etag}
+    )
+    assert response.status_code == 412
+    monkeypatch.undo()
+    assert client.get(f"/boards/{board['id']}", headers=owner["headers"]).json()["name"] == "Ghi trước"
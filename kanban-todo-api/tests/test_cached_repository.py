@@ -0,0 +1,32 @@
+"""Backend sql_cached: board/task đọc qua cache, user (xác thực) luôn đọc database"""
+from sqlalchemy import update
+
+from app.database import SessionLocal, create_backend
+from app.database.models import User
+from tests.conftest import create_user
+
+
+def test_user_changes_from_another_worker_apply_immediately(database):
+    backend = create_backend("sql_cached")
+    user = create_user()
+    with SessionLocal() as db:
+        assert backend.user_repository.get(db, user["id"]).is_active
+    # Ghi thẳng vào database, không qua wrapper (như worker khác khóa user)
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user["id"]).values(is_active=False, role="admin"))
+        db.commit()
+    with SessionLocal() as db:
+        fresh = backend.user_repository.get(db, user["id"])
+        assert (fresh.is_active, fresh.role) == (False, "admin")
+    assert backend.user_repository.cache.hits == backend.user_repository.cache.misses == 0
+
+
+def test_board_reads_are_cached(owner):
+    backend = create_backend("sql_cached")
+    with SessionLocal() as db:
+        board = backend.board_repository.create(db, obj_in={"name": "Cached", "owner_id": owner["id"]})
+    for _ in range(2):
+        with SessionLocal() as db:
+            assert backend.board_repository.get(db, board.id).name == "Cached"
+    cache = backend.board_repository.cache
+    assert (cache.misses, cache.hits) == (1, 1)
@@ -0,0 +1,131 @@
+"""Job nền: retry với backoff, đưa lại job có heartbeat cũ, GET /jobs/{id}"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.jobs import JobRunner
+from app.database import SessionLocal, job_repository
+from app.database.models import Job, JobStatusEnum
+
+# Job của test chạy trước mọi job khác còn trong bảng
+PRIORITY = 1000
+
+
+@pytest.fixture(autouse=True)
+def app_job_runner_stopped():
+    """Job runner của app không được nhận job của test"""
+    from app.core.jobs import job_runner
+
+    was_running = job_runner.running
+    job_runner.stop()
+    yield
+    if was_running:
+        job_runner.start()
+
+
+@pytest.fixture
+def runner(database):
+    return JobRunner(SessionLocal, workers=1, max_attempts=3, retry_backoff_seconds=5, stale_after_seconds=60)
+
+
+def load(job_id):
+    with SessionLocal() as db:
+        return job_repository.get(db, job_id)
+
+
+def claim_and_run(runner):
+    [job] = runner._claim(1)
+    runner._execute(job)
+    return load(job.id)
+
+
+def make_due(job_id):
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == job_id).values(run_after=datetime.utcnow()))
+        db.commit()
+
+
+def test_success_records_result_and_progress(runner):
+    def handler(db, payload, progress):
+        progress(0.5)
+        return {"double": payload["value"] * 2}
+
+    runner.register("test.ok", handler)
+    with SessionLocal() as db:
+        job_id = runner.enqueue(db, "test.ok", {"value": 21}, priority=PRIORITY).id
+    job = claim_and_run(runner)
+    assert job.id == job_id
+    assert (job.status, job.result, job.progress, job.attempts) == (JobStatusEnum.succeeded, {"double": 42}, 1.0, 1)
+    assert job.locked_by is None
+
+
+def test_retry_with_exponential_backoff(runner):
+    def handler(db, payload, progress):
+        raise RuntimeError("boom")
+
+    runner.register("test.flaky", handler)
+    with SessionLocal() as db:
+        job_id = runner.enqueue(db, "test.flaky", priority=PRIORITY).id
+
+    for attempt, delay in ((1, 5), (2, 10)):
+        before = datetime.utcnow()
+        job = claim_and_run(runner)
+        assert (job.status, job.attempts, job.error) == (JobStatusEnum.queued, attempt, "RuntimeError: boom")
+        # Lần retry sau chờ backoff * 2 ** (attempts - 1)
+        assert before + timedelta(seconds=delay - 1) <= job.run_after <= datetime.utcnow() + timedelta(seconds=delay)
+        make_due(job_id)
+
+    job = claim_and_run(runner)
+    assert (job.status, job.attempts) == (JobStatusEnum.failed, 3)
+    assert job.finished_at is not None
+
+
+def test_unknown_kind_fails_without_retry(runner):
+    runner.register("test.removed", lambda db, payload, progress: None)
+    with SessionLocal() as db:
+        job_id = runner.enqueue(db, "test.removed", priority=PRIORITY).id
+    del runner._handlers["test.removed"]
+    job = claim_and_run(runner)
+    assert (job.id, job.status, job.attempts) == (job_id, JobStatusEnum.failed, 1)
+
+
+def test_stale_heartbeat_is_requeued(runner):
+    with SessionLocal() as db:
+        dead = job_repository.create(db, "test.stale", priority=PRIORITY)
+        alive = job_repository.create(db, "test.stale", priority=PRIORITY)
+        claimed = job_repository.claim_next(db, 2, worker_id="dead-worker")
+        assert {job.id for job in claimed} == {dead.id, alive.id}
+        db.execute(update(Job).where(Job.id == dead.id).values(heartbeat_at=datetime.utcnow() - timedelta(minutes=5)))
+        db.execute(update(Job).where(Job.id == alive.id).values(locked_by=runner.worker_id))
+        db.commit()
+
+    # Heartbeat của runner giữ job của nó, job của worker đã chết được đưa lại hàng đợi
+    runner._heartbeat()
+    dead, alive = load(dead.id), load(alive.id)
+    assert (dead.status, dead.attempts, dead.locked_by) == (JobStatusEnum.queued, 0, None)
+    assert (alive.status, alive.locked_by) == (JobStatusEnum.running, runner.worker_id)
+
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == alive.id).values(status=JobStatusEnum.succeeded))
+        db.execute(update(Job).where(Job.id == dead.id).values(status=JobStatusEnum.failed))
+        db.commit()
+
+
+def test_get_job(client, owner, other_user, admin):
+    with SessionLocal() as db:
+        job_id = job_repository.create(db, "test.visible", {"x": 1}, created_by=owner["id"]).id
+
+    response = client.get(f"/jobs/{job_id}", headers=owner["headers"])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["id"], body["kind"], body["status"], body["attempts"]) == (job_id, "test.visible", "queued", 0)
+    assert client.get(f"/jobs/{job_id}", headers=admin["headers"]).status_code == 200
+    # Người khác không thấy job (404, không lộ là job tồn tại)
+    assert client.get(f"/jobs/{job_id}", headers=other_user["headers"]).status_code == 404
+    assert client.get("/jobs/999999", headers=owner["headers"]).status_code == 404
+    assert client.get(f"/jobs/{job_id}").status_code == 403
+
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == job_id).values(status=JobStatusEnum.failed))
+        db.commit()
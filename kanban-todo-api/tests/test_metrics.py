@@ -0,0 +1,101 @@
+"""/metrics: định dạng Prometheus text, label theo route template, histogram, pool theo engine"""
+import re
+
+from app.core.metrics import CONTENT_TYPE, DEFAULT_BUCKETS, Registry, resolve_route
+
+SAMPLE = re.compile(
+    r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)'
+    r'(?P<labels>\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})?'
+    r' (?P<value>-?[0-9.e+-]+|\+Inf)$'
+)
+
+
+def parse(text):
+    """{tên metric: TYPE} và danh sách (tên, {label: value}, value) của các sample"""
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, type_name = line.split(" ")
+            types[name] = type_name
+            continue
+        if line.startswith("# HELP ") or not line:
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"dòng sai định dạng: {line!r}"
+        labels = dict(re.findall(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"', match["labels"] or ""))
+        samples.append((match["name"], labels, float(match["value"])))
+    return types, samples
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    return parse(response.text)
+
+
+def test_scrape_after_request(client, owner, board):
+    assert client.get(f"/boards/{board['id']}", headers=owner["headers"]).status_code == 200
+    types, samples = scrape(client)
+
+    # Mọi sample thuộc một metric đã khai báo TYPE (histogram có hậu tố _bucket/_sum/_count)
+    for name, _, _ in samples:
+        base = re.sub(r"_(bucket|sum|count)$", "", name)
+        assert name in types or types.get(base) == "histogram", name
+
+    route = {"method": "GET", "route": "/boards/{board_id}"}
+    requests = [value for name, labels, value in samples
+                if name == "http_requests_total" and labels == {**route, "status": "200"}]
+    assert requests and requests[0] >= 1
+    # Không có label theo path thật
+    assert not any(labels.get("route") == f"/boards/{board['id']}" for _, labels, _ in samples)
+
+    buckets = [(labels["le"], value) for name, labels, value in samples
+               if name == "http_request_duration_seconds_bucket"
+               and {key: labels[key] for key in ("method", "route")} == route]
+    assert [le for le, _ in buckets] == [format(b, "g") for b in DEFAULT_BUCKETS] + ["+Inf"]
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)
+    count = next(value for name, labels, value in samples
+                 if name == "http_request_duration_seconds_count" and labels == route)
+    assert counts[-1] == count
+
+
+def test_pool_metrics_per_engine(client):
+    from app.database import replica_engines, shard_engines, sqlite_write_queue
+
+    types, samples = scrape(client)
+    assert types["db_pool_checked_out"] == "gauge"
+    engines = {labels["engine"] for name, labels, _ in samples if name == "db_pool_checked_out"}
+    expected = {"primary", *(f"replica_{i}" for i in range(len(replica_engines)))}
+    expected |= {f"shard_{name}" for name in shard_engines if name != "0"}
+    if sqlite_write_queue is not None:
+        expected.add("write_queue")
+    assert engines == expected
+
+
+def test_resolve_route(client):
+    from main import app
+
+    def scope(method, path):
+        return {"type": "http", "method": method, "path": path, "root_path": "", "app": app}
+
+    assert resolve_route(scope("GET", "/boards/12"))[0] == "/boards/{board_id}"
+    assert resolve_route(scope("PATCH", "/tasks/3/move"))[0] == "/tasks/{task_id}/move"
+    assert resolve_route(scope("GET", "/khong-co"))[0] == "unmatched"
+
+
+def test_histogram_render():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "/x")
+    types, samples = parse(registry.render())
+    assert types == {"latency_seconds": "histogram"}
+    assert samples == [
+        ("latency_seconds_bucket", {"route": "/x", "le": "0.1"}, 2),
+        ("latency_seconds_bucket", {"route": "/x", "le": "1"}, 3),
+        ("latency_seconds_bucket", {"route": "/x", "le": "+Inf"}, 4),
+        ("latency_seconds_sum", {"route": "/x"}, 3.65),
+        ("latency_seconds_count", {"route": "/x"}, 4),
+    ]
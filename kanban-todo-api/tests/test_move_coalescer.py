@@ -0,0 +1,109 @@
+"""Gộp move: N move -> một UPDATE, deferred trả 202, wait hết giờ -> 503, task bị xóa -> 404"""
+import functools
+import threading
+import time
+
+import pytest
+
+from app.core import move_coalescer as coalescer_module
+from app.core.move_coalescer import MoveCoalescer
+from app.database import SessionLocal, board_repository, engine, instrumentation, task_repository
+from app.database.models import StatusEnum
+
+
+@pytest.fixture
+def use_coalescer(monkeypatch):
+    """Thay bộ gộp move của app bằng bộ mới (mode, window) và dừng nó sau test"""
+    started = []
+
+    def start(mode, window_ms):
+        coalescer = MoveCoalescer(SessionLocal, window_ms=window_ms, mode=mode)
+        monkeypatch.setattr(coalescer_module.settings, "move_coalescing_mode", mode)
+        monkeypatch.setattr(coalescer_module, "move_coalescer", coalescer)
+        coalescer.start()
+        started.append(coalescer)
+        return coalescer
+
+    yield start
+    for coalescer in started:
+        coalescer.stop()
+
+
+def create_task(client, user, board, **fields):
+    response = client.post("/tasks/", json={"title": "Task", "board_id": board["id"], **fields}, headers=user["headers"])
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def move(client, user, task, status, position=None):
+    return client.patch(f"/tasks/{task['id']}/move", json={"status": status, "position": position}, headers=user["headers"])
+
+
+def test_moves_coalesce_into_one_update(database, owner):
+    with SessionLocal() as db:
+        board_id = board_repository.create(db, obj_in={"name": "Coalesce", "owner_id": owner["id"]}).id
+        task = task_repository.create(db, obj_in={"title": "T", "board_id": board_id})
+
+    coalescer = MoveCoalescer(SessionLocal, window_ms=10000, mode="deferred")
+    updates = []
+
+    def observe(statement, parameters, context, duration):
+        if statement.lstrip().upper().startswith("UPDATE TASKS"):
+            updates.append(statement)
+
+    instrumentation.install(engine)
+    coalescer.start()
+    instrumentation.add_query_observer(observe)
+    try:
+        with SessionLocal() as db:
+            for status, position in [("in_progress", None), ("done", 3), ("todo", 0), ("in_progress", 2)]:
+                pending = coalescer.submit(db, task, StatusEnum(status), position)
+        # stop() ghi nốt move đang chờ
+        coalescer.stop()
+    finally:
+        instrumentation.remove_query_observer(observe)
+
+    assert (coalescer.writes, coalescer.merged, pending.merged) == (1, 3, 4)
+    assert len(updates) == 1
+    with SessionLocal() as db:
+        stored = task_repository.get(db, task.id)
+        assert (stored.status, stored.position) == (StatusEnum.in_progress, 2)
+
+
+def test_deferred_returns_202_without_version(client, owner, board, use_coalescer):
+    coalescer = use_coalescer("deferred", 10000)
+    task = create_task(client, owner, board)
+    response = move(client, owner, task, "done", 0)
+    assert response.status_code == 202
+    assert response.json() == {"id": task["id"], "board_id": board["id"], "status": "done", "position": 0}
+    assert response.headers["Location"] == f"/tasks/{task['id']}"
+    assert "ETag" not in response.headers
+
+    coalescer.stop()
+    stored = client.get(f"/tasks/{task['id']}", headers=owner["headers"])
+    assert stored.json()["status"] == "done"
+    assert stored.json()["version"] == task["version"] + 1
+    assert stored.headers["ETag"]
+
+
+def test_wait_timeout_returns_503(client, owner, board, use_coalescer, monkeypatch):
+    coalescer = use_coalescer("wait", 10000)
+    monkeypatch.setattr(coalescer, "wait", functools.partial(MoveCoalescer.wait, coalescer, timeout=0.05))
+    task = create_task(client, owner, board)
+    response = move(client, owner, task, "done")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_wait_for_deleted_task_returns_404(client, owner, board, use_coalescer):
+    use_coalescer("wait", 300)
+    task = create_task(client, owner, board)
+    responses = []
+    request = threading.Thread(target=lambda: responses.append(move(client, owner, task, "done")))
+    request.start()
+    time.sleep(0.1)
+    # Task bị xóa trong cửa sổ gộp
+    with SessionLocal() as db:
+        task_repository.delete(db, id=task["id"])
+    request.join(5)
+    assert responses[0].status_code == 404
@@ -0,0 +1,87 @@
+"""SQL profiler: phát hiện N+1, header X-Query-Count/Server-Timing, chỉ admin bật được"""
+import os
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text, update
+
+from app.core import profiling
+from app.core.profiling import QueryProfile, QueryProfilerMiddleware, QueryRecord, statement_shape
+from app.database import SessionLocal, instrumentation
+from app.database.models import User
+
+PROFILE = {"X-Profile-SQL": "1"}
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT *  FROM tasks\n WHERE id = 12") == "SELECT * FROM tasks WHERE id = ?"
+    assert statement_shape("SELECT * FROM tasks WHERE id IN (?, ?, ?)") == "SELECT * FROM tasks WHERE id IN (?)"
+
+
+def test_n_plus_one_detection():
+    profile = QueryProfile("GET", "/boards/")
+    profile.queries = [QueryRecord("SELECT * FROM boards", 1.0, "a")] + [
+        QueryRecord(f"SELECT * FROM tasks WHERE board_id = {i}", 0.5, "b") for i in range(3)
+    ]
+    [suspect] = profile.n_plus_one(threshold=3)
+    assert suspect == {
+        "statement": "SELECT * FROM tasks WHERE board_id = ?", "count": 3, "total_ms": 1.5, "call_sites": ["b"],
+    }
+    assert profile.n_plus_one(threshold=4) == []
+
+
+def test_middleware_headers_and_n_plus_one(monkeypatch):
+    monkeypatch.setattr(profiling.settings, "sql_profiling_enabled", True)
+    monkeypatch.setattr(profiling.settings, "sql_n_plus_one_threshold", 3)
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'profile.db')}")
+    instrumentation.install(engine)
+    instrumentation.add_query_observer(profiling.observe_query)
+
+    app = FastAPI()
+    app.add_middleware(QueryProfilerMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_items(item_id: int):
+        with engine.connect() as connection:
+            for child in range(4):
+                connection.execute(text(f"SELECT {item_id} + {child}"))
+        return {}
+
+    profiling.profile_store.reset()
+    response = TestClient(app).get("/items/1")
+    assert response.headers["X-Query-Count"] == "4"
+    assert response.headers["X-N-Plus-One"] == "1"
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="4 queries"')
+    [route] = profiling.profile_store.worst_routes()
+    assert (route["route"], route["n_plus_one_requests"]) == ("GET /items/{item_id}", 1)
+
+
+def test_admin_header_enables_profiling(client, admin):
+    response = client.get("/boards/", headers={**admin["headers"], **PROFILE})
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) >= 1
+    assert "Server-Timing" in response.headers
+    # Không có header thì không profile
+    assert "X-Query-Count" not in client.get("/boards/", headers=admin["headers"]).headers
+
+
+def test_non_admin_rejected_without_db_lookup(client, owner, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(profiling, "_is_active_admin", lambda user_id: lookups.append(user_id) or True)
+    for headers in (owner["headers"], {"Authorization": "Bearer rac"}, {}):
+        response = client.get("/boards/public", headers={**headers, **PROFILE})
+        assert "X-Query-Count" not in response.headers
+    assert lookups == []
+
+
+def test_demoted_admin_token_rejected(client):
+    from tests.conftest import create_user
+
+    demoted = create_user(role="admin")
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == demoted["id"]).values(role="user"))
+        db.commit()
+    response = client.get("/boards/public", headers={**demoted["headers"], **PROFILE})
+    assert "X-Query-Count" not in response.headers
@@ -0,0 +1,132 @@
+"""Số câu SQL của từng method ghi trong repository.
+
+Mỗi method chạy trên session mới với object đã được load sẵn giống như router
+(vd: router `get` task để kiểm tra quyền rồi mới gọi `update`), và chỉ đếm các
+câu lệnh phát sinh bên trong method (trên thread của test, bỏ qua worker nền).
+"""
+import threading
+from itertools import count
+
+import pytest
+
+from app.database import (
+    SessionLocal, engine, instrumentation,
+    user_repository, board_repository, task_repository,
+)
+from app.database.models import Board, StatusEnum, Task, User
+
+# Số câu lệnh tối đa cho mỗi method (gồm cả hook stats/transition)
+QUERY_BUDGETS = {
+    "user.create_user": 1,           # INSERT
+    "user.update": 1,                # UPDATE
+    "user.update_password": 1,       # UPDATE
+    "board.create": 2,               # INSERT board + INSERT board_stats
+    "board.update": 1,               # UPDATE ... RETURNING
+    "task.create": 3,                # INSERT task + UPDATE stats + INSERT transition
+    "task.update": 1,                # UPDATE ... RETURNING
+    "task.update_assignee": 4,       # UPDATE ... RETURNING + stats + assignee stats (+ INSERT lần đầu)
+    "task.move_task": 3,             # UPDATE + UPDATE stats + INSERT transition
+    "task.move_task_append": 4,      # + COUNT cho position cuối cột
+    "task.delete": 3,                # DELETE + UPDATE stats + INSERT transition
+    "user.delete": 10,               # DELETE (ON DELETE CASCADE/SET NULL) + reconcile board được gán
+    "board.delete": 2,               # DELETE (ON DELETE CASCADE) + dọn activity_log
+}
+
+_names = count()
+
+
+class StatementCounter:
+    """Observer ghi lại câu SQL chạy trên thread tạo ra nó"""
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.statements = []
+
+    def __call__(self, statement, parameters, context, duration):
+        if threading.get_ident() == self.thread_id:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        instrumentation.add_query_observer(self)
+        return self
+
+    def __exit__(self, *exc):
+        instrumentation.remove_query_observer(self)
+
+
+@pytest.fixture
+def data(database):
+    """Hai user, một board 5 task của owner và một board có task của other"""
+    instrumentation.install(engine)
+    suffix = next(_names)
+    with SessionLocal() as db:
+        owner = User(username=f"qc_owner{suffix}", password_hash="x")
+        other = User(username=f"qc_other{suffix}", password_hash="x")
+        db.add_all([owner, other])
+        db.commit()
+        owner_id, other_id = owner.id, other.id
+        board_id = board_repository.create(db, obj_in={"name": "Board", "owner_id": owner_id}).id
+        task_ids = [
+            task_repository.create(db, obj_in={"title": f"Task {i}", "board_id": board_id, "position": i}).id
+            for i in range(5)
+        ]
+        spare_board_id = board_repository.create(db, obj_in={"name": "Spare", "owner_id": other_id}).id
+        task_repository.create(db, obj_in={"title": "Spare task", "board_id": spare_board_id})
+    return {"owner_id": owner_id, "other_id": other_id, "board_id": board_id, "task_ids": task_ids, "suffix": suffix}
+
+
+def load_user(key):
+    return lambda db, data: db.get(User, data[key])
+
+
+def load_task(index):
+    return lambda db, data: db.get(Task, data["task_ids"][index])
+
+
+def load_board(db, data):
+    return db.get(Board, data["board_id"])
+
+
+def nothing(db, data):
+    return None
+
+
+CASES = [
+    ("user.create_user", nothing,
+     lambda db, _, data: user_repository.create_user(
+         db, {"username": f"qc_new{data['suffix']}", "password_hash": "x"})),
+    ("user.update", load_user("owner_id"),
+     lambda db, user, data: user_repository.update(db, db_obj=user, obj_in={"full_name": "Owner"})),
+    ("user.update_password", load_user("owner_id"),
+     lambda db, user, data: user_repository.update_password(db, user, "secret2")),
+    ("board.create", nothing,
+     lambda db, _, data: board_repository.create(db, obj_in={"name": "B2", "owner_id": data["owner_id"]})),
+    ("board.update", load_board,
+     lambda db, board, data: board_repository.update(db, db_obj=board, obj_in={"name": "Renamed"})),
+    ("task.create", nothing,
+     lambda db, _, data: task_repository.create(db, obj_in={"title": "T", "board_id": data["board_id"]})),
+    ("task.update", load_task(0),
+     lambda db, task, data: task_repository.update(db, db_obj=task, obj_in={"title": "Changed"})),
+    ("task.update_assignee", load_task(0),
+     lambda db, task, data: task_repository.update(db, db_obj=task, obj_in={"assigned_to": data["other_id"]})),
+    ("task.move_task", load_task(1),
+     lambda db, task, data: task_repository.move_task(db, task.id, StatusEnum.done, 0)),
+    ("task.move_task_append", load_task(2),
+     lambda db, task, data: task_repository.move_task(db, task.id, StatusEnum.in_progress)),
+    ("task.delete", load_task(3),
+     lambda db, task, data: task_repository.delete(db, id=task.id)),
+    ("user.delete", load_user("other_id"),
+     lambda db, user, data: user_repository.delete(db, id=user.id)),
+    ("board.delete", load_board,
+     lambda db, board, data: board_repository.delete(db, id=board.id)),
+]
+
+
+@pytest.mark.parametrize("name, prepare, action", CASES, ids=[case[0] for case in CASES])
+def test_query_budget(data, name, prepare, action):
+    with SessionLocal() as db:
+        loaded = prepare(db, data)
+        with StatementCounter() as counter:
+            action(db, loaded, data)
+    statements = "\n".join(" ".join(statement.split())[:110] for statement in counter.statements)
+    assert len(counter.statements) <= QUERY_BUDGETS[name], statements
@@ -0,0 +1,100 @@
+"""Rate limit: token bucket, shard theo key, client theo JWT hoặc IP"""
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import Budget, MemoryRateLimitBackend, RateLimiter
+from app.core.security import create_access_token
+
+ORIGIN = "http://localhost:3000"
+
+
+def test_budget_parse():
+    budget = Budget.parse("POST /auth/login", "20/60")
+    assert (budget.capacity, budget.rate, budget.refill_seconds) == (20, pytest.approx(1 / 3), pytest.approx(60))
+    assert Budget.parse("*", "5").rate == 5
+    for value in ("0/60", "10/0", "-1/1"):
+        with pytest.raises(ValueError):
+            Budget.parse("*", value)
+
+
+def test_bucket_refill():
+    backend = MemoryRateLimitBackend(shards=1)
+    budget = Budget.parse("*", "2/2")  # burst 2, một token mỗi giây
+    assert backend.take_nowait("k", budget, now=0.0) == 0
+    assert backend.take_nowait("k", budget, now=0.0) == 0
+    assert backend.take_nowait("k", budget, now=0.0) == pytest.approx(1.0)
+    assert backend.take_nowait("k", budget, now=0.5) == pytest.approx(0.5)
+    assert backend.take_nowait("k", budget, now=1.0) == 0
+    # Để lâu cũng chỉ đầy lại đến capacity
+    assert backend.take_nowait("k", budget, now=100.0) == 0
+    assert backend.take_nowait("k", budget, now=100.0) == 0
+    assert backend.take_nowait("k", budget, now=100.0) > 0
+
+
+def test_buckets_are_sharded_by_key():
+    backend = MemoryRateLimitBackend(shards=4)
+    budget = Budget.parse("*", "1/60")
+    keys = [f"*|user:{i}" for i in range(20)]
+    for key in keys:
+        assert backend.take_nowait(key, budget, now=0.0) == 0
+    # Key khác không dùng chung bucket, dù cùng shard
+    assert all(backend.take_nowait(key, budget, now=0.0) > 0 for key in keys)
+    assert backend.size() == len(keys)
+    for index, (_, buckets) in enumerate(backend._shards):
+        assert all(hash(key) % 4 == index for key in buckets)
+
+
+def test_full_buckets_are_evicted():
+    backend = MemoryRateLimitBackend(shards=1, max_keys=2)
+    budget = Budget.parse("*", "1/1")
+    backend.take_nowait("a", budget, now=0.0)
+    backend.take_nowait("b", budget, now=0.5)
+    # "a" đã đầy lại lúc 1.0 nên bị bỏ, "b" thì chưa
+    backend.take_nowait("c", budget, now=1.2)
+    assert backend.size() == 2
+    assert backend.take_nowait("b", budget, now=1.2) > 0
+
+
+def scope_with(headers=(), client=("10.0.0.1", 1234)):
+    return {"type": "http", "headers": list(headers), "client": client}
+
+
+def test_client_key_prefers_valid_jwt():
+    limiter = RateLimiter(MemoryRateLimitBackend(), {"*": "10/1"})
+    token = create_access_token(subject=42)
+    assert limiter.client_key(scope_with([(b"authorization", f"Bearer {token}".encode())])) == "user:42"
+    # Token sai hoặc scheme khác: tính theo IP
+    assert limiter.client_key(scope_with([(b"authorization", b"Bearer not-a-jwt")])) == "ip:10.0.0.1"
+    assert limiter.client_key(scope_with([(b"authorization", f"Basic {token}".encode())])) == "ip:10.0.0.1"
+    assert limiter.client_key(scope_with()) == "ip:10.0.0.1"
+    assert limiter.client_key(scope_with(client=None)) == "ip:unknown"
+
+
+def test_budget_by_route_template():
+    from main import app
+
+    limiter = RateLimiter(MemoryRateLimitBackend(), {"GET /boards/{board_id}": "3/60", "*": "10/1"})
+
+    def scope(method, path):
+        return {"type": "http", "method": method, "path": path, "root_path": "", "app": app}
+
+    assert limiter.budget_for(scope("GET", "/boards/7")).name == "GET /boards/{board_id}"
+    assert limiter.budget_for(scope("GET", "/boards/8")).name == "GET /boards/{board_id}"
+    assert limiter.budget_for(scope("PUT", "/boards/7")).name == "*"
+    assert RateLimiter(MemoryRateLimitBackend(), {}).budget_for(scope("GET", "/boards/7")) is None
+
+
+class ExhaustedBackend:
+    async def take(self, key, budget):
+        return 4.2
+
+
+def test_rejection_carries_cors_headers(client, owner, monkeypatch):
+    monkeypatch.setattr(rate_limit.get_rate_limiter(), "backend", ExhaustedBackend())
+    response = client.get("/boards/", headers={**owner["headers"], "Origin": ORIGIN})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+
+    preflight = client.options("/boards/", headers={"Origin": ORIGIN, "Access-Control-Request-Method": "GET"})
+    assert preflight.status_code == 200
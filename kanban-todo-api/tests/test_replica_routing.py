@@ -0,0 +1,120 @@
+"""Read-your-writes qua nhiều worker: cookie sticky của worker ghi được worker khác dùng.
+
+Primary và replica là hai file SQLite, replica được đồng bộ bằng
+`scripts/sync_sqlite_replicas.py` trước lần ghi (giả lập replication lag).
+Mỗi "worker" là một app có `ReplicaRouter` riêng, không chia sẻ trạng thái.
+"""
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.metrics import db_sessions_total
+from app.database.routing import STICKY_COOKIE, ReplicaRouter, StickyCookieMiddleware
+from scripts.sync_sqlite_replicas import sync
+
+
+def make_worker(primary: sessionmaker, replica: sessionmaker) -> FastAPI:
+    router = ReplicaRouter(primary, [replica], sticky_seconds=5)
+    app = FastAPI()
+    app.state.router = router
+    app.add_middleware(StickyCookieMiddleware)
+
+    def get_db(request: Request):
+        db = router.session_for(request)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.post("/items")
+    def create_item(db: Session = Depends(get_db)):
+        db.execute(text("INSERT INTO items DEFAULT VALUES"))
+        db.commit()
+        return {}
+
+    @app.get("/items")
+    def count_items(db: Session = Depends(get_db)):
+        return {"count": db.execute(text("SELECT COUNT(*) FROM items")).scalar()}
+
+    @app.post("/noop")
+    def noop(db: Session = Depends(get_db)):
+        return {"session": isinstance(db, Session)}
+
+    return app
+
+
+@pytest.fixture
+def workers(tmp_path):
+    primary_path, replica_path = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    engines = [create_engine(f"sqlite:///{path}") for path in (primary_path, replica_path)]
+    with engines[0].begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+    sync(primary_path, [replica_path])
+    checkouts = []
+    for engine in engines:
+        event.listen(engine, "checkout", lambda *args: checkouts.append(args))
+    primary, replica = (sessionmaker(bind=engine) for engine in engines)
+    apps = make_worker(primary, replica), make_worker(primary, replica)
+    for app in apps:
+        app.state.checkouts = checkouts
+    yield apps
+    for engine in engines:
+        engine.dispose()
+
+
+def read_count(client: TestClient, cookie=None) -> int:
+    client.cookies.clear()
+    if cookie is not None:
+        client.cookies.set(STICKY_COOKIE, cookie)
+    return client.get("/items").json()["count"]
+
+
+def test_write_on_one_worker_is_read_from_primary_on_another(workers):
+    writer, reader = (TestClient(app) for app in workers)
+    response = writer.post("/items")
+    assert response.status_code == 200
+    cookie = response.cookies[STICKY_COOKIE]
+
+    # Worker khác, client gửi lại cookie -> đọc primary, thấy bản ghi vừa tạo
+    assert read_count(reader, cookie) == 1
+    # Không có cookie -> replica chưa đồng bộ
+    assert read_count(reader) == 0
+
+
+def test_expired_or_forged_cookie_uses_replica(workers):
+    writer, reader = (TestClient(app) for app in workers)
+    until = float(writer.post("/items").cookies[STICKY_COOKIE])
+    assert read_count(reader, str(until - 60)) == 0
+    # Thời hạn dài hơn sticky_seconds không được tin
+    assert read_count(reader, str(until + 3600)) == 0
+    assert read_count(reader, "abc") == 0
+
+
+def test_read_does_not_set_cookie(workers):
+    reader = TestClient(workers[1])
+    assert STICKY_COOKIE not in reader.get("/items").cookies
+
+
+def test_unused_session_opens_no_connection(workers):
+    app = workers[0]
+    writer = TestClient(app)
+    response = writer.post("/noop")
+    # get_db trả về Session thật, nhưng route không chạm DB: không mở connection, không sticky
+    assert response.json() == {"session": True}
+    assert STICKY_COOKIE not in response.cookies
+    assert app.state.checkouts == []
+    assert app.state.router.routed == {"primary": 0, "replica": 0, "sticky": 0}
+
+    writer.post("/items")
+    assert len(app.state.checkouts) == 1
+    assert app.state.router.routed["primary"] == 1
+
+
+def test_request_without_db_access_counts_unused_session(client):
+    used, unused = db_sessions_total.value("true"), db_sessions_total.value("false")
+    # Token sai: get_current_user dừng trước khi đọc user
+    response = client.get("/boards/", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert (db_sessions_total.value("true"), db_sessions_total.value("false")) == (used, unused + 1)
@@ -0,0 +1,124 @@
+"""SingleFlight: follower dùng kết quả của leader, tự chạy khi leader lỗi hoặc quá chậm"""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.core.single_flight import SingleFlight, _frozen_build
+
+
+def run_concurrently(flight, fn, followers=3, timeout=None):
+    """Leader chạy `fn` (chờ `release`), sau đó `followers` request cùng key"""
+    started, release = threading.Event(), threading.Event()
+    results, errors = [], []
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(target):
+        try:
+            results.append(flight.do("key", target, timeout=timeout))
+        except Exception as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=call, args=(leader_fn,))
+    leader.start()
+    started.wait(5)
+    threads = [threading.Thread(target=call, args=(fn,)) for _ in range(followers)]
+    for thread in threads:
+        thread.start()
+    # Cho follower kịp vào hàng chờ trước khi test thả leader
+    time.sleep(0.1)
+    return leader, threads, release, results, errors
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight()
+    leader, threads, release, results, errors = run_concurrently(flight, object)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join()
+    assert not errors
+    assert sorted(role for _, role in results) == ["follower"] * len(threads) + ["leader"]
+    assert len({id(result) for result, _ in results}) == 1
+    assert flight.in_flight() == 0
+
+
+def test_follower_falls_back_after_timeout():
+    flight = SingleFlight()
+    leader, threads, release, results, errors = run_concurrently(flight, lambda: "value", timeout=0.05)
+    for thread in threads:
+        thread.join()
+    # Leader vẫn đang treo, follower đã tự chạy
+    assert [role for _, role in results] == ["fallback"] * len(threads)
+    release.set()
+    leader.join()
+    assert results[-1] == ("value", "leader")
+
+
+def test_leader_exception_is_not_reraised_in_followers():
+    flight = SingleFlight()
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("leader lỗi")
+        return "value"
+
+    leader, threads, release, results, errors = run_concurrently(flight, fn, followers=2)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join()
+    assert [type(error) for error in errors] == [RuntimeError]
+    assert all(result == ("value", "fallback") for result in results)
+
+
+def test_http_error_is_frozen_as_response():
+    def build():
+        raise HTTPException(status_code=404, detail="Board không tồn tại", headers={"X-Reason": "missing"})
+
+    body, status_code, headers = _frozen_build(build)
+    assert status_code == 404
+    assert body == JSONResponse({"detail": "Board không tồn tại"}).body
+    assert headers["x-reason"] == "missing"
+
+
+def test_other_errors_propagate_from_build():
+    def build():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        _frozen_build(build)
+
+
+def test_followers_past_limit_run_directly():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return "leader"
+
+    def call(fn):
+        results.append(flight.do("key", fn, max_followers=2))
+
+    leader = threading.Thread(target=call, args=(leader_fn,))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=call, args=(lambda: "own",)) for _ in range(2)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.1)
+    # Đã đủ 2 follower chờ: request tiếp theo không chiếm thêm thread để chờ
+    assert flight.do("key", lambda: "own", max_followers=2) == ("own", "direct")
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+    assert sorted(results) == [("leader", "follower")] * 2 + [("leader", "leader")]
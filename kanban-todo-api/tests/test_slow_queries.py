@@ -0,0 +1,61 @@
+"""Slow-query log: ngưỡng, che password, ring buffer, EXPLAIN trên engine gốc"""
+import os
+import tempfile
+
+from sqlalchemy import create_engine, text
+
+from app.database import instrumentation
+from app.database.slow_queries import SlowQueryLog, full_scan_tables
+
+
+def test_threshold():
+    log = SlowQueryLog(threshold_ms=10)
+    log.observe_query("SELECT 1", (), None, 0.009)
+    assert log.records() == []
+    log.observe_query("SELECT 2", (), None, 0.010)
+    [record] = log.records()
+    assert (record["statement"], record["duration_ms"]) == ("SELECT 2", 10.0)
+
+
+def test_password_parameters_redacted():
+    log = SlowQueryLog(threshold_ms=0)
+    log.observe_query("UPDATE users SET password_hash=? WHERE users.id = ?", ("$2b$12$hash", 1), None, 0.5)
+    log.observe_query("SELECT * FROM users WHERE PASSWORD_HASH = ?", ("$2b$12$hash",), None, 0.5)
+    log.observe_query("SELECT * FROM tasks WHERE title = ? AND id = ?", ("x" * 300, 7), None, 0.5)
+    tasks, upper, update = log.records()
+    assert update["parameters"] == upper["parameters"] == "<redacted>"
+    assert tasks["parameters"] == ["x" * 200 + "...", 7]
+
+
+def test_ring_buffer_is_bounded():
+    log = SlowQueryLog(threshold_ms=0, size=3)
+    for index in range(5):
+        # Worker chưa chạy: hàng đợi EXPLAIN đầy thì bỏ qua, không chặn request
+        log.observe_query(f"SELECT {index}", (), None, 0.5)
+    assert [record["statement"] for record in log.records()] == ["SELECT 4", "SELECT 3", "SELECT 2"]
+    assert log.records(limit=1)[0]["id"] == 5
+    log.clear()
+    assert log.records() == []
+
+
+def test_explain_runs_on_originating_engine():
+    tmp_dir = tempfile.mkdtemp()
+    primary = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'primary.db')}")
+    shard = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'shard.db')}")
+    with shard.begin() as connection:
+        connection.execute(text("CREATE TABLE only_on_shard (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    log = SlowQueryLog(engine=primary, threshold_ms=0)
+    instrumentation.install(shard)
+    instrumentation.add_query_observer(log.observe_query)
+    log.start()
+    try:
+        with shard.connect() as connection:
+            connection.execute(text("SELECT * FROM only_on_shard WHERE name = :name"), {"name": "x"})
+    finally:
+        instrumentation.remove_query_observer(log.observe_query)
+        log.stop()
+
+    [record] = [r for r in log.records() if "only_on_shard" in r["statement"]]
+    assert record["engine"].endswith("shard.db")
+    assert full_scan_tables(record["plan"]) == ["only_on_shard"], record["plan"]
@@ -0,0 +1,101 @@
+"""Shard (database_shard_urls) và write queue SQLite (sqlite_write_queue_enabled)
+
+Settings đọc lúc import nên test router chạy lại trong process pytest con với
+cấu hình tương ứng; các test còn lại dựng session của cấu hình ngay trong test.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, _enable_sqlite_foreign_keys, _enable_sqlite_wal
+from app.database.models import Board, Task, User
+from app.database.repository import TaskRepository
+from app.database.sharding import create_sharded_sessionmaker
+from app.database.write_queue import SQLiteWriteQueue, WriteQueueSession
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTER_TESTS = ["tests/test_tasks.py", "tests/test_boards.py"]
+
+
+def sqlite_engine(path, *, wal=False, **kwargs):
+    created = create_engine(f"sqlite:///{path}", **kwargs)
+    event.listen(created, "connect", _enable_sqlite_foreign_keys)
+    if wal:
+        event.listen(created, "connect", _enable_sqlite_wal)
+    Base.metadata.create_all(created)
+    return created
+
+
+@pytest.mark.parametrize("config", ["shards", "write_queue"])
+def test_router_suite(config, tmp_path):
+    # DATABASE_URL của process con là file tạm riêng (tests/conftest.py)
+    env = dict(os.environ)
+    if config == "shards":
+        env["DATABASE_SHARD_URLS"] = json.dumps([f"sqlite:///{tmp_path / 'shard1.db'}"])
+    else:
+        env["SQLITE_WRITE_QUEUE_ENABLED"] = "true"
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *ROUTER_TESTS],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stdout[-3000:] + result.stderr[-3000:]
+
+
+def test_cross_shard_get_multi_is_ordered_by_id(tmp_path):
+    engines = {str(index): sqlite_engine(tmp_path / f"shard{index}.db") for index in range(2)}
+    Sessions = create_sharded_sessionmaker(engines, autoflush=False, expire_on_commit=False)
+    with Sessions() as db:
+        user = User(username="shard_owner", password_hash="x")
+        db.add(user)
+        # Block id đầu tiên được lấy qua connection riêng ở primary: commit để không giữ lock ghi
+        db.commit()
+        boards = [Board(name=f"b{index}", owner_id=user.id) for index in range(2)]
+        db.add_all(boards)
+        db.commit()
+        # Board được đặt theo id % 2 -> hai board ở hai shard khác nhau
+        assert {db.router.shard_for_board(db, board.id) for board in boards} == {"0", "1"}
+        # Id task xen kẽ giữa hai shard
+        for index in range(6):
+            db.add(Task(title=f"t{index}", board_id=boards[index % 2].id))
+            db.flush()
+        db.commit()
+
+    repository = TaskRepository()
+    with Sessions() as db:
+        all_ids = [task.id for task in repository.get_multi(db)]
+        assert all_ids == sorted(all_ids) and len(all_ids) == 6
+        assert [task.id for task in repository.get_multi(db, skip=1, limit=3)] == all_ids[1:4]
+        assert [task.id for task in repository.get_multi(db, skip=4, limit=10)] == all_ids[4:]
+
+
+def test_write_queue_reads_own_writes(tmp_path):
+    path = tmp_path / "queue.db"
+    engine = sqlite_engine(path, wal=True)
+    writer = sqlite_engine(path, wal=True, pool_size=1, max_overflow=0, connect_args={"check_same_thread": False})
+    Sessions = sessionmaker(
+        class_=WriteQueueSession, write_queue=SQLiteWriteQueue(writer),
+        autoflush=False, expire_on_commit=False, bind=engine,
+    )
+    with Sessions() as db:
+        user = User(username="queue_owner", password_hash="x")
+        db.add(user)
+        db.flush()
+        board = Board(name="before", owner_id=user.id)
+        db.add(board)
+        db.flush()
+        board.name = "after"
+        db.flush()
+        # Sau câu ghi đầu tiên, đọc trong session đi qua connection ghi: thấy dữ liệu chưa commit
+        assert db.execute(select(Board.name).where(Board.id == board.id)).scalar() == "after"
+        with Sessions() as other:
+            assert other.execute(select(Board.name).where(Board.id == board.id)).scalar() is None
+        db.commit()
+        board_id = board.id
+
+    with Sessions() as other:
+        assert other.execute(select(Board.name).where(Board.id == board_id)).scalar() == "after"
@@ -0,0 +1,108 @@
+"""Router /tasks"""
+import pytest
+
+from app.database import instrumentation
+
+
+def create_task(client, user, board, **fields):
+    response = client.post("/tasks/", json={"title": "Task", "board_id": board["id"], **fields}, headers=user["headers"])
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_create_appends_to_column(client, owner, board):
+    statements = []
+
+    def observe(statement, parameters, context, duration):
+        statements.append(statement)
+
+    first = create_task(client, owner, board)
+    create_task(client, owner, board, status="done")
+    instrumentation.add_query_observer(observe)
+    try:
+        second = create_task(client, owner, board)
+    finally:
+        instrumentation.remove_query_observer(observe)
+    assert (first["position"], second["position"]) == (0, 1)
+    # Position lấy bằng COUNT, không SELECT cả cột
+    assert any("count(" in statement.lower() for statement in statements)
+
+
+def get_task(client, user, task_id):
+    response = client.get(f"/tasks/{task_id}", headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response
+
+
+def write_requests(task, owner):
+    """(method, url, body) của các endpoint ghi nhận If-Match"""
+    return [
+        ("PUT", f"/tasks/{task['id']}", {"title": "Đổi tên"}),
+        ("PATCH", f"/tasks/{task['id']}/move", {"status": "done"}),
+        ("PATCH", f"/tasks/{task['id']}/assign", {"assigned_to": owner["id"]}),
+        ("DELETE", f"/tasks/{task['id']}", None),
+    ]
+
+
+def send(client, user, method, url, body, if_match=None):
+    headers = dict(user["headers"])
+    if if_match is not None:
+        headers["If-Match"] = if_match
+    return client.request(method, url, json=body, headers=headers)
+
+
+@pytest.mark.parametrize("endpoint", range(4), ids=["update", "move", "assign", "delete"])
+def test_stale_if_match_is_rejected(client, owner, board, endpoint):
+    task = create_task(client, owner, board)
+    method, url, body = write_requests(task, owner)[endpoint]
+    response = send(client, owner, method, url, body, if_match=f'"{task["version"] + 1}"')
+    assert response.status_code == 412
+    # Không có gì được ghi
+    assert get_task(client, owner, task["id"]).json() == task
+
+
+@pytest.mark.parametrize("endpoint", range(4), ids=["update", "move", "assign", "delete"])
+def test_matching_if_match_is_applied(client, owner, board, endpoint):
+    task = create_task(client, owner, board)
+    etag = get_task(client, owner, task["id"]).headers["ETag"]
+    method, url, body = write_requests(task, owner)[endpoint]
+    response = send(client, owner, method, url, body, if_match=etag)
+    assert response.status_code == 200, response.text
+    if method != "DELETE":
+        assert response.json()["version"] == task["version"] + 1
+        assert response.headers["ETag"] == f'"{task["version"] + 1}"'
+
+
+@pytest.mark.parametrize("if_match, expected", [
+    (None, 200),       # không gửi: ghi không điều kiện
+    ("*", 200),
+    ('W/"{version}"', 200),
+    ("{version}", 200),
+    ('"abc"', 412),
+    ("W/", 412),
+])
+def test_if_match_parsing(client, owner, board, if_match, expected):
+    task = create_task(client, owner, board)
+    header = if_match.format(version=task["version"]) if if_match else None
+    response = send(client, owner, "PUT", f"/tasks/{task['id']}", {"title": "x"}, if_match=header)
+    assert response.status_code == expected, response.text
+
+
+def test_concurrent_write_between_read_and_update(client, owner, board, monkeypatch):
+    from app.database import SessionLocal, task_repository
+
+    task = create_task(client, owner, board)
+    etag = get_task(client, owner, task["id"]).headers["ETag"]
+    update = task_repository.update
+
+    def update_after_concurrent_write(db, *, db_obj, obj_in, **kwargs):
+        # Request khác ghi task sau khi router đã đọc version, trước câu UPDATE có điều kiện
+        with SessionLocal() as other:
+            update(other, db_obj=task_repository.get(other, task["id"]), obj_in={"title": "Ghi trước"})
+        return update(db, db_obj=db_obj, obj_in=obj_in, **kwargs)
+
+    monkeypatch.setattr(task_repository, "update", update_after_concurrent_write)
+    response = send(client, owner, "PUT", f"/tasks/{task['id']}", {"title": "Ghi sau"}, if_match=etag)
+    assert response.status_code == 412
+    monkeypatch.undo()
+    assert get_task(client, owner, task["id"]).json()["title"] == "Ghi trước"